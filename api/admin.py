@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Group, Event, UserProfile, Member, Comment, Bet
+from .models import Group, Event, UserProfile, Member, Comment, Bet, Standing, ScoringJob
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
     fields = ('name', 'location', 'description')
@@ -31,3 +31,10 @@ class BetAdmin(admin.ModelAdmin):
     fields = ('user', 'event', 'score1', 'score2')
     list_display = ('id', 'user', 'event', 'score1', 'score2')
 
+@admin.register(Standing)
+class StandingAdmin(admin.ModelAdmin):
+    list_display = ('id', 'group', 'user', 'points', 'exact_hits', 'correct_outcomes', 'rank')
+
+@admin.register(ScoringJob)
+class ScoringJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event', 'score1', 'score2', 'status', 'processed', 'total', 'created', 'finished')
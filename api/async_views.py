@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .live import broker
+from .models import Event, Group, Member, Bet
+from .replicas import primary
+from .serializers import BetPredictionSerializer, BetSerializer
+
+
+async def authenticate(request, allow_query_token=False):
+    """Async counterpart of CachedTokenAuthentication, returns the user or None.
+
+    EventSource clients cannot send headers, streams may pass ?token= instead.
+    """
+    header = request.headers.get('Authorization', '').split()
+    if len(header) == 2 and header[0].lower() == 'token':
+        key = header[1]
+    elif allow_query_token and request.GET.get('token'):
+        key = request.GET['token']
+    else:
+        return None
+
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached[0]
+
+    try:
+        with primary():
+            token = await Token.objects.select_related('user').aget(key=key)
+    except Token.DoesNotExist:
+        return None
+    if not token.user.is_active:
+        return None
+
+    token_cache.set(key, token.user, token)
+    return token.user
+
+
+@csrf_exempt
+async def place_bet(request):
+    """Native async version of BetViewset.place_bet for the ASGI application.
+
+    Takes the same payload and returns the same responses, but waits on the
+    database without holding a worker thread.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'message': "Metod not allowed"}, status=405)
+
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Invalid token.'}, status=401)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'detail': 'JSON parse error'}, status=400)
+
+    serializer = BetPredictionSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    event = await Event.objects.filter(pk=serializer.validated_data['event']).values(
+        'id', 'time', 'group_id').afirst()
+    if event is None:
+        return JsonResponse(
+            {'event': ['Invalid pk "{}" - object does not exist.'.format(serializer.validated_data['event'])]},
+            status=400
+        )
+
+    if event['time'] < timezone.now():
+        return JsonResponse({"message": "You can't place a bet. Too late!"}, status=400)
+
+    if not await Member.objects.filter(user=user, group_id=event['group_id']).aexists():
+        return JsonResponse({"message": "User not in group"}, status=403)
+
+    bet, created = await Bet.objects.aupdate_or_create(
+        event_id=event['id'],
+        user=user,
+        defaults={
+            "score1": serializer.validated_data['score1'],
+            "score2": serializer.validated_data['score2']
+        }
+    )
+
+    bet = await BetSerializer.load(Bet.objects.filter(pk=bet.pk), request, nested=True).aget()
+    result = await sync_to_async(lambda: BetSerializer(bet, context={'request': request}).data)()
+    return JsonResponse(
+        {
+            "message": "Bet Created" if created else "Bet Updated",
+            "new": created,
+            "result": result
+        },
+        status=200
+    )
+
+
+async def group_stream(request, pk):
+    """Server-Sent Events stream of result and standings updates of a group."""
+    user = await authenticate(request, allow_query_token=True)
+    if user is None:
+        return JsonResponse({'detail': 'Invalid token.'}, status=401)
+
+    if not await Group.objects.filter(pk=pk).aexists():
+        return JsonResponse({'detail': 'No Group matches the given query.'}, status=404)
+
+    if not user.is_superuser and not await Member.objects.filter(user=user, group_id=pk).aexists():
+        return JsonResponse({"message": "User not in group"}, status=403)
+
+    subscription = broker.subscribe(pk)
+    heartbeat = getattr(settings, 'BWF_STREAM_HEARTBEAT', 15)
+
+    async def events():
+        try:
+            yield ': connected\n\n'
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
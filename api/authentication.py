@@ -0,0 +1,96 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from .replicas import primary
+
+
+def cache_settings():
+    options = getattr(settings, 'BWF_TOKEN_CACHE', {})
+    return options.get('MAX_ENTRIES', 10000), options.get('TTL', 60)
+
+
+class TokenCache:
+    """Bounded LRU of token key -> (user, token) with a time to live.
+
+    The cache lives in the worker process. Signals evict entries when a token
+    is deleted or its user changes; other processes see the change at the
+    latest after the TTL.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, token, expires = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        return copy.copy(user), token
+
+    def set(self, key, user, token):
+        max_entries, ttl = cache_settings()
+        if max_entries <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (copy.copy(user), token, time.monotonic() + ttl)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def evict_key(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[0].pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[0].pk]
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in TokenAuthentication that skips the Token/User join on cache hits."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # A replica may not have a fresh token yet, or still have a revoked one.
+        with primary():
+            user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
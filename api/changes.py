@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from rest_framework.exceptions import ValidationError
+
+from .models import Event, Member, Comment, Standing, GroupChange, GroupChangeFloor
+from .serializers import (EventResultSerializer, MemberSerializer, CommentSerializer, StandingSerializer,
+                          GroupSerializer)
+
+SECTIONS = {
+    GroupChange.EVENT: 'events',
+    GroupChange.MEMBER: 'members',
+    GroupChange.COMMENT: 'comments',
+    GroupChange.STANDING: 'standings',
+}
+
+# Attribute the changes of a kind are keyed by.
+KEYS = {
+    GroupChange.EVENT: 'id',
+    GroupChange.MEMBER: 'user_id',
+    GroupChange.COMMENT: 'id',
+    GroupChange.STANDING: 'user_id',
+}
+
+SERIALIZERS = {
+    GroupChange.EVENT: EventResultSerializer,
+    GroupChange.MEMBER: MemberSerializer,
+    GroupChange.COMMENT: CommentSerializer,
+    GroupChange.STANDING: StandingSerializer,
+}
+
+
+def record(group_id, kind, ids):
+    """Log that objects of a group changed or were deleted.
+
+    Members and standings are keyed by user id. Readers look the objects up
+    again, so saves and deletions are logged the same way.
+    """
+    record_all([(group_id, kind, i) for i in ids])
+
+
+def record_all(changes):
+    """record() for (group_id, kind, key) triples, in one insert."""
+    GroupChange.objects.bulk_create(
+        [GroupChange(group_id=group_id, kind=kind, object_id=i) for group_id, kind, i in set(changes)],
+        batch_size=500)
+
+
+def current_version(group_id):
+    return GroupChange.objects.filter(group_id=group_id).aggregate(version=Max('id'))['version'] or 0
+
+
+def parse_version(value):
+    try:
+        version = int(value)
+    except (TypeError, ValueError):
+        version = -1
+    if version < 0:
+        raise ValidationError({'since': 'Expected a version returned by this endpoint'})
+    return version
+
+
+def changed_since(group_id, version):
+    """(kind -> keys of the objects changed after version, the new version)."""
+    touched = {kind: set() for kind, _ in GroupChange.KINDS}
+    latest = version
+    rows = (GroupChange.objects.filter(group_id=group_id, id__gt=version)
+            .order_by('id').values_list('id', 'kind', 'object_id'))
+    for pk, kind, object_id in rows.iterator(chunk_size=2000):
+        touched[kind].add(object_id)
+        latest = pk
+    return touched, latest
+
+
+def querysets(request, group_id):
+    return {
+        GroupChange.EVENT: Event.objects.filter(group_id=group_id).order_by('time', 'id'),
+        GroupChange.MEMBER: MemberSerializer.load(Member.objects.filter(group_id=group_id), request, nested=True)
+                                            .order_by('user_id'),
+        GroupChange.COMMENT: Comment.objects.filter(group_id=group_id).order_by('-time', '-id'),
+        GroupChange.STANDING: Standing.objects.filter(group_id=group_id).select_related('user')
+                                              .order_by('rank', 'user_id'),
+    }
+
+
+def context(request):
+    # ?expand= applies to the sections, ?fields= does not.
+    return {'request': request, 'nested': True}
+
+
+def pruned_through(group_id):
+    floor = GroupChangeFloor.objects.filter(group_id=group_id).values_list('pruned_through', flat=True).first()
+    return floor or 0
+
+
+def prune(keep):
+    """Drop all but the latest keep changes of every group, return how many went.
+
+    Each pruned group remembers the last id dropped, versions older than it
+    get a snapshot instead of a delta missing those changes.
+    """
+    pruned = 0
+    crowded = (GroupChange.objects.values('group_id').annotate(count=Count('id'))
+               .filter(count__gt=keep).values_list('group_id', flat=True))
+    for group_id in crowded:
+        log = GroupChange.objects.filter(group_id=group_id)
+        last = log.order_by('-id').values_list('id', flat=True)[keep]
+        with transaction.atomic():
+            pruned += log.filter(id__lte=last).delete()[0]
+            GroupChangeFloor.objects.update_or_create(group_id=group_id, defaults={'pruned_through': last})
+    return pruned
+
+
+def snapshot(request, group):
+    """Everything a client keeps about a group, to start syncing from."""
+    group_id = group.pk
+    version = current_version(group_id)
+    data = {'version': version, 'full': True, 'group': GroupSerializer(group, context=context(request)).data,
+            'deleted': {section: [] for section in SECTIONS.values()}}
+    latest_comments = getattr(settings, 'BWF_GROUP_DETAIL_COMMENTS', 20)
+    for kind, queryset in querysets(request, group_id).items():
+        if kind == GroupChange.COMMENT:
+            queryset = queryset[:latest_comments]
+        data[SECTIONS[kind]] = SERIALIZERS[kind](queryset, many=True, context=context(request)).data
+    return data
+
+
+def delta(request, group, version):
+    """What changed in a group after version: current state of touched objects and deleted keys.
+
+    Objects whose last change was a deletion, or that are gone anyway, are
+    listed under 'deleted', 'group' is null unless the group itself changed.
+    The work done depends on the number of changes, not on the size of the
+    group. A version older than the pruned part of the log gets a snapshot.
+    """
+    group_id = group.pk
+    if version < pruned_through(group_id):
+        return snapshot(request, group)
+
+    touched, latest = changed_since(group_id, version)
+    data = {'version': latest, 'full': False, 'deleted': {},
+            'group': GroupSerializer(group, context=context(request)).data if touched[GroupChange.GROUP] else None}
+    for kind, queryset in querysets(request, group_id).items():
+        section = SECTIONS[kind]
+        ids = touched[kind]
+        objects = list(queryset.filter(**{KEYS[kind] + '__in': ids})) if ids else []
+        found = {getattr(obj, KEYS[kind]) for obj in objects}
+        data[section] = SERIALIZERS[kind](objects, many=True, context=context(request)).data
+        data['deleted'][section] = sorted(ids - found)
+    return data
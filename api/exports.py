@@ -0,0 +1,119 @@
+import csv
+import io
+import itertools
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .models import Bet, Standing
+from .streaming import BUFFER_SIZE
+
+FORMATS = ('csv', 'jsonl')
+
+# Output column -> field path, read with values_list() so no model or serializer is built.
+BET_COLUMNS = (
+    ('group_id', 'event__group_id'),
+    ('event_id', 'event_id'),
+    ('team1', 'event__team1'),
+    ('team2', 'event__team2'),
+    ('time', 'event__time'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('bet_score1', 'score1'),
+    ('bet_score2', 'score2'),
+    ('score1', 'event__score1'),
+    ('score2', 'event__score2'),
+    ('points', 'points'),
+)
+
+STANDING_COLUMNS = (
+    ('group_id', 'group_id'),
+    ('rank', 'rank'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('points', 'points'),
+    ('exact_hits', 'exact_hits'),
+    ('correct_outcomes', 'correct_outcomes'),
+)
+
+
+def chunk_size():
+    return getattr(settings, 'BWF_LIST_STREAM_CHUNK_SIZE', 1000)
+
+
+def rows(queryset, columns):
+    """(header, row iterator) of a queryset, bound to the database chosen now."""
+    queryset = queryset.using(queryset.db)
+    paths = [path for _, path in columns]
+    return [name for name, _ in columns], queryset.values_list(*paths).iterator(chunk_size=chunk_size())
+
+
+def bet_rows(group_ids=None):
+    bets = Bet.objects.all()
+    if group_ids is not None:
+        bets = bets.filter(event__group_id__in=group_ids)
+    return rows(bets.order_by('event__group_id', 'event_id', 'id'), BET_COLUMNS)
+
+
+def standing_rows(group_ids=None):
+    standings = Standing.objects.all()
+    if group_ids is not None:
+        standings = standings.filter(group_id__in=group_ids)
+    return rows(standings.order_by('group_id', 'rank', 'user_id'), STANDING_COLUMNS)
+
+
+def _buffered(pieces):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def encode_csv(header, rows):
+    def lines():
+        line = io.StringIO()
+        writer = csv.writer(line)
+        for row in itertools.chain([header], rows):
+            writer.writerow(row)
+            yield line.getvalue().encode()
+            line.seek(0)
+            line.truncate()
+    return _buffered(lines())
+
+
+def encode_jsonl(header, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    return _buffered(encoder.encode(dict(zip(header, row))).encode() + b'\n' for row in rows)
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode(header, rows, output, compress=False):
+    chunks = encode_csv(header, rows) if output == 'csv' else encode_jsonl(header, rows)
+    return gzipped(chunks) if compress else chunks
+
+
+def response(header, rows, output, compress, filename):
+    """Stream rows as a CSV or JSONL download, optionally gzipped."""
+    content_type = 'text/csv' if output == 'csv' else 'application/x-ndjson'
+    filename = '{}.{}'.format(filename, output)
+    if compress:
+        content_type = 'application/gzip'
+        filename += '.gz'
+    streamed = StreamingHttpResponse(encode(header, rows, output, compress), content_type=content_type)
+    streamed['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
+    return streamed
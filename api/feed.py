@@ -0,0 +1,75 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+# Newest first, served by the (group, time, id) index of Comment.
+NEWEST_FIRST = ('-time', '-id')
+OLDEST_FIRST = ('time', 'id')
+
+
+def encode_cursor(obj):
+    """Opaque position of a row in a (time, id) ordering."""
+    value = '{}|{}'.format(obj.time.isoformat(), obj.id)
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(value, name):
+    try:
+        time, pk = base64.urlsafe_b64decode(value.encode()).decode().split('|')
+        time, pk = parse_datetime(time), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        time = None
+    if time is None:
+        raise ValidationError({name: 'Invalid cursor'})
+    return time, pk
+
+
+def beyond(time, pk, descending=False):
+    """Rows after (time, pk) in (time, id) order, or before it when descending."""
+    if descending:
+        return Q(time__lt=time) | Q(time=time, id__lt=pk)
+    return Q(time__gt=time) | Q(time=time, id__gt=pk)
+
+
+def parse_since(value):
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        since = None
+    if since is None:
+        raise ValidationError({'since': 'Expected an ISO 8601 date and time'})
+    return since
+
+
+def page(comments, params, limit):
+    """One window of a group's comments, newest first.
+
+    ?before=<cursor> pages back in history, ?after=<cursor> and
+    ?since=<datetime> return what was posted later (the oldest `limit` of
+    it, so a poller catches up in order). Without any of them the latest
+    comments are returned. Returns (comments, more) where more tells if
+    further comments exist in the direction that was read.
+    """
+    given = [name for name in ('before', 'after', 'since') if params.get(name)]
+    if len(given) > 1:
+        raise ValidationError({'detail': 'Use only one of before, after and since'})
+
+    ordering = OLDEST_FIRST if given and given[0] != 'before' else NEWEST_FIRST
+    if 'before' in given:
+        time, pk = decode_cursor(params['before'], 'before')
+        comments = comments.filter(beyond(time, pk, descending=True))
+    elif 'after' in given:
+        time, pk = decode_cursor(params['after'], 'after')
+        comments = comments.filter(beyond(time, pk))
+    elif 'since' in given:
+        comments = comments.filter(time__gt=parse_since(params['since']))
+
+    rows = list(comments.order_by(*ordering)[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if ordering == OLDEST_FIRST:
+        rows.reverse()
+    return rows, more
@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser
+
+from . import changes, roles, versions
+from .models import Group, Event, GroupChange
+from .serializers import FixtureSerializer
+
+COLUMNS = ('group', 'team1', 'team2', 'time')
+
+
+class CSVParser(BaseParser):
+    """text/csv request bodies, parsed into a list of row dicts."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return read_csv(io.StringIO(stream.read().decode(encoding)))
+
+
+def read_csv(handle):
+    reader = csv.DictReader(handle)
+    if not reader.fieldnames or not {'team1', 'team2', 'time'} <= set(reader.fieldnames):
+        raise ParseError("CSV needs a header with team1, team2, time and optionally group")
+    # Blank cells are missing values, not empty strings.
+    return [{k: v for k, v in row.items() if k in COLUMNS and v not in ('', None)} for row in reader]
+
+
+def read_rows(request):
+    """Schedule rows of an import request.
+
+    Accepted: a JSON list or {"events": [...]}, a text/csv body, or an
+    uploaded 'file' holding CSV or JSON.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        if upload.name.lower().endswith('.json'):
+            try:
+                data = json.load(upload)
+            except ValueError:
+                raise ParseError("The uploaded file is not valid JSON")
+        else:
+            return read_csv(io.StringIO(upload.read().decode('utf-8-sig')))
+    else:
+        data = request.data
+
+    if isinstance(data, dict):
+        data = data.get('events')
+    if not isinstance(data, list):
+        raise ParseError("Expected a list of events")
+    return data
+
+
+def import_fixtures(request, rows, default_group=None):
+    """Validate all rows, then insert them in one transaction.
+
+    Returns (events, errors) where errors lists {'row', 'errors'} dicts. Nothing
+    is written unless every row is valid: fields, group existence, the
+    requester being admin of the group, and no team playing twice at the
+    same time in a group, neither within the schedule nor against the
+    events already stored.
+    """
+    if default_group is not None:
+        try:
+            default_group = int(default_group)
+        except (TypeError, ValueError):
+            raise ValidationError({'group': ["A valid integer is required."]})
+
+    child = FixtureSerializer()
+    errors = []
+    fixtures = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            fixtures.append((number, dict(child.run_validation(row))))
+        except ValidationError as exc:
+            errors.append({'row': number, 'errors': exc.detail})
+
+    group_ids = set()
+    for number, fixture in fixtures:
+        fixture.setdefault('group', default_group)
+        if fixture['group'] is None:
+            errors.append({'row': number, 'errors': {'group': ["This field is required."]}})
+        else:
+            group_ids.add(fixture['group'])
+
+    existing_groups = set(Group.objects.filter(pk__in=group_ids).values_list('pk', flat=True))
+    allowed = group_ids if request.user.is_superuser else set(roles.admin_group_ids(request))
+    times = [fixture['time'] for _, fixture in fixtures]
+    booked = set()
+    if times:
+        # A range instead of time__in keeps the query under SQLite's parameter limit.
+        stored = Event.objects.filter(group_id__in=existing_groups, time__range=(min(times), max(times)))
+        for group_id, team1, team2, time in stored.values_list('group_id', 'team1', 'team2', 'time'):
+            booked.update({(group_id, team1, time), (group_id, team2, time)})
+
+    events = []
+    for number, fixture in fixtures:
+        group_id = fixture['group']
+        if group_id is None:
+            continue
+        row_errors = {}
+        if group_id not in existing_groups:
+            row_errors['group'] = ["Group does not exist"]
+        elif group_id not in allowed:
+            row_errors['group'] = ["You have to be group admin"]
+        if fixture['team1'] == fixture['team2']:
+            row_errors['team2'] = ["A team can't play itself"]
+
+        slots = {(group_id, fixture['team1'], fixture['time']), (group_id, fixture['team2'], fixture['time'])}
+        taken = slots & booked
+        if taken:
+            row_errors['time'] = ["{} already plays at this time".format(
+                ', '.join(sorted(team for _, team, _ in taken)))]
+        booked |= slots
+
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+        else:
+            events.append(Event(group_id=group_id, team1=fixture['team1'], team2=fixture['team2'],
+                                time=fixture['time']))
+
+    if errors:
+        errors.sort(key=lambda error: error['row'])
+        return [], errors
+
+    with transaction.atomic():
+        events = Event.objects.bulk_create(events, batch_size=500)
+        versions.bump_groups(group_ids)
+        changes.record_all([(e.group_id, GroupChange.EVENT, e.pk) for e in events])
+    return events, []
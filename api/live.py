@@ -0,0 +1,91 @@
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def format_event(event, data):
+    """Encode one Server-Sent Events message."""
+    return 'event: {}\ndata: {}\n\n'.format(event, json.dumps(data, cls=DjangoJSONEncoder))
+
+
+class Subscription:
+    def __init__(self, group_id, loop, maxsize):
+        self.group_id = group_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, message):
+        # Runs on the subscriber's loop. A viewer that stopped reading loses
+        # its oldest messages instead of growing the queue without bound.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class Broker:
+    """In-process pub/sub fan-out of group updates to streaming viewers.
+
+    Subscribers are idle asyncio queues, so a waiting viewer costs no thread
+    and no database work. Publishing is thread safe and can be called from
+    sync request handlers. Only viewers connected to the same process are
+    reached.
+    """
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, group_id):
+        maxsize = getattr(settings, 'BWF_STREAM_QUEUE_SIZE', 100)
+        subscription = Subscription(group_id, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscriptions.setdefault(group_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.group_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.group_id]
+
+    def subscriber_count(self, group_id):
+        return len(self._subscriptions.get(group_id, ()))
+
+    def publish(self, group_id, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(group_id, ()))
+        if not subscriptions:
+            return 0
+
+        message = format_event(event, data)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # The subscriber's loop is closed, its stream is gone.
+                self.unsubscribe(subscription)
+        return len(subscriptions)
+
+
+broker = Broker()
+
+
+def publish_result(event):
+    broker.publish(event.group_id, 'result', {
+        'event': event.id,
+        'score1': event.score1,
+        'score2': event.score2,
+    })
+
+
+def publish_standings(group_id, standings):
+    broker.publish(group_id, 'standings', [
+        {'user_id': s.user_id, 'points': s.points, 'exact_hits': s.exact_hits,
+         'correct_outcomes': s.correct_outcomes, 'rank': s.rank}
+        for s in standings
+    ])
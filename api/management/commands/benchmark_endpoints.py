@@ -0,0 +1,156 @@
+import json
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.models import User, Group, Member, Event
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the main API endpoints in-process against the current database "
+            "(see generate_tournament) and print latency, throughput and query counts as JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', type=int, help="Group to benchmark (default: largest)")
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', action='append', help="Endpoint name, can be repeated")
+        parser.add_argument('--host', default='localhost', help="Host header, must be in ALLOWED_HOSTS")
+        parser.add_argument('--output', help="Write the JSON report to this file")
+        parser.add_argument('--background-scoring', action='store_true',
+                            help="Leave scoring to the worker pool instead of scoring inside "
+                                 "set_results, timings then exclude scoring")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be positive")
+
+        group = self.pick_group(options['group'])
+        scenarios = self.scenarios(group)
+        if options['only']:
+            unknown = set(options['only']) - set(scenarios)
+            if unknown:
+                raise CommandError("Unknown endpoints: {}".format(', '.join(sorted(unknown))))
+            scenarios = {name: scenarios[name] for name in options['only']}
+
+        report = {
+            'revision': git_revision(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'group': group.id,
+            'group_members': group.member_count,
+            'iterations': options['iterations'],
+            'eager_scoring': not options['background_scoring'],
+            'endpoints': {},
+        }
+        scoring = dict(getattr(settings, 'BWF_SCORING', {}), EAGER=not options['background_scoring'])
+        # Every iteration comes from the same user and address, limits would turn them into 429s.
+        throttle = dict(getattr(settings, 'BWF_THROTTLE', {}), ENABLED=False)
+        with override_settings(BWF_SCORING=scoring, BWF_THROTTLE=throttle):
+            for name, (token, method, path, payload) in scenarios.items():
+                report['endpoints'][name] = self.measure(
+                    token, method, path, payload, options['iterations'], options['warmup'], options['host'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output)
+        self.stdout.write(output)
+
+    def pick_group(self, group_id):
+        groups = Group.objects.annotate(member_count=Count('members'))
+        if group_id is not None:
+            groups = groups.filter(pk=group_id)
+        group = groups.order_by('-member_count').first()
+        if group is None:
+            raise CommandError("No group to benchmark, run generate_tournament first")
+        return group
+
+    def scenarios(self, group):
+        now = timezone.now()
+        admin = Member.objects.filter(group=group, admin=True).select_related('user').first()
+        member = Member.objects.filter(group=group, admin=False).select_related('user').first() or admin
+        if admin is None:
+            raise CommandError("Group {} has no admin member".format(group.id))
+        superuser = User.objects.filter(is_superuser=True).first()
+        future = Event.objects.filter(group=group, time__gt=now).order_by('time').first()
+        finished = Event.objects.filter(group=group, time__lt=now).order_by('-time').first()
+
+        def token(user):
+            return Token.objects.get_or_create(user=user)[0].key
+
+        member_token, admin_token = token(member.user), token(admin.user)
+        scenarios = {
+            'group_retrieve': (member_token, 'get', '/api/groups/{}/'.format(group.id), None),
+            'group_leaderboard': (member_token, 'get', '/api/groups/{}/leaderboard/'.format(group.id), None),
+            'bets_list': (member_token, 'get', '/api/bets/', None),
+            'events_list': (member_token, 'get', '/api/events/', None),
+            'members_list': (member_token, 'get', '/api/members/', None),
+            'comments_list': (member_token, 'get', '/api/comments/', None),
+            'users_list': (admin_token, 'get', '/api/users/', None),
+        }
+        if superuser is not None:
+            scenarios['users_list_superuser'] = (token(superuser), 'get', '/api/users/', None)
+        if future is not None:
+            scenarios['event_retrieve_upcoming'] = (admin_token, 'get', '/api/events/{}/'.format(future.id), None)
+            scenarios['place_bet'] = (member_token, 'post', '/api/bets/place_bet/',
+                                      {'event': future.id, 'score1': 1, 'score2': 0})
+        if finished is not None:
+            scenarios['event_retrieve_finished'] = (member_token, 'get',
+                                                    '/api/events/{}/'.format(finished.id), None)
+            scenarios['set_results'] = (admin_token, 'put', '/api/events/{}/set_results/'.format(finished.id),
+                                        {'score1': finished.score1 or 0, 'score2': finished.score2 or 0})
+        return scenarios
+
+    def measure(self, token, method, path, payload, iterations, warmup, host):
+        client = Client(HTTP_HOST=host, HTTP_AUTHORIZATION='Token {}'.format(token))
+        send = getattr(client, method)
+        kwargs = {'data': json.dumps(payload), 'content_type': 'application/json'} if payload else {}
+
+        for _ in range(warmup):
+            send(path, **kwargs)
+
+        latencies, queries, statuses = [], [], {}
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = send(path, **kwargs)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            queries.append(len(captured))
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        elapsed = time.perf_counter() - started
+
+        return {
+            'method': method.upper(),
+            'path': path,
+            'status_codes': statuses,
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'throughput_rps': round(iterations / elapsed, 2),
+            'queries': {'min': min(queries), 'max': max(queries),
+                        'mean': round(statistics.fmean(queries), 2)},
+        }
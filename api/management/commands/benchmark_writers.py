@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.models import Group, Member, Event
+
+PROFILES = ('basic', 'production')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = ("Benchmark concurrent place_bet writers on SQLite. By default every profile of "
+            "BWF_SQLITE_PROFILE runs in its own process against a copy of the database "
+            "(see generate_tournament) and the reports are printed side by side as JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help="Concurrent writers")
+        parser.add_argument('--requests', type=int, default=400, help="Bets placed in total")
+        parser.add_argument('--host', default='localhost', help="Host header, must be in ALLOWED_HOSTS")
+        parser.add_argument('--profile', choices=PROFILES, action='append',
+                            help="Profile to compare, can be repeated (default: all)")
+        parser.add_argument('--in-process', action='store_true',
+                            help="Run against the configured database with the current settings")
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['requests'] < 1:
+            raise CommandError("--threads and --requests must be positive")
+        if connection.vendor != 'sqlite':
+            raise CommandError("benchmark_writers needs a SQLite database")
+
+        if options['in_process']:
+            # All writers share one address and a few tokens, measure the database not the limits.
+            with override_settings(BWF_THROTTLE=dict(getattr(settings, 'BWF_THROTTLE', {}), ENABLED=False)):
+                report = self.run(options['threads'], options['requests'], options['host'])
+        else:
+            report = {profile: self.run_profile(profile, options) for profile in options['profile'] or PROFILES}
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run_profile(self, profile, options):
+        with tempfile.TemporaryDirectory() as directory:
+            copy = os.path.join(directory, 'db.sqlite3')
+            source = sqlite3.connect(str(settings.DATABASES['default']['NAME']))
+            target = sqlite3.connect(copy)
+            with target:
+                source.backup(target)
+            # WAL is stored in the file, reset it so 'basic' runs on Django's default journal.
+            target.execute('PRAGMA journal_mode={}'.format('WAL' if profile == 'production' else 'DELETE'))
+            source.close()
+            target.close()
+
+            env = dict(os.environ, BWF_SQLITE_PROFILE=profile, BWF_DB_NAME=copy)
+            command = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'benchmark_writers',
+                       '--in-process', '--threads', str(options['threads']),
+                       '--requests', str(options['requests']), '--host', options['host']]
+            result = subprocess.run(command, env=env, capture_output=True, text=True)
+            if result.returncode:
+                raise CommandError("Profile {} failed:\n{}".format(profile, result.stderr))
+            return json.loads(result.stdout)
+
+    def run(self, threads, requests, host):
+        group = (Group.objects.annotate(member_count=Count('members'))
+                 .order_by('-member_count').first())
+        if group is None:
+            raise CommandError("No group to benchmark, run generate_tournament first")
+        events = list(Event.objects.filter(group=group, time__gt=timezone.now())
+                      .values_list('id', flat=True)[:50])
+        if not events:
+            raise CommandError("Group {} has no event before kickoff".format(group.id))
+        users = list(Member.objects.filter(group=group).values_list('user', flat=True)[:threads * 4])
+        tokens = [Token.objects.get_or_create(user_id=user)[0].key for user in users]
+
+        latencies, statuses = [], {}
+        lock = threading.Lock()
+
+        def place(number):
+            client = Client(HTTP_HOST=host, HTTP_AUTHORIZATION='Token {}'.format(tokens[number % len(tokens)]))
+            payload = {'event': events[number % len(events)], 'score1': number % 4, 'score2': number % 3}
+            started = time.perf_counter()
+            try:
+                status = client.post('/api/bets/place_bet/', payload).status_code
+            except Exception as error:  # "database is locked" surfaces as an exception
+                status = type(error).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        def worker(numbers):
+            try:
+                for number in numbers:
+                    place(number)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, [range(i, requests, threads) for i in range(threads)]))
+        elapsed = time.perf_counter() - started
+
+        database = settings.DATABASES['default']
+        return {
+            'profile': getattr(settings, 'BWF_SQLITE_PROFILE', None),
+            'journal_mode': self.journal_mode(),
+            'transaction_mode': database.get('OPTIONS', {}).get('transaction_mode'),
+            'write_gate': getattr(settings, 'BWF_WRITE_GATE', {}).get('ENABLED', False),
+            'threads': threads,
+            'requests': requests,
+            'ok': statuses.get('200', 0),
+            'statuses': statuses,
+            'seconds': round(elapsed, 3),
+            'writes_per_second': round(statuses.get('200', 0) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'max_ms': round(max(latencies), 2),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+        }
+
+    def journal_mode(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
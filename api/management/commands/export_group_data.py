@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import exports
+
+SOURCES = {
+    'bets': exports.bet_rows,
+    'standings': exports.standing_rows,
+}
+
+
+class Command(BaseCommand):
+    help = "Stream flat bet or standing rows of groups (default: all) as CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(SOURCES))
+        parser.add_argument('--group', type=int, action='append', dest='groups',
+                            help="Group id to export, can be repeated (default: all groups)")
+        parser.add_argument('--output', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help="Compress the output with gzip")
+        parser.add_argument('--file', help="Write to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        header, rows = SOURCES[options['kind']](options['groups'])
+        chunks = exports.encode(header, rows, options['output'], options['gzip'])
+
+        if options['file']:
+            with open(options['file'], 'wb') as handle:
+                for chunk in chunks:
+                    handle.write(chunk)
+            return
+
+        binary = getattr(self.stdout._out, 'buffer', None)
+        if binary is None and options['gzip']:
+            raise CommandError("--gzip needs --file or a binary stdout")
+        for chunk in chunks:
+            if binary is not None:
+                binary.write(chunk)
+            else:
+                self.stdout.write(chunk.decode(), ending='')
+        if binary is not None:
+            binary.flush()
@@ -0,0 +1,135 @@
+import json
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api import memberships, standings
+from api.models import User, Group, Member, Event, Bet, Comment
+from api.scoring import points_for
+
+TEAMS = (
+    'Poland', 'Germany', 'Spain', 'France', 'England', 'Italy', 'Portugal', 'Netherlands',
+    'Belgium', 'Croatia', 'Denmark', 'Switzerland', 'Austria', 'Czechia', 'Ukraine', 'Sweden',
+    'Brazil', 'Argentina', 'Uruguay', 'Mexico', 'USA', 'Japan', 'Korea', 'Morocco',
+)
+GOALS = (0, 0, 1, 1, 1, 2, 2, 3, 4)
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic tournament dataset with bulk inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--members', type=int, default=200, help="Members per group")
+        parser.add_argument('--events', type=int, default=64, help="Events per group")
+        parser.add_argument('--bet-ratio', type=float, default=0.8,
+                            help="Share of members betting on each event")
+        parser.add_argument('--comments', type=int, default=100, help="Comments per group")
+        parser.add_argument('--finished', type=float, default=0.5,
+                            help="Share of events that already have a result")
+        parser.add_argument('--shared-users', type=float, default=0.2,
+                            help="Share of members reused across groups")
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--prefix', default=None, help="Username/group name prefix")
+
+    def handle(self, *args, **options):
+        if options['groups'] < 1 or options['members'] < 1 or options['events'] < 1:
+            raise CommandError("--groups, --members and --events must be positive")
+
+        rng = random.Random(options['seed'])
+        prefix = options['prefix'] or uuid.uuid4().hex[:6]
+
+        with transaction.atomic():
+            summary = self.generate(rng, prefix, options)
+        standings.rebuild(summary['group_ids'])
+
+        self.stdout.write(json.dumps(summary, indent=2))
+
+    def generate(self, rng, prefix, options):
+        members_per_group = options['members']
+        shared = int(members_per_group * options['shared_users'])
+        own = members_per_group - shared
+        user_count = shared + own * options['groups']
+
+        password = make_password('bench-{}'.format(prefix))
+        users = User.objects.bulk_create(
+            [User(username='{}_user_{}'.format(prefix, i), password=password) for i in range(user_count)],
+            batch_size=BATCH_SIZE
+        )
+        Token.objects.bulk_create([Token(key=Token.generate_key(), user=u) for u in users],
+                                  batch_size=BATCH_SIZE)
+
+        groups = Group.objects.bulk_create(
+            [Group(name='{}_group_{}'.format(prefix, i), location='Bench', description='Synthetic group')
+             for i in range(options['groups'])],
+            batch_size=BATCH_SIZE
+        )
+
+        shared_users = users[:shared]
+        members = []
+        group_users = {}
+        for index, group in enumerate(groups):
+            start = shared + index * own
+            people = shared_users + users[start:start + own]
+            group_users[group.id] = people
+            members += [Member(group=group, user=user, admin=(position == 0))
+                        for position, user in enumerate(people)]
+        Member.objects.bulk_create(members, batch_size=BATCH_SIZE)
+        memberships.refresh(u.id for u in users)
+
+        now = timezone.now()
+        events = []
+        for group in groups:
+            for number in range(options['events']):
+                team1, team2 = rng.sample(TEAMS, 2)
+                finished = number < options['events'] * options['finished']
+                kickoff = (now - timedelta(hours=2 * (options['events'] - number)) if finished
+                           else now + timedelta(hours=2 * (number + 1)))
+                events.append(Event(
+                    team1=team1, team2=team2, time=kickoff, group=group,
+                    score1=rng.choice(GOALS) if finished else None,
+                    score2=rng.choice(GOALS) if finished else None,
+                ))
+        events = Event.objects.bulk_create(events, batch_size=BATCH_SIZE)
+
+        bets = []
+        bet_count = 0
+        for event in events:
+            for user in group_users[event.group_id]:
+                if rng.random() >= options['bet_ratio']:
+                    continue
+                score1, score2 = rng.choice(GOALS), rng.choice(GOALS)
+                points = None
+                if event.score1 is not None:
+                    points = points_for(score1, score2, event.score1, event.score2)
+                bets.append(Bet(user=user, event=event, score1=score1, score2=score2, points=points))
+            if len(bets) >= BATCH_SIZE * 10:
+                Bet.objects.bulk_create(bets, batch_size=BATCH_SIZE)
+                bet_count += len(bets)
+                bets = []
+        Bet.objects.bulk_create(bets, batch_size=BATCH_SIZE)
+        bet_count += len(bets)
+
+        comments = [
+            Comment(group=group, user=rng.choice(group_users[group.id]),
+                    description='Comment {} in {}'.format(number, group.name))
+            for group in groups for number in range(options['comments'])
+        ]
+        Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+
+        return {
+            'prefix': prefix,
+            'group_ids': [g.id for g in groups],
+            'users': len(users),
+            'members': len(members),
+            'events': len(events),
+            'bets': bet_count,
+            'comments': len(comments),
+        }
@@ -0,0 +1,108 @@
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+PATHS = {
+    'sync': '/api/bets/place_bet/',
+    'async': '/api/bets/place_bet_async/',
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def post(host, port, path, token, body):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write((
+            "POST {path} HTTP/1.1\r\n"
+            "Host: {host}\r\n"
+            "Authorization: Token {token}\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: {length}\r\n"
+            "Connection: close\r\n\r\n"
+        ).format(path=path, host=host, token=token, length=len(body)).encode() + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def run(base_url, path, tokens, event, total, concurrency):
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    semaphore = asyncio.Semaphore(concurrency)
+    token_cycle = itertools.cycle(tokens)
+    latencies, statuses = [], {}
+
+    async def one(token):
+        body = json.dumps({'event': event, 'score1': random.randint(0, 4),
+                           'score2': random.randint(0, 4)}).encode()
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status = await post(host, port, path, token, body)
+            except OSError:
+                status = 'connection_error'
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(next(token_cycle)) for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'path': path,
+        'requests': total,
+        'concurrency': concurrency,
+        'ok': statuses.get(200, 0),
+        'statuses': {str(k): v for k, v in statuses.items()},
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(total / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = ("Fire concurrent place_bet requests at a running server and compare the sync "
+            "and async implementations. Run the server under ASGI (e.g. "
+            "'uvicorn bwf.asgi:application') so the async path is served natively, and with "
+            "BWF_THROTTLE=0: every request comes from this address and a few tokens.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--token', action='append', dest='tokens', required=True,
+                            help="Token of a member of the event's group, can be repeated")
+        parser.add_argument('--event', type=int, required=True, help="Id of an event before kickoff")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        modes = ['sync', 'async'] if options['mode'] == 'both' else [options['mode']]
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+
+        results = {}
+        for mode in modes:
+            results[mode] = asyncio.run(run(
+                options['base_url'], PATHS[mode], options['tokens'], options['event'],
+                options['requests'], options['concurrency']
+            ))
+        self.stdout.write(json.dumps(results, indent=2))
+        if any(result['statuses'].get('429') for result in results.values()):
+            self.stderr.write("Requests were throttled, restart the server with BWF_THROTTLE=0")
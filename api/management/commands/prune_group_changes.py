@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import changes
+
+
+class Command(BaseCommand):
+    help = "Drop the oldest entries of the group change logs, keeping the latest ones of every group"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=getattr(settings, 'BWF_GROUP_CHANGES_KEEP', 10000),
+                            help="Changes kept per group (default: BWF_GROUP_CHANGES_KEEP)")
+
+    def handle(self, *args, **options):
+        if options['keep'] < 1:
+            raise CommandError("--keep must be positive")
+        pruned = changes.prune(options['keep'])
+        self.stdout.write(self.style.SUCCESS("Pruned {} change(s)".format(pruned)))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import memberships
+
+
+class Command(BaseCommand):
+    help = "Recompute the membership summaries nested in serialized users"
+
+    def handle(self, *args, **options):
+        users = memberships.rebuild()
+        self.stdout.write(self.style.SUCCESS("Rebuilt membership summaries of {} user(s)".format(users)))
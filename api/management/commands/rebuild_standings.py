@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api import standings
+
+
+class Command(BaseCommand):
+    help = "Recompute group standings from scored bets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', type=int, action='append', dest='groups',
+                            help="Group id to rebuild, can be repeated (default: all groups)")
+
+    def handle(self, *args, **options):
+        rebuilt = standings.rebuild(options['groups'])
+        self.stdout.write(self.style.SUCCESS("Rebuilt standings for {} group(s)".format(rebuilt)))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api import worker
+
+
+class Command(BaseCommand):
+    help = "Claim and run queued scoring jobs from the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue once and exit instead of polling")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Scoring worker started")
+        worker.run_worker(once=options['once'])
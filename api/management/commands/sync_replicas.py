@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def copy_database(source, target):
+    """Copy one SQLite file into another with the online backup API."""
+    source = sqlite3.connect(str(source))
+    target = sqlite3.connect(str(target), timeout=20)
+    try:
+        with target:
+            source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+class Command(BaseCommand):
+    help = ("Refresh the file-based read replicas (BWF_REPLICAS) from the primary SQLite "
+            "database, once or every --interval seconds to emulate replication lag")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help="Keep copying, pausing this many seconds")
+
+    def handle(self, *args, **options):
+        aliases = getattr(settings, 'BWF_READ_REPLICAS', [])
+        if not aliases:
+            raise CommandError("No replicas configured, set BWF_REPLICAS")
+        if any(connections[alias].vendor != 'sqlite' for alias in ['default'] + aliases):
+            raise CommandError("sync_replicas only copies SQLite databases")
+
+        primary = settings.DATABASES['default']['NAME']
+        while True:
+            for alias in aliases:
+                connections[alias].close()
+                copy_database(primary, settings.DATABASES[alias]['NAME'])
+            self.stdout.write(self.style.SUCCESS("Copied the primary to {} replica(s)".format(len(aliases))))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
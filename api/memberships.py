@@ -0,0 +1,38 @@
+from .models import Member, MembershipSummary
+
+BATCH_SIZE = 500
+
+
+def summarize(user_ids):
+    """user_id -> [{group_id, group_name, admin}] read from the memberships."""
+    summaries = {user_id: [] for user_id in user_ids}
+    rows = (Member.objects.filter(user_id__in=list(summaries))
+            .order_by('user_id', 'id')
+            .values_list('user_id', 'group_id', 'group__name', 'admin'))
+    for user_id, group_id, group_name, admin in rows:
+        summaries[user_id].append({'group_id': group_id, 'group_name': group_name, 'admin': admin})
+    return summaries
+
+
+def refresh(user_ids):
+    """Rewrite the stored summaries of the given users, return how many."""
+    user_ids = sorted(set(user_ids))
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        summaries = summarize(user_ids[start:start + BATCH_SIZE])
+        MembershipSummary.objects.bulk_create(
+            [MembershipSummary(user_id=user_id, groups=groups) for user_id, groups in summaries.items()],
+            update_conflicts=True, unique_fields=['user'], update_fields=['groups'],
+        )
+    return len(user_ids)
+
+
+def refresh_group(group_id):
+    """A group's name is part of every member's summary."""
+    refresh(Member.objects.filter(group_id=group_id).values_list('user_id', flat=True))
+
+
+def rebuild():
+    """Rewrite every summary; users who left all their groups get an empty one."""
+    user_ids = set(Member.objects.values_list('user_id', flat=True).distinct())
+    user_ids.update(MembershipSummary.objects.values_list('user_id', flat=True))
+    return refresh(user_ids)
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_standings(apps, schema_editor):
+    Member = apps.get_model('api', 'Member')
+    Bet = apps.get_model('api', 'Bet')
+    Standing = apps.get_model('api', 'Standing')
+
+    standings = []
+    for member in Member.objects.all():
+        totals = Bet.objects.filter(event__group_id=member.group_id, user_id=member.user_id).aggregate(
+            total=Sum('points'),
+            exact=Count('id', filter=Q(points=3)),
+            correct=Count('id', filter=Q(points=1)),
+        )
+        standings.append(Standing(group_id=member.group_id, user_id=member.user_id,
+                                  points=totals['total'] or 0,
+                                  exact_hits=totals['exact'],
+                                  correct_outcomes=totals['correct']))
+
+    by_group = {}
+    for standing in standings:
+        by_group.setdefault(standing.group_id, []).append(standing)
+    for group_standings in by_group.values():
+        group_standings.sort(key=lambda s: (-s.points, -s.exact_hits))
+        previous, rank = None, 0
+        for position, standing in enumerate(group_standings, start=1):
+            if (standing.points, standing.exact_hits) != previous:
+                rank, previous = position, (standing.points, standing.exact_hits)
+            standing.rank = rank
+
+    Standing.objects.bulk_create(standings, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_bet'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('exact_hits', models.IntegerField(default=0)),
+                ('correct_outcomes', models.IntegerField(default=0)),
+                ('rank', models.IntegerField(default=1)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='api.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'rank'], name='api_standin_group_i_01aead_idx')],
+                'unique_together': {('group', 'user')},
+            },
+        ),
+        migrations.RunPython(build_standings, migrations.RunPython.noop),
+    ]
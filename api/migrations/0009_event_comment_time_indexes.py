@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_standing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['time', 'id'], name='api_comment_time_fb0115_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['time', 'id'], name='api_event_time_df6cd8_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_event_comment_time_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score1', models.IntegerField()),
+                ('score2', models.IntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('superseded', 'Superseded')], default='pending', max_length=16)),
+                ('total', models.IntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('last_bet_id', models.BigIntegerField(default=0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scoring_jobs', to='api.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='api_scoring_status_b91874_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_scoringjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('group', 'Group'), ('event', 'Event')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_summaries(apps, schema_editor):
+    Member = apps.get_model('api', 'Member')
+    MembershipSummary = apps.get_model('api', 'MembershipSummary')
+
+    summaries = {}
+    rows = Member.objects.order_by('user_id', 'id').values_list('user_id', 'group_id', 'group__name', 'admin')
+    for user_id, group_id, group_name, admin in rows:
+        summaries.setdefault(user_id, []).append(
+            {'group_id': group_id, 'group_name': group_name, 'admin': admin})
+    MembershipSummary.objects.bulk_create(
+        [MembershipSummary(user_id=user_id, groups=groups) for user_id, groups in summaries.items()],
+        batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_resourceversion'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MembershipSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='membership_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('groups', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_membershipsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['group', 'time', 'id'], name='api_comment_group_i_bf4210_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_comment_group_time_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('event', 'Event'), ('member', 'Member'), ('comment', 'Comment'), ('standing', 'Standing')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='api.group')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'id'], name='api_groupch_group_i_58ae67_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_groupchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupChangeFloor',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_floor', serialize=False, to='api.group')),
+                ('pruned_through', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='groupchange',
+            name='kind',
+            field=models.CharField(choices=[('group', 'Group'), ('event', 'Event'), ('member', 'Member'), ('comment', 'Comment'), ('standing', 'Standing')], max_length=16),
+        ),
+    ]
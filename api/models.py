@@ -23,21 +23,14 @@ class Event(models.Model):
     score2 = models.IntegerField(null=True, blank=True)
     group = models.ForeignKey(Group, related_name='events', on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['time', 'id']),
+        ]
+
     def calculate_points(self):
-        for bet in self.bets.all():
-            points = 0
-            if bet.score1 == self.score1 and bet.score2 == self.score2:
-                points = 3
-            else:
-                score_diff = self.score1 - self.score2
-                bet_diff = bet.score1 - bet.score2
-
-                if ((score_diff > 0 and bet_diff > 0)
-                        or (score_diff == 0 and bet_diff == 0)
-                        or (score_diff < 0 and bet_diff < 0)):
-                    points = 1
-            bet.points = points
-            bet.save()
+        from .scoring import score_event
+        return score_event(self)
 
 class Member(models.Model):
     group = models.ForeignKey(Group, related_name='members', on_delete=models.CASCADE)
@@ -56,6 +49,13 @@ class Comment(models.Model):
     description = models.CharField(max_length=256, null=False, unique=False)
     time = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['time', 'id']),
+            # Keyset reads of one group's feed, see api.feed.
+            models.Index(fields=['group', 'time', 'id']),
+        ]
+
 class Bet(models.Model):
     user = models.ForeignKey(User, related_name='user_bet', on_delete=models.CASCADE)
     event = models.ForeignKey(Event, related_name='bets', on_delete=models.CASCADE)
@@ -67,4 +67,115 @@ class Bet(models.Model):
         unique_together = (('user', 'event'))
         indexes = [
             models.Index(fields=['user', 'event']),
-        ]
\ No newline at end of file
+        ]
+
+
+class Standing(models.Model):
+    group = models.ForeignKey(Group, related_name='standings', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='standings', on_delete=models.CASCADE)
+    points = models.IntegerField(default=0)
+    exact_hits = models.IntegerField(default=0)
+    correct_outcomes = models.IntegerField(default=0)
+    rank = models.IntegerField(default=1)
+
+    class Meta:
+        unique_together = (('group', 'user'))
+        indexes = [
+            models.Index(fields=['group', 'rank']),
+        ]
+
+
+class ScoringJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    SUPERSEDED = 'superseded'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+        (SUPERSEDED, 'Superseded'),
+    )
+
+    event = models.ForeignKey(Event, related_name='scoring_jobs', on_delete=models.CASCADE)
+    score1 = models.IntegerField()
+    score2 = models.IntegerField()
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING)
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    last_bet_id = models.BigIntegerField(default=0)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+
+class ResourceVersion(models.Model):
+    GROUP = 'group'
+    EVENT = 'event'
+    KINDS = (
+        (GROUP, 'Group'),
+        (EVENT, 'Event'),
+    )
+
+    kind = models.CharField(max_length=16, choices=KINDS)
+    object_id = models.BigIntegerField()
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('kind', 'object_id'))
+
+
+class MembershipSummary(models.Model):
+    """A user's memberships as [{group_id, group_name, admin}], kept by api.memberships."""
+    user = models.OneToOneField(User, primary_key=True, related_name='membership_summary',
+                                on_delete=models.CASCADE)
+    groups = models.JSONField(default=list)
+
+
+class GroupChange(models.Model):
+    """One change to what a group shows, written by api.changes.
+
+    The ids only grow, the latest one a client has seen is its sync version.
+    """
+    GROUP = 'group'
+    EVENT = 'event'
+    MEMBER = 'member'
+    COMMENT = 'comment'
+    STANDING = 'standing'
+    KINDS = (
+        (GROUP, 'Group'),
+        (EVENT, 'Event'),
+        (MEMBER, 'Member'),
+        (COMMENT, 'Comment'),
+        (STANDING, 'Standing'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    group = models.ForeignKey(Group, related_name='changes', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=16, choices=KINDS)
+    # Group, event and comment pk, user id for members and standings.
+    object_id = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'id']),
+        ]
+
+
+class GroupChangeFloor(models.Model):
+    """Id up to which the change log of a group was pruned.
+
+    A client whose version is older missed changes and gets a snapshot.
+    """
+    group = models.OneToOneField(Group, primary_key=True, related_name='change_floor', on_delete=models.CASCADE)
+    pruned_through = models.BigIntegerField(default=0)
@@ -0,0 +1,89 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import feed
+
+
+def positive_int(value, cutoff=None):
+    """Parse a strictly positive integer, capped at cutoff."""
+    value = int(value)
+    if value <= 0:
+        raise ValueError
+    if cutoff:
+        return min(value, cutoff)
+    return value
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination on an indexed ordering.
+
+    The page size defaults to BWF_PAGE_SIZE and ?page_size= is capped by
+    BWF_MAX_PAGE_SIZE, so a single page never loads an unbounded number of rows.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        max_page_size = getattr(settings, 'BWF_MAX_PAGE_SIZE', 500)
+        default = min(getattr(settings, 'BWF_PAGE_SIZE', 50), max_page_size)
+        try:
+            return positive_int(request.query_params[self.page_size_query_param], cutoff=max_page_size)
+        except (KeyError, ValueError):
+            return default
+
+
+class TimeCursorPagination(IdCursorPagination):
+    """Events by kickoff time, a keyset on (time, id).
+
+    DRF cursors keep the first ordering field plus an offset, which skips or
+    repeats rows sharing a time at a page boundary. Here ?after= and
+    ?before= hold the time and id of the last and first row of a page, the
+    same cursors as the comment feed, so each page is an index range.
+    """
+    ordering = ('time', 'id')
+    cursor_query_param = 'after'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        descending = self.ordering[0].startswith('-')
+        after, before = request.query_params.get('after'), request.query_params.get('before')
+        if after and before:
+            raise ValidationError({'detail': 'Use only one of after and before'})
+
+        queryset = queryset.order_by(*self.ordering)
+        if after:
+            queryset = queryset.filter(feed.beyond(*feed.decode_cursor(after, 'after'), descending=descending))
+        elif before:
+            queryset = queryset.filter(feed.beyond(*feed.decode_cursor(before, 'before'), descending=not descending))
+            queryset = queryset.reverse()
+
+        rows = list(queryset[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if before:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, more
+        else:
+            self.has_next, self.has_previous = more, bool(after)
+        return self.page
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        url = remove_query_param(self.base_url, 'before')
+        return replace_query_param(url, 'after', feed.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        url = remove_query_param(self.base_url, 'after')
+        return replace_query_param(url, 'before', feed.encode_cursor(self.page[0]))
+
+
+class RecentCursorPagination(TimeCursorPagination):
+    """Newest first."""
+    ordering = ('-time', '-id')
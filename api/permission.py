@@ -1,6 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from django.utils import timezone
-from .models import Member
+from . import roles
 
 
 class IsSuperUserOnly(BasePermission):
@@ -34,13 +34,7 @@ class GroupPermission(BasePermission):
 
         user = request.user
 
-        is_admin = Member.objects.filter(
-            user=user,
-            group=obj,
-            admin=True
-        ).exists()
-
-        if user.is_superuser or is_admin:
+        if user.is_superuser or roles.is_admin(request, obj.pk):
             return True
 
         self.message = "Only superuser or group admin allowed"
@@ -60,10 +54,7 @@ class UserPermission(BasePermission):
 
         # admin jakiejkolwiek grupy → GET only
         if request.method in SAFE_METHODS:
-            return Member.objects.filter(
-                user=request.user,
-                admin=True
-            ).exists()
+            return roles.is_admin_anywhere(request)
 
         return False
 
@@ -85,7 +76,7 @@ class SetAdminPermission(BasePermission):
         if not user_id or not group_id:
             return False
 
-        from .models import User, Member
+        from .models import User
         try:
             target_user = User.objects.get(pk=user_id)
         except User.DoesNotExist:
@@ -96,13 +87,7 @@ class SetAdminPermission(BasePermission):
             self.message = 'You can not revoke group admin privileges for a superuser'
             return False
 
-        is_admin_in_group = Member.objects.filter(
-            user=user,
-            group_id=group_id,
-            admin=True
-        ).exists()
-
-        return is_admin_in_group
+        return roles.is_admin(request, group_id)
 
 class IsGroupAdminForEventCreate(BasePermission):
     message = "You have to be global admin"
@@ -119,13 +104,7 @@ class IsGroupAdminForEventCreate(BasePermission):
         if request.user.is_authenticated and request.user.is_superuser:
             return True
 
-        is_admin = Member.objects.filter(
-            user = request.user,
-            group = group_id,
-            admin = True
-        ).exists()
-
-        if not is_admin:
+        if not roles.is_admin(request, group_id):
             self.message = 'You have to be group admin'
             return False
 
@@ -139,16 +118,10 @@ class IsGroupAdminForEventCreate(BasePermission):
             self.message = 'The event does not finish!'
             return False
 
-        is_admin = Member.objects.filter(
-            user=request.user,
-            group=obj.group,
-            admin=True
-        ).exists()
-
         if request.user.is_superuser:
             return True
 
-        if not is_admin:
+        if not roles.is_admin(request, obj.group_id):
             self.message = "You have to be group admin"
             return False
 
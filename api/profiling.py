@@ -0,0 +1,235 @@
+import heapq
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.01,
+    'TOP_QUERIES': 5,
+}
+
+# Phases reported in Server-Timing, besides db and total. 'view' is whatever
+# is left: URL routing and the handler. 'serialize' is the to_representation
+# of serializers, 'render' turning the data into bytes.
+PHASES = ('auth', 'perm', 'view', 'serialize', 'render')
+
+# Profile of the request being handled, for code that has no request at hand.
+current_profile = ContextVar('bwf_profile', default=None)
+
+
+def option(name):
+    return getattr(settings, 'BWF_PROFILING', {}).get(name, DEFAULTS[name])
+
+
+class Profile:
+    """Timings of one sampled request.
+
+    SQL time is counted under 'db' only, phases report their time outside SQL.
+    """
+
+    def __init__(self, top_queries):
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.current = None
+        self.phase_sql = 0.0
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.top_queries = top_queries
+        self.slowest = []
+
+    def record_sql(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.sql_time += duration
+            self.phase_sql += duration
+            entry = (duration, self.query_count, sql[:500])
+            if len(self.slowest) < self.top_queries:
+                heapq.heappush(self.slowest, entry)
+            elif self.top_queries:
+                heapq.heappushpop(self.slowest, entry)
+
+    @contextmanager
+    def phase(self, name):
+        if self.current is not None:
+            # Nested phases (e.g. permissions loading the user) count once.
+            yield
+            return
+        self.current = name
+        self.phase_sql = 0.0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - started - self.phase_sql
+            self.current = None
+
+    def finish(self):
+        total = time.perf_counter() - self.started
+        measured = sum(v for k, v in self.phases.items() if k != 'view')
+        self.phases['view'] = max(total - measured - self.sql_time, 0.0)
+        self.total = total
+
+    def server_timing(self):
+        parts = ['{};dur={:.2f}'.format(name, self.phases[name] * 1000) for name in PHASES]
+        parts.append('db;dur={:.2f};desc="{} queries"'.format(self.sql_time * 1000, self.query_count))
+        parts.append('total;dur={:.2f}'.format(self.total * 1000))
+        return ', '.join(parts)
+
+    def as_log(self, request, response):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(self.total * 1000, 2),
+            'phases_ms': {name: round(value * 1000, 2) for name, value in self.phases.items()},
+            'queries': self.query_count,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'slowest_queries': [
+                {'ms': round(duration * 1000, 2), 'sql': sql}
+                for duration, _, sql in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+def record_sql(execute, sql, params, many, context):
+    """Execute wrapper of every connection, timing queries of profiled requests.
+
+    Connections belong to threads and async requests query from other threads
+    than the one their middleware runs on, so the profile is looked up in the
+    context rather than wrappers being added per request.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile.record_sql(execute, sql, params, many, context)
+
+
+def watch(connection):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+def get_profile(request):
+    return getattr(getattr(request, '_request', request), '_bwf_profile', None)
+
+
+@contextmanager
+def phase(request, name):
+    profile = get_profile(request)
+    if profile is None:
+        yield
+        return
+    with profile.phase(name):
+        yield
+
+
+class ProfilingMiddleware:
+    """Opt-in per-request profiling with a Server-Timing header.
+
+    Enabled by BWF_PROFILING['ENABLED'], a BWF_PROFILING['SAMPLE_RATE'] share
+    of requests is profiled and logged as JSON to the 'api.profiling' logger.
+    Requests that are not sampled pass straight through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = self.sample(request)
+        if profile is None:
+            return self.get_response(request)
+
+        with self.recording(profile):
+            response = self.get_response(request)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = self.sample(request)
+        if profile is None:
+            return await self.get_response(request)
+
+        with self.recording(profile):
+            response = await self.get_response(request)
+        return self.report(request, response, profile)
+
+    @staticmethod
+    def sample(request):
+        if not option('ENABLED') or random.random() >= option('SAMPLE_RATE'):
+            return None
+        profile = Profile(option('TOP_QUERIES'))
+        request._bwf_profile = profile
+        return profile
+
+    @staticmethod
+    @contextmanager
+    def recording(profile):
+        token = current_profile.set(profile)
+        try:
+            yield
+        finally:
+            current_profile.reset(token)
+
+    @staticmethod
+    def report(request, response, profile):
+        profile.finish()
+        response['Server-Timing'] = profile.server_timing()
+        logger.info(json.dumps(profile.as_log(request, response)))
+        return response
+
+
+class ProfiledSerializerMixin:
+    """Reports the time serializers spend building their output.
+
+    Nested serializers run inside their parent's to_representation and are
+    counted once; the items of a list add up.
+    """
+
+    def to_representation(self, instance):
+        profile = current_profile.get()
+        if profile is None:
+            return super().to_representation(instance)
+        with profile.phase('serialize'):
+            return super().to_representation(instance)
+
+
+class ProfiledViewMixin:
+    """Reports authentication, permission and rendering time of DRF views."""
+
+    def perform_authentication(self, request):
+        with phase(request, 'auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with phase(request, 'perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with phase(request, 'perm'):
+            super().check_object_permissions(request, obj)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if get_profile(request) is not None and hasattr(response, 'render'):
+            # Render here instead of in the handler so the time can be attributed.
+            with phase(request, 'render'):
+                response.render()
+        return response
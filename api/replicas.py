@@ -0,0 +1,140 @@
+import contextvars
+import hashlib
+import random
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_KEY = 'bwf:sticky:{}'
+
+# Replica alias serving the reads of the current request, None means the primary.
+_replica = contextvars.ContextVar('bwf_replica', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'BWF_READ_REPLICAS', [])
+
+
+def client_key(request):
+    """Who a request comes from, before authentication has run.
+
+    The token header, else the session cookie, else the address, hashed so
+    that no credential ends up in a cache key.
+    """
+    identity = (request.META.get('HTTP_AUTHORIZATION')
+                or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+                or request.META.get('REMOTE_ADDR', ''))
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+
+def stick(request):
+    """Serve the client from the primary until replicas have caught up with its write."""
+    cache.set(STICKY_KEY.format(client_key(request)), 1, getattr(settings, 'BWF_REPLICA_STICKY_SECONDS', 10))
+
+
+async def astick(request):
+    await cache.aset(STICKY_KEY.format(client_key(request)), 1,
+                     getattr(settings, 'BWF_REPLICA_STICKY_SECONDS', 10))
+
+
+def is_sticky(request):
+    return cache.get(STICKY_KEY.format(client_key(request))) is not None
+
+
+async def ais_sticky(request):
+    return await cache.aget(STICKY_KEY.format(client_key(request))) is not None
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block, e.g. for credentials that must not be stale."""
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads of safe-method API requests to a read replica.
+
+    Everything else (writes, requests with unsafe methods, clients that just
+    wrote, workers and management commands) uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related objects come from the database their parent was read from.
+            return instance._state.db
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema with the data, see sync_replicas.
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    """Pin the reads of a request to one replica, or to the primary.
+
+    A client that made a successful write (placing a bet, setting results,
+    ...) reads from the primary for BWF_REPLICA_STICKY_SECONDS so it sees
+    its own writes while the replicas lag behind.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        aliases = replica_aliases()
+        if not aliases:
+            return self.get_response(request)
+
+        replica = None
+        if request.method in SAFE_METHODS and not is_sticky(request):
+            replica = random.choice(aliases)
+        token = _replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            stick(request)
+        return response
+
+    async def __acall__(self, request):
+        aliases = replica_aliases()
+        if not aliases:
+            return await self.get_response(request)
+
+        replica = None
+        if request.method in SAFE_METHODS and not await ais_sticky(request):
+            replica = random.choice(aliases)
+        # Copied into the threads sync_to_async runs the ORM on.
+        token = _replica.set(replica)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            await astick(request)
+        return response
@@ -0,0 +1,141 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import roles
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'TTL': 300,
+    'LOCK_TIMEOUT': 30,
+    'WAIT': 5,
+    'POLL_INTERVAL': 0.05,
+}
+
+
+def option(name):
+    return getattr(settings, 'BWF_RESPONSE_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class Stats:
+    """Hit/miss counters of this process.
+
+    'coalesced' counts requests that waited for another request computing the
+    same key instead of serializing the payload themselves.
+    """
+
+    FIELDS = ('hits', 'misses', 'coalesced')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = sum(counts.values())
+        counts['hit_ratio'] = round((counts['hits'] + counts['coalesced']) / lookups, 4) if lookups else None
+        return counts
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+
+stats = Stats()
+
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+class _KeyLock:
+    """Process-local lock per cache key, dropped once nobody holds or waits for it."""
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        with _key_locks_guard:
+            entry = _key_locks.setdefault(self.key, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+
+    def __exit__(self, *exc):
+        with _key_locks_guard:
+            entry = _key_locks[self.key]
+            entry[0].release()
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[self.key]
+
+
+def visibility(request, group_id):
+    """Which version of a group's payload the viewer may see."""
+    user = request.user
+    if user.is_superuser or roles.is_admin(request, group_id):
+        return 'admin'
+    if roles.is_member(request, group_id):
+        return 'member'
+    return 'guest'
+
+
+def group_key(etag, visibility_class):
+    # The ETag holds the group's version, a bump from any write moves to a new key.
+    return 'bwf:group-detail:{}:{}'.format(etag.strip('"'), visibility_class)
+
+
+def get_or_compute(key, compute):
+    """Return the cached value of key, computing it at most once at a time.
+
+    Concurrent requests for a cold key wait for the first one: in this process
+    on a per-key lock, across processes sharing the cache on a lock entry added
+    with cache.add(). A waiter that gives up after WAIT seconds computes the
+    value itself.
+    """
+    cache = caches[option('CACHE')]
+    value = cache.get(key)
+    if value is not None:
+        stats.incr('hits')
+        return value
+
+    with _KeyLock(key):
+        value = cache.get(key)
+        if value is not None:
+            stats.incr('coalesced')
+            return value
+
+        lock_key = key + ':lock'
+        if not cache.add(lock_key, 1, option('LOCK_TIMEOUT')):
+            value = _wait_for(cache, key)
+            if value is not None:
+                stats.incr('coalesced')
+                return value
+            owner = False
+        else:
+            owner = True
+
+        try:
+            value = compute()
+            cache.set(key, value, option('TTL'))
+            stats.incr('misses')
+        finally:
+            if owner:
+                cache.delete(lock_key)
+    return value
+
+
+def _wait_for(cache, key):
+    deadline = time.monotonic() + option('WAIT')
+    while time.monotonic() < deadline:
+        time.sleep(option('POLL_INTERVAL'))
+        value = cache.get(key)
+        if value is not None:
+            return value
+    return None
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Member
+
+CACHE_KEY = 'bwf:roles:{}'
+
+
+def get_roles(request):
+    """group_id -> admin flag for the requesting user.
+
+    Loaded once per request and stored on the underlying HttpRequest, so DRF
+    permissions, views and serializers of the same request share one lookup.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+
+    holder = getattr(request, '_request', request)
+    cached = getattr(holder, '_bwf_roles', None)
+    if cached is None or cached[0] != user.pk:
+        cached = (user.pk, load_roles(user.pk))
+        holder._bwf_roles = cached
+    return cached[1]
+
+
+def load_roles(user_id):
+    ttl = getattr(settings, 'BWF_ROLE_CACHE_TTL', 0)
+    if ttl:
+        roles = cache.get(CACHE_KEY.format(user_id))
+        if roles is not None:
+            return roles
+
+    roles = dict(Member.objects.filter(user_id=user_id).values_list('group_id', 'admin'))
+
+    if ttl:
+        cache.set(CACHE_KEY.format(user_id), roles, ttl)
+    return roles
+
+
+def invalidate(user_id):
+    cache.delete(CACHE_KEY.format(user_id))
+
+
+def _group_key(group_id):
+    try:
+        return int(group_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_member(request, group_id):
+    return _group_key(group_id) in get_roles(request)
+
+
+def is_admin(request, group_id):
+    return get_roles(request).get(_group_key(group_id), False)
+
+
+def is_admin_anywhere(request):
+    return any(get_roles(request).values())
+
+
+def admin_group_ids(request):
+    return [group_id for group_id, admin in get_roles(request).items() if admin]
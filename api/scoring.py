@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models import Case, When, Value, F, IntegerField
+
+EXACT_SCORE_POINTS = 3
+CORRECT_RESULT_POINTS = 1
+WRONG_RESULT_POINTS = 0
+
+
+def points_for(bet_score1, bet_score2, score1, score2):
+    """Points for a single prediction, the same rules as points_expression()."""
+    if bet_score1 is None or bet_score2 is None:
+        return WRONG_RESULT_POINTS
+
+    if bet_score1 == score1 and bet_score2 == score2:
+        return EXACT_SCORE_POINTS
+
+    score_diff = score1 - score2
+    bet_diff = bet_score1 - bet_score2
+    if ((score_diff > 0 and bet_diff > 0)
+            or (score_diff == 0 and bet_diff == 0)
+            or (score_diff < 0 and bet_diff < 0)):
+        return CORRECT_RESULT_POINTS
+
+    return WRONG_RESULT_POINTS
+
+
+def points_expression(score1, score2):
+    """SQL expression giving the points of every bet for the final score."""
+    if score1 > score2:
+        outcome = When(score1__gt=F('score2'), then=Value(CORRECT_RESULT_POINTS))
+    elif score1 == score2:
+        outcome = When(score1=F('score2'), then=Value(CORRECT_RESULT_POINTS))
+    else:
+        outcome = When(score1__lt=F('score2'), then=Value(CORRECT_RESULT_POINTS))
+
+    return Case(
+        When(score1=score1, score2=score2, then=Value(EXACT_SCORE_POINTS)),
+        outcome,
+        default=Value(WRONG_RESULT_POINTS),
+        output_field=IntegerField(),
+    )
+
+
+def score_bets(event_id, group_id, score1, score2, after_id=0, limit=None, rank=True):
+    """Score the bets of an event with id > after_id, at most limit of them.
+
+    The previous points are read first so the group standings can be moved by
+    the difference instead of being recomputed, rank=False leaves re-ranking
+    to the caller. Returns (rows scored, id of the last scored bet or None).
+    """
+    from .models import Bet
+    from .standings import apply_deltas, bet_stats
+    from .live import publish_standings
+    from .versions import bump_events
+
+    bets = Bet.objects.filter(event_id=event_id, id__gt=after_id)
+    with transaction.atomic():
+        previous = bets.order_by('id').values_list('id', 'user_id', 'score1', 'score2', 'points')
+        previous = list(previous[:limit] if limit else previous)
+        if not previous:
+            return 0, None
+
+        last_id = previous[-1][0]
+        if limit:
+            bets = bets.filter(id__lte=last_id)
+        scored = bets.update(points=points_expression(score1, score2))
+        bump_events([event_id])
+
+        deltas = {}
+        for _, user_id, bet_score1, bet_score2, old_points in previous:
+            new_points = points_for(bet_score1, bet_score2, score1, score2)
+            deltas[user_id] = tuple(new - old for new, old in
+                                    zip(bet_stats(new_points), bet_stats(old_points)))
+        changed = apply_deltas(group_id, deltas, rank=rank)
+        if changed:
+            transaction.on_commit(lambda: publish_standings(group_id, changed))
+    return scored, last_id
+
+
+def score_event(event):
+    """Score all bets of a finished event in one pass, return rows scored."""
+    if event.score1 is None or event.score2 is None:
+        return 0
+
+    scored, _ = score_bets(event.id, event.group_id, event.score1, event.score2)
+    return scored
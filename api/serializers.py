@@ -1,8 +1,13 @@
 from rest_framework import serializers
-from .models import Group, Event, UserProfile, Member, Comment, Bet
+from . import roles, sparse
+from .profiling import ProfiledSerializerMixin
+from .sparse import SparseFieldsMixin
+from .models import Group, Event, UserProfile, Member, Comment, Bet, Standing, ScoringJob
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
-from django.db.models import Sum
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Prefetch
 from django.utils import timezone
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -20,17 +25,33 @@ class PlaceBetSerializer(serializers.Serializer):
     score1 = serializers.IntegerField()
     score2 = serializers.IntegerField()
 
+class BetPredictionSerializer(serializers.Serializer):
+    """PlaceBetSerializer without the event lookup, the caller loads events itself."""
+    event = serializers.IntegerField()
+    score1 = serializers.IntegerField()
+    score2 = serializers.IntegerField()
+
+class PlaceBetsSerializer(serializers.Serializer):
+    bets = BetPredictionSerializer(many=True, allow_empty=False, max_length=200)
+
+class FixtureSerializer(serializers.Serializer):
+    """One row of a schedule import, group may come from ?group= instead."""
+    group = serializers.IntegerField(required=False)
+    team1 = serializers.CharField(max_length=32)
+    team2 = serializers.CharField(max_length=32)
+    time = serializers.DateTimeField()
+
 class SetMemberAdminSerializer(serializers.Serializer):
     user_id = serializers.IntegerField()
     group_id = serializers.IntegerField()
     admin = serializers.BooleanField()
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     image = serializers.ImageField(allow_null=True)
     class Meta:
         model = UserProfile
         fields = ('id', 'image', 'is_premium', 'bio')
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     profile = UserProfileSerializer(required=False)
     members = serializers.SerializerMethodField()
     class Meta:
@@ -38,16 +59,28 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'password', 'is_superuser', 'members', 'profile')
         extra_kwargs = {'password': {'write_only': True, 'required': False}}
 
+    @staticmethod
+    def prefetch(queryset, prefix=''):
+        """Load the profile and membership summary of the users at prefix (e.g. 'user__')."""
+        return queryset.select_related(prefix + 'profile', prefix + 'membership_summary')
+
+    @classmethod
+    def load(cls, queryset, request, nested=False):
+        """Join the profile and summary only when ?fields= keeps them."""
+        fields = list(cls.Meta.fields) if nested else sparse.selected(request, cls.Meta.fields)
+        queryset = queryset.defer(*sparse.deferred(User, fields))
+        if 'profile' in fields:
+            queryset = queryset.select_related('profile')
+        if 'members' in fields:
+            queryset = queryset.select_related('membership_summary')
+        return queryset
+
     def get_members(self, obj):
-        members = obj.members_of.all()
-        return [
-            {
-                'group_id': m.group.id,
-                'group_name': m.group.name,
-                'admin': m.admin
-            }
-            for m in members
-        ]
+        try:
+            return obj.membership_summary.groups
+        except ObjectDoesNotExist:
+            # Written with the first membership, see api.memberships.
+            return []
 
     def create(self, validated_data):
         profile_data = validated_data.pop('profile', None)
@@ -59,33 +92,42 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class CompactUserSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    """What nested users render unless ?expand=user asks for UserSerializer."""
+    class Meta:
+        model = User
+        fields = ('id', 'username')
 
-class BetSerializer(serializers.ModelSerializer):
+
+class BetSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(many=False)
+    expandable = {'user': (CompactUserSerializer, UserSerializer)}
     class Meta:
         model = Bet
         fields = ('id', 'user', 'event', 'score1', 'score2', 'points')
 
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(many=False)
+    expandable = {'user': (CompactUserSerializer, UserSerializer)}
     class Meta:
         model = Member
         fields = ('admin', 'group_id', 'user')
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
-        fields = ('user', 'group', 'description', 'time')
+        fields = ('id', 'user', 'group', 'description', 'time')
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Group
         fields = ('id', 'name', 'location', 'description')
 
-class EventFullSerializer(serializers.ModelSerializer):
+class EventFullSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     bets = serializers.SerializerMethodField()
+    requires = {'bets': ('time', 'group')}
     class Meta:
         model = Event
         fields = ('id', 'team1', 'team2', 'time', 'score1', 'score2', 'group', 'bets')
@@ -96,31 +138,40 @@ class EventFullSerializer(serializers.ModelSerializer):
 
         if obj.time < timezone.now():
             bets = obj.bets.all()
-            return BetSerializer(bets, many=True).data
+            return self.serialize_bets(bets)
 
         if user and user.is_authenticated:
-            is_admin = Member.objects.filter(
-                group=obj.group,
-                user=user,
-                admin=True
-            ).exists()
-
-            if is_admin:
+            if roles.is_admin(request, obj.group_id):
                 bets = obj.bets.all()
             else:
                 bets = obj.bets.filter(user=user)
         else:
             bets = obj.bets.none()
 
-        return BetSerializer(bets, many=True).data
+        return self.serialize_bets(bets)
+
+    def serialize_bets(self, bets):
+        request = self.context.get('request')
+        bets = BetSerializer.load(bets, request, nested=True)
+        return BetSerializer(bets, many=True, context=dict(self.context, nested=True)).data
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = ('id', 'team1', 'team2', 'time', 'group')
 
-class GroupFullSerializer(serializers.ModelSerializer):
+class EventResultSerializer(EventSerializer):
+    class Meta(EventSerializer.Meta):
+        fields = EventSerializer.Meta.fields + ('score1', 'score2')
+
+class ScoringJobSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ScoringJob
+        fields = ('id', 'event', 'score1', 'score2', 'status', 'total', 'processed',
+                  'attempts', 'error', 'created', 'started', 'finished')
+
+class GroupFullSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     events = EventSerializer(many=True)
     members = serializers.SerializerMethodField()
     comments = serializers.SerializerMethodField()
@@ -128,22 +179,55 @@ class GroupFullSerializer(serializers.ModelSerializer):
         model = Group
         fields = ('id', 'name', 'location', 'description', 'events', 'members', 'comments')
 
+    @classmethod
+    def prefetch(cls, queryset, request=None):
+        """Load everything the serializer touches in a fixed number of queries.
+
+        Relations left out by ?fields= are not loaded at all and only the latest
+        BWF_GROUP_DETAIL_COMMENTS comments are embedded, the rest is read from
+        the group's comment feed.
+        """
+        fields = sparse.selected(request, cls.Meta.fields)
+        queryset = queryset.defer(*sparse.deferred(Group, fields))
+        lookups = []
+        if 'events' in fields:
+            lookups.append('events')
+        if 'members' in fields:
+            lookups += [
+                'standings',
+                Prefetch('members', queryset=MemberSerializer.load(Member.objects.all(), request, nested=True)),
+            ]
+        if 'comments' in fields:
+            latest = getattr(settings, 'BWF_GROUP_DETAIL_COMMENTS', 20)
+            lookups.append(Prefetch('comments', queryset=Comment.objects.order_by('-time', '-id')[:latest],
+                                    to_attr='latest_comments'))
+        return queryset.prefetch_related(*lookups)
+
     def get_comments(self, obj):
-        comments = Comment.objects.filter(group=obj).order_by('-time')
-        serializer = CommentSerializer(comments, many=True)
+        comments = obj.latest_comments
+        serializer = CommentSerializer(comments, many=True, context=dict(self.context, nested=True))
         return serializer.data
 
     def get_members(self, obj):
         people_points = []
+        standings = {s.user_id: (s.points, s.rank) for s in obj.standings.all()}
         members = obj.members.all()
         for m in members:
-            points = Bet.objects.filter(event__group=obj, user=m.user).aggregate(pts=Sum('points'))
-            member_serialized = MemberSerializer(m, many=False)
+            points, rank = standings.get(m.user_id, (0, None))
+            member_serialized = MemberSerializer(m, many=False, context=dict(self.context, nested=True))
             member_data = member_serialized.data
-            member_data['points'] = points['pts'] or 0
+            member_data['points'] = points
+            member_data['rank'] = rank
 
             people_points.append(member_data)
 
         return people_points
 
 
+class StandingSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+    class Meta:
+        model = Standing
+        fields = ('rank', 'user_id', 'username', 'points', 'exact_hits', 'correct_outcomes')
+
+
@@ -1,6 +1,20 @@
+import weakref
+
 from django.contrib.auth.models import User
-from django.db.models.signals import post_migrate
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_migrate, post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .models import Member, Event, Standing, Group, Bet, Comment, UserProfile, GroupChange
+from . import changes, memberships, profiling, roles, standings, versions
+from .authentication import token_cache
+
+@receiver(connection_created)
+def profile_queries(sender, connection, **kwargs):
+    profiling.watch(connection)
+
 
 @receiver(post_migrate)
 def create_default_superuser(sender, **kwargs):
@@ -14,3 +28,204 @@ def create_default_superuser(sender, **kwargs):
             email=""
         )
         print("User Admin został utworzony")
+
+
+def deleting_group(origin):
+    return isinstance(origin, Group) or getattr(origin, 'model', None) is Group
+
+
+def deleting_owner_of_bets(origin):
+    """Events, groups and users take care of the standings of their bets."""
+    owners = (Event, Group, User)
+    return isinstance(origin, owners) or getattr(origin, 'model', None) in owners
+
+
+# State carried from the pre_delete to the post_delete signals of one
+# deletion, keyed by its origin (the deleted instance or QuerySet).
+_cleaned_groups = weakref.WeakKeyDictionary()
+_deleted_bets = weakref.WeakKeyDictionary()
+
+
+@receiver(post_save, sender=Member)
+def create_member_standing(sender, instance, created, **kwargs):
+    if created:
+        standings.sync_member(instance.group_id, instance.user_id)
+
+
+@receiver(post_delete, sender=Member)
+def delete_member_standing(sender, instance, origin=None, **kwargs):
+    if deleting_group(origin):
+        # The standings go with the group.
+        return
+    if isinstance(origin, QuerySet):
+        # Bulk delete: all its memberships are gone already, clean each group up once.
+        cleaned = _cleaned_groups.setdefault(origin, set())
+        if instance.group_id in cleaned:
+            return
+        cleaned.add(instance.group_id)
+        standings.drop_departed(instance.group_id)
+    else:
+        Standing.objects.filter(group_id=instance.group_id, user_id=instance.user_id).delete()
+    standings.refresh_ranks(instance.group_id)
+
+
+@receiver(pre_delete, sender=Bet)
+def collect_deleted_bet(sender, instance, origin=None, **kwargs):
+    if instance.points is None or deleting_owner_of_bets(origin):
+        return
+    key = instance if origin is None else origin
+    _deleted_bets.setdefault(key, []).append((instance.event_id, instance.user_id, instance.points))
+
+
+@receiver(post_delete, sender=Bet)
+def revert_deleted_bets(sender, instance, origin=None, **kwargs):
+    # The first post_delete of a deletion reverts all its scored bets at once.
+    bets = _deleted_bets.pop(instance if origin is None else origin, None)
+    if bets:
+        standings.revert_bets(bets)
+
+
+@receiver(pre_delete, sender=Event)
+def revert_event_standings(sender, instance, **kwargs):
+    standings.revert_event(instance)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_member_roles(sender, instance, **kwargs):
+    roles.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def refresh_membership_summary(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        # The user is being deleted along with the summary, don't write it back.
+        return
+    memberships.refresh([instance.user_id])
+
+
+# Fields of users and groups shown nested in other objects: user details in
+# group and event details, group names in membership summaries.
+NESTED_FIELDS = {
+    User: ('username', 'email', 'is_superuser'),
+    UserProfile: ('image', 'is_premium', 'bio'),
+    Group: ('name',),
+}
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=UserProfile)
+@receiver(pre_save, sender=Group)
+def note_nested_changes(sender, instance, update_fields=None, **kwargs):
+    """Flag saves that change what other objects nest, e.g. not login times."""
+    fields = [name for name in NESTED_FIELDS[sender] if update_fields is None or name in update_fields]
+    if not fields:
+        instance._bwf_nested_changed = False
+        return
+    if instance.pk is None:
+        instance._bwf_nested_changed = True
+        return
+    saved = sender._default_manager.filter(pk=instance.pk).values(*fields).first()
+    instance._bwf_nested_changed = saved is None or any(
+        saved[name] != sender._meta.get_field(name).get_prep_value(getattr(instance, name)) for name in fields)
+
+
+def nested_changed(instance):
+    return getattr(instance, '_bwf_nested_changed', True)
+
+
+@receiver(post_save, sender=Group)
+def refresh_group_summaries(sender, instance, created, **kwargs):
+    if not created and nested_changed(instance):
+        memberships.refresh_group(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.evict_key(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_user_tokens(sender, instance, **kwargs):
+    # Password, is_active and is_superuser changes must not outlive the cache.
+    token_cache.evict_user(instance.pk)
+
+
+# Version bumps behind the ETags of group and event details. Comments have no
+# post_delete receivers so their cascades stay fast, views bump for them and bets.
+@receiver(post_save, sender=Event)
+def bump_event_version(sender, instance, **kwargs):
+    versions.bump_events([instance.pk])
+    versions.bump_groups([instance.group_id])
+
+
+@receiver(post_delete, sender=Event)
+def drop_event_version(sender, instance, **kwargs):
+    versions.forget_event(instance.pk)
+    versions.bump_groups([instance.group_id])
+
+
+@receiver(post_save, sender=Bet)
+def bump_bet_event_version(sender, instance, **kwargs):
+    versions.bump_events([instance.event_id])
+
+
+@receiver(post_save, sender=Comment)
+def bump_comment_group_version(sender, instance, **kwargs):
+    versions.bump_groups([instance.group_id])
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def bump_member_versions(sender, instance, **kwargs):
+    versions.bump_user(instance.user_id, [instance.group_id])
+
+
+@receiver(post_save, sender=Group)
+def bump_group_version(sender, instance, created, **kwargs):
+    versions.bump_groups([instance.pk])
+    if not created and nested_changed(instance):
+        # The group name is nested in the memberships of every member.
+        versions.bump_members_of(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+def bump_user_versions(sender, instance, created, **kwargs):
+    if (sender is User and created) or not nested_changed(instance):
+        return
+    versions.bump_user(instance.pk if sender is User else instance.user_id)
+
+
+# Change log behind the group delta sync, see api.changes. Deletions cascading
+# from a group are not logged, the log of the group goes with it.
+@receiver(post_save, sender=Group)
+def log_group_change(sender, instance, created, **kwargs):
+    if not created:
+        changes.record(instance.pk, GroupChange.GROUP, [instance.pk])
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def log_event_change(sender, instance, origin=None, **kwargs):
+    if not deleting_group(origin):
+        changes.record(instance.group_id, GroupChange.EVENT, [instance.pk])
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def log_member_change(sender, instance, signal, origin=None, **kwargs):
+    if deleting_group(origin):
+        return
+    kinds = [GroupChange.MEMBER]
+    if signal is post_delete:
+        # The standing row went with the membership.
+        kinds.append(GroupChange.STANDING)
+    changes.record_all([(instance.group_id, kind, instance.user_id) for kind in kinds])
+
+
+@receiver(post_save, sender=Comment)
+def log_comment_change(sender, instance, **kwargs):
+    changes.record(instance.group_id, GroupChange.COMMENT, [instance.pk])
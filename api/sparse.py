@@ -0,0 +1,100 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+
+def _names(request, param):
+    if request is None:
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    value = params.get(param)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested(request):
+    """Field names asked for with ?fields=a,b or None for all of them, reads only."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    return _names(request, 'fields')
+
+
+def expanded(request, name):
+    """Whether ?expand= asks for the full form of a nested object."""
+    return name in (_names(request, 'expand') or ())
+
+
+def selected(request, fields):
+    """The fields of a top-level serializer that will be rendered."""
+    names = requested(request)
+    return [field for field in fields if names is None or field in names]
+
+
+def model_fields(model, names):
+    """Concrete model field names behind serializer field names ('group_id' -> 'group')."""
+    by_name = {}
+    for field in model._meta.concrete_fields:
+        by_name[field.name] = by_name[field.attname] = field.name
+    return [by_name[name] for name in names if name in by_name]
+
+
+def deferred(model, keep):
+    """Concrete fields of model that are not in keep, for QuerySet.defer()."""
+    keep = set(model_fields(model, keep)) | {model._meta.pk.name}
+    return [field.name for field in model._meta.concrete_fields if field.name not in keep]
+
+
+class SparseFieldsMixin:
+    """Honour ?fields= and ?expand= on a ModelSerializer.
+
+    ?fields=a,b keeps only those fields of the top-level objects of a GET
+    response. Fields listed in ``expandable`` render a compact serializer
+    unless ?expand=<name> asks for the full one. Nested serializers built by
+    hand are marked with ``nested`` in their context so that ?fields= is not
+    applied to them a second time. ``requires`` lists the model fields a
+    computed field reads besides its own.
+    """
+    expandable = {}
+    requires = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        for name, (compact, full) in self.expandable.items():
+            if name in fields:
+                fields[name] = full() if expanded(request, name) else compact()
+
+        if self.is_top_level():
+            names = requested(request)
+            if names is not None:
+                fields = {name: field for name, field in fields.items() if name in names}
+        return fields
+
+    def is_top_level(self):
+        if self.context.get('nested'):
+            return False
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    @classmethod
+    def load(cls, queryset, request, nested=False, keep=()):
+        """Narrow queryset to the columns and relations the response reads.
+
+        keep names columns read outside the serializer, e.g. the ordering a
+        cursor paginator encodes.
+        """
+        fields = list(cls.Meta.fields) if nested else selected(request, cls.Meta.fields)
+        columns = list(keep) + fields + [name for field in fields for name in cls.requires.get(field, ())]
+        queryset = queryset.defer(*deferred(queryset.model, columns))
+        for name, (compact, full) in cls.expandable.items():
+            if name not in fields:
+                continue
+            if expanded(request, name):
+                queryset = full.prefetch(queryset, name + '__')
+            else:
+                related = queryset.model._meta.get_field(name).related_model
+                queryset = queryset.select_related(name).defer(
+                    *['{}__{}'.format(name, f) for f in deferred(related, compact.Meta.fields)])
+        return queryset
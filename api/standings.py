@@ -0,0 +1,168 @@
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+
+from . import changes, versions
+from .models import Standing, Member, Bet, Event, GroupChange
+from .scoring import EXACT_SCORE_POINTS, CORRECT_RESULT_POINTS
+
+STANDING_FIELDS = ('points', 'exact_hits', 'correct_outcomes', 'rank')
+
+
+def bet_stats(points):
+    """(points, exact_hits, correct_outcomes) contributed by one scored bet."""
+    if points is None:
+        return 0, 0, 0
+    return (points,
+            1 if points == EXACT_SCORE_POINTS else 0,
+            1 if points == CORRECT_RESULT_POINTS else 0)
+
+
+def rank_standings(standings):
+    """Assign competition ranks (1, 1, 3, ...) in place, return the changed rows."""
+    ordered = sorted(standings, key=lambda s: (-s.points, -s.exact_hits, s.user_id))
+    changed = []
+    previous = None
+    rank = 0
+    for position, standing in enumerate(ordered, start=1):
+        key = (standing.points, standing.exact_hits)
+        if key != previous:
+            rank = position
+            previous = key
+        if standing.rank != rank:
+            standing.rank = rank
+            changed.append(standing)
+    return changed
+
+
+def apply_deltas(group_id, deltas, rank=True):
+    """Add per-user (points, exact_hits, correct_outcomes) deltas and re-rank.
+
+    Users without a standing row (they left the group) are skipped. Callers
+    applying several batches in a row pass rank=False and refresh_ranks()
+    once at the end. Returns the standings that changed.
+    """
+    deltas = {user_id: d for user_id, d in deltas.items() if any(d)}
+    if not deltas:
+        return []
+
+    with transaction.atomic():
+        standings = list(Standing.objects.select_for_update().filter(group_id=group_id))
+        changed = {}
+        for standing in standings:
+            delta = deltas.get(standing.user_id)
+            if delta is None:
+                continue
+            standing.points += delta[0]
+            standing.exact_hits += delta[1]
+            standing.correct_outcomes += delta[2]
+            changed[standing.pk] = standing
+
+        for standing in rank_standings(standings) if rank else ():
+            changed[standing.pk] = standing
+
+        Standing.objects.bulk_update(changed.values(), STANDING_FIELDS, batch_size=500)
+        if changed:
+            versions.bump_groups([group_id])
+            changes.record(group_id, GroupChange.STANDING, [s.user_id for s in changed.values()])
+    return list(changed.values())
+
+
+def refresh_ranks(group_id):
+    """Re-rank a group's standings, return those whose rank changed."""
+    standings = list(Standing.objects.filter(group_id=group_id))
+    changed = rank_standings(standings)
+    Standing.objects.bulk_update(changed, ['rank'], batch_size=500)
+    if changed:
+        versions.bump_groups([group_id])
+        changes.record(group_id, GroupChange.STANDING, [s.user_id for s in changed])
+    return changed
+
+
+def sync_member(group_id, user_id):
+    """Create or recompute the standing of one member from their bets."""
+    totals = Bet.objects.filter(event__group_id=group_id, user_id=user_id).aggregate(
+        total=Sum('points'),
+        exact=Count('id', filter=Q(points=EXACT_SCORE_POINTS)),
+        correct=Count('id', filter=Q(points=CORRECT_RESULT_POINTS)),
+    )
+    Standing.objects.update_or_create(group_id=group_id, user_id=user_id, defaults={
+        'points': totals['total'] or 0,
+        'exact_hits': totals['exact'],
+        'correct_outcomes': totals['correct'],
+    })
+    changes.record(group_id, GroupChange.STANDING, [user_id])
+    refresh_ranks(group_id)
+
+
+def drop_departed(group_id):
+    """Delete the standings of users who are no longer members of the group."""
+    members = Member.objects.filter(group_id=group_id).values('user_id')
+    Standing.objects.filter(group_id=group_id).exclude(user_id__in=members).delete()
+
+
+def revert_bets(bets):
+    """Remove the points of deleted bets, (event_id, user_id, points) triples, from the standings."""
+    groups = dict(Event.objects.filter(id__in={event_id for event_id, _, _ in bets}).values_list('id', 'group_id'))
+    by_group = {}
+    for event_id, user_id, points in bets:
+        deltas = by_group.setdefault(groups[event_id], {})
+        deltas[user_id] = tuple(total - value for total, value in
+                                zip(deltas.get(user_id, (0, 0, 0)), bet_stats(points)))
+    return [standing for group_id, deltas in by_group.items() for standing in apply_deltas(group_id, deltas)]
+
+
+def revert_event(event):
+    """Remove the points of an event's bets from the standings (event deletion)."""
+    deltas = {}
+    for user_id, points in event.bets.exclude(points=None).values_list('user_id', 'points'):
+        deltas[user_id] = tuple(-value for value in bet_stats(points))
+    return apply_deltas(event.group_id, deltas)
+
+
+def rebuild(group_ids=None):
+    """Recompute standings from scratch for the given groups (all by default)."""
+    members = Member.objects.all()
+    if group_ids is not None:
+        members = members.filter(group_id__in=group_ids)
+
+    by_group = {}
+    for group_id, user_id in members.values_list('group_id', 'user_id'):
+        by_group.setdefault(group_id, set()).add(user_id)
+    if group_ids is not None:
+        for group_id in group_ids:
+            by_group.setdefault(group_id, set())
+
+    for group_id, user_ids in by_group.items():
+        totals = Bet.objects.filter(event__group_id=group_id).values('user_id').annotate(
+            total=Sum('points'),
+            exact=Count('id', filter=Q(points=EXACT_SCORE_POINTS)),
+            correct=Count('id', filter=Q(points=CORRECT_RESULT_POINTS)),
+        )
+        totals = {row['user_id']: row for row in totals}
+        standings = []
+        for user_id in user_ids:
+            row = totals.get(user_id, {})
+            standings.append(Standing(
+                group_id=group_id,
+                user_id=user_id,
+                points=row.get('total') or 0,
+                exact_hits=row.get('exact', 0),
+                correct_outcomes=row.get('correct', 0),
+                rank=0,
+            ))
+        rank_standings(standings)
+
+        with transaction.atomic():
+            Standing.objects.filter(group_id=group_id).delete()
+            Standing.objects.bulk_create(standings, batch_size=500)
+            changes.record(group_id, GroupChange.STANDING, user_ids)
+    if group_ids is None:
+        # Groups without members have no entry above, their leftover rows go too.
+        orphans = Standing.objects.exclude(group_id__in=Member.objects.values('group_id'))
+        rows = list(orphans.values_list('group_id', 'user_id'))
+        if rows:
+            orphans.delete()
+            changes.record_all([(group_id, GroupChange.STANDING, user_id) for group_id, user_id in rows])
+            by_group.update(dict.fromkeys(group_id for group_id, _ in rows))
+    versions.bump_groups(by_group)
+    return len(by_group)
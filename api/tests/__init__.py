@@ -0,0 +1,6 @@
+from django.conf import settings
+from django.test.utils import override_settings
+
+# The suite sends far more requests per client than the production limits
+# allow. Throttling stays off here, test_throttling turns it on for its cases.
+override_settings(BWF_THROTTLE=dict(settings.BWF_THROTTLE, ENABLED=False)).enable()
@@ -1,4 +1,6 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from rest_framework.test import APIRequestFactory, force_authenticate
 from django.utils import timezone
 from datetime import timedelta
@@ -110,4 +112,47 @@ class TestEventCalculatePoints(TestCase):
         bet.refresh_from_db()
         self.assertEqual(bet.points, 0)
 
+    def test_draw_predicted_gives_1_point(self):
+        self.event.score1 = 1
+        self.event.score2 = 1
+        self.event.save()
+        bet = Bet.objects.create(user=self.user, event=self.event, score1=0, score2=0)
 
+        self.event.calculate_points()
+
+        bet.refresh_from_db()
+        self.assertEqual(bet.points, 1)
+
+    def test_scoring_query_count_does_not_grow_with_bets(self):
+        def add_bets(start, count):
+            for i in range(start, start + count):
+                user = User.objects.create_user(username="bulk_{}".format(i), password="Pol123")
+                Bet.objects.create(user=user, event=self.event, score1=i % 3, score2=1)
+
+        add_bets(0, 5)
+        with CaptureQueriesContext(connection) as small:
+            self.event.calculate_points()
+        add_bets(5, 25)
+        with CaptureQueriesContext(connection) as large:
+            scored = self.event.calculate_points()
+
+        self.assertEqual(scored, 30)
+        self.assertEqual(len(small), len(large))
+        points = dict(Bet.objects.filter(event=self.event).values_list('score1', 'points').distinct())
+        self.assertEqual(points, {0: 0, 1: 0, 2: 3})
+
+    def test_scores_all_bets_with_one_update(self):
+        for i in range(20):
+            user = User.objects.create_user(username="bulk_{}".format(i), password="Pol123")
+            Bet.objects.create(user=user, event=self.event, score1=i % 3, score2=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            scored = self.event.calculate_points()
+
+        self.assertEqual(scored, 20)
+        bet_queries = [q['sql'] for q in queries.captured_queries if '"api_bet"' in q['sql']]
+        # One read of the previous points for the standings deltas, one UPDATE for the points.
+        self.assertEqual([sql.split()[0] for sql in bet_queries], ['SELECT', 'UPDATE'])
+        self.assertIn('CASE WHEN', bet_queries[1])
+        points = dict(Bet.objects.filter(event=self.event).values_list('score1', 'points').distinct())
+        self.assertEqual(points, {0: 0, 1: 0, 2: 3})
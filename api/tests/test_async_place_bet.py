@@ -0,0 +1,58 @@
+from django.test import TestCase, AsyncClient
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.models import User, Group, Member, Event, Bet
+
+
+class TestAsyncPlaceBet(TestCase):
+    url = '/api/bets/place_bet_async/'
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="user", password="Pol123")
+        self.outsider = User.objects.create_user(username="outsider", password="Pol123")
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        Member.objects.create(user=self.user, group=self.group)
+        self.event = Event.objects.create(team1="Poland", team2="Germany", group=self.group,
+                                          time=timezone.now() + timedelta(days=1))
+        self.past_event = Event.objects.create(team1="Spain", team2="France", group=self.group,
+                                               time=timezone.now() - timedelta(days=1))
+        self.token = Token.objects.create(user=self.user).key
+        self.outsider_token = Token.objects.create(user=self.outsider).key
+
+    async def post(self, data, token=None):
+        client = AsyncClient()
+        headers = {'Authorization': 'Token {}'.format(token)} if token else {}
+        return await client.post(self.url, data, content_type='application/json', headers=headers)
+
+    async def test_creates_then_updates_bet(self):
+        response = await self.post({'event': self.event.id, 'score1': 2, 'score2': 1}, self.token)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['new'])
+
+        response = await self.post({'event': self.event.id, 'score1': 0, 'score2': 0}, self.token)
+        self.assertEqual(response.json()['message'], 'Bet Updated')
+
+        bet = await Bet.objects.aget(user=self.user, event=self.event)
+        self.assertEqual((bet.score1, bet.score2), (0, 0))
+
+    async def test_rejects_bet_after_kickoff(self):
+        response = await self.post({'event': self.past_event.id, 'score1': 2, 'score2': 1}, self.token)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_rejects_non_member(self):
+        response = await self.post({'event': self.event.id, 'score1': 2, 'score2': 1}, self.outsider_token)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(await Bet.objects.filter(event=self.event).aexists())
+
+    async def test_requires_token(self):
+        response = await self.post({'event': self.event.id, 'score1': 2, 'score2': 1})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_validates_payload(self):
+        response = await self.post({'event': self.event.id, 'score1': 'x'}, self.token)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('score2', response.json())
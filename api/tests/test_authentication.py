@@ -0,0 +1,54 @@
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication, token_cache
+from api.models import User
+
+
+class TestCachedTokenAuthentication(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="user", password="Pol123")
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_second_lookup_hits_the_cache(self):
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            cached_user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(cached_user.pk, user.pk)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_deleted_token_is_evicted(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user_is_evicted(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_superuser_change_is_visible(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_superuser = True
+        self.user.save()
+
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertTrue(user.is_superuser)
+
+    @override_settings(BWF_TOKEN_CACHE={'MAX_ENTRIES': 2, 'TTL': 60})
+    def test_cache_is_bounded(self):
+        for i in range(4):
+            user = User.objects.create_user(username="user_{}".format(i), password="Pol123")
+            self.auth.authenticate_credentials(Token.objects.create(user=user).key)
+
+        self.assertEqual(len(token_cache), 2)
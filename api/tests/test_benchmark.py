@@ -0,0 +1,30 @@
+import io
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.models import Group, Member, Bet, Standing
+
+
+class TestBenchmarkCommands(TestCase):
+    def test_generate_then_benchmark(self):
+        out = io.StringIO()
+        call_command('generate_tournament', groups=2, members=6, events=4, comments=3,
+                     seed=7, prefix='t', stdout=out)
+        summary = json.loads(out.getvalue())
+
+        self.assertEqual(Group.objects.filter(id__in=summary['group_ids']).count(), 2)
+        self.assertEqual(Member.objects.filter(group_id__in=summary['group_ids']).count(), 12)
+        self.assertEqual(Standing.objects.filter(group_id__in=summary['group_ids']).count(), 12)
+        self.assertEqual(Bet.objects.count(), summary['bets'])
+
+        out = io.StringIO()
+        call_command('benchmark_endpoints', iterations=2, warmup=0, host='testserver', stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertIn('set_results', report['endpoints'])
+        for name, result in report['endpoints'].items():
+            self.assertEqual(set(result['status_codes']) - {'200', '202'}, set(), name)
+            self.assertGreaterEqual(result['p95_ms'], result['p50_ms'])
+            self.assertGreater(result['queries']['max'], 0)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Comment
+
+
+class TestCommentFeed(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.other = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        self.user = User.objects.create_user(username="user", password="Pol123")
+        Member.objects.create(user=self.user, group=self.group)
+        self.start = timezone.now() - timedelta(hours=1)
+        self.comments = [self.post(i) for i in range(7)]
+        Comment.objects.create(user=self.user, group=self.other, description="elsewhere")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, minute):
+        comment = Comment.objects.create(user=self.user, group=self.group, description="c{}".format(minute))
+        # auto_now_add ignores the value given on create.
+        Comment.objects.filter(pk=comment.pk).update(time=self.start + timedelta(minutes=minute))
+        comment.refresh_from_db()
+        return comment
+
+    def feed(self, **params):
+        response = self.client.get('/api/groups/{}/comments/'.format(self.group.id), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def descriptions(self, data):
+        return [c['description'] for c in data['results']]
+
+    def test_latest_comments_newest_first(self):
+        data = self.feed(page_size=3)
+
+        self.assertEqual(self.descriptions(data), ['c6', 'c5', 'c4'])
+        self.assertTrue(data['more'])
+
+    def test_before_pages_back_through_history(self):
+        first = self.feed(page_size=3)
+        second = self.feed(page_size=3, before=first['before'])
+        third = self.feed(page_size=3, before=second['before'])
+
+        self.assertEqual(self.descriptions(second), ['c3', 'c2', 'c1'])
+        self.assertEqual(self.descriptions(third), ['c0'])
+        self.assertFalse(third['more'])
+
+    def test_after_returns_only_new_comments(self):
+        latest = self.feed(page_size=3)
+        self.assertEqual(self.descriptions(self.feed(after=latest['after'])), [])
+
+        self.post(8)
+        self.post(9)
+        data = self.feed(after=latest['after'])
+        self.assertEqual(self.descriptions(data), ['c9', 'c8'])
+        self.assertEqual(self.feed(after=data['after'])['results'], [])
+
+    def test_after_catches_up_oldest_first(self):
+        oldest = self.feed(before=self.feed(page_size=6)['before'])
+        data = self.feed(page_size=2, after=oldest['after'])
+
+        self.assertEqual(self.descriptions(data), ['c2', 'c1'])
+        self.assertTrue(data['more'])
+
+    def test_same_time_is_split_by_id(self):
+        tied = [Comment.objects.create(user=self.user, group=self.group, description="t{}".format(i))
+                for i in range(3)]
+        Comment.objects.filter(pk__in=[c.pk for c in tied]).update(time=self.start + timedelta(minutes=30))
+
+        first = self.feed(page_size=2)
+        second = self.feed(page_size=2, before=first['before'])
+        self.assertEqual(self.descriptions(first) + self.descriptions(second), ['t2', 't1', 't0', 'c6'])
+
+    def test_since_polls_by_time(self):
+        data = self.feed(since=(self.start + timedelta(minutes=4, seconds=30)).isoformat())
+        self.assertEqual(self.descriptions(data), ['c6', 'c5'])
+
+    def test_bad_parameters(self):
+        url = '/api/groups/{}/comments/'.format(self.group.id)
+        self.assertEqual(self.client.get(url, {'before': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'since': 'yesterday'}).status_code, 400)
+        latest = self.feed()
+        self.assertEqual(self.client.get(url, {'before': latest['before'], 'after': latest['after']}).status_code, 400)
+
+    def test_query_count_does_not_depend_on_history(self):
+        with CaptureQueriesContext(connection) as small:
+            self.feed(page_size=5)
+        for i in range(30):
+            self.post(10 + i)
+        with CaptureQueriesContext(connection) as large:
+            self.feed(page_size=5)
+        self.assertEqual(len(small), len(large))
+
+    @override_settings(BWF_GROUP_DETAIL_COMMENTS=3)
+    def test_group_detail_embeds_latest_comments(self):
+        response = self.client.get('/api/groups/{}/'.format(self.group.id))
+
+        self.assertEqual([c['description'] for c in response.data['comments']], ['c6', 'c5', 'c4'])
@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event, Bet, Comment, UserProfile
+
+
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.other = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        self.admin = User.objects.create_user(username="admin", password="Pol123")
+        self.member = User.objects.create_user(username="member", password="Pol123")
+        Member.objects.create(user=self.admin, group=self.group, admin=True)
+        Member.objects.create(user=self.member, group=self.group)
+        self.future = Event.objects.create(team1="A", team2="B", group=self.group,
+                                           time=timezone.now() + timedelta(days=1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def etag(self, path, user=None):
+        if user is not None:
+            self.client.force_authenticate(user)
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assertNotModified(self, path, etag):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return len(queries)
+
+    def assertModified(self, path, etag):
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_group_detail_answers_304_with_one_query(self):
+        path = '/api/groups/{}/'.format(self.group.id)
+        etag = self.etag(path)
+        self.assertFalse(etag.startswith('W/'))
+        self.assertEqual(self.assertNotModified(path, etag), 1)
+
+    def test_group_detail_changes_with_its_content(self):
+        path = '/api/groups/{}/'.format(self.group.id)
+
+        changes = [
+            lambda: Comment.objects.create(user=self.member, group=self.group, description="hi"),
+            lambda: Event.objects.create(team1="C", team2="D", group=self.group, time=timezone.now()),
+            lambda: Member.objects.create(user=User.objects.create_user(username="new"), group=self.group),
+            lambda: Member.objects.create(user=self.member, group=self.other),
+            lambda: UserProfile.objects.create(user=self.member, bio="bio"),
+            lambda: Group.objects.filter(pk=self.group.pk).first().save(),
+        ]
+        for change in changes:
+            etag = self.etag(path)
+            change()
+            self.assertModified(path, etag)
+
+    def test_renaming_another_group_changes_the_nested_memberships(self):
+        Member.objects.create(user=self.member, group=self.other)
+        path = '/api/groups/{}/'.format(self.group.id)
+        etag = self.etag(path)
+
+        self.other.name = "Renamed"
+        self.other.save()
+
+        self.assertModified(path, etag)
+
+    def test_saves_that_change_nothing_nested_keep_the_tags(self):
+        Member.objects.create(user=self.member, group=self.other)
+        Bet.objects.create(user=self.member, event=self.future, score1=1, score2=0)
+        group_path = '/api/groups/{}/'.format(self.group.id)
+        event_path = '/api/events/{}/'.format(self.future.id)
+        group_etag, event_etag = self.etag(group_path), self.etag(event_path)
+
+        self.assertEqual(self.client.post('/api/authenticate/', {'username': 'member', 'password': 'Pol123'},
+                                          format='json').status_code, 200)
+        self.member.refresh_from_db()
+        self.member.save()
+        self.other.description = "Changed"
+        self.other.save()
+
+        self.assertNotModified(group_path, group_etag)
+        self.assertNotModified(event_path, event_etag)
+        self.member.username = "renamed"
+        self.member.save()
+        self.assertModified(group_path, group_etag)
+        self.assertModified(event_path, event_etag)
+
+    def test_event_detail_depends_on_viewer_before_kickoff(self):
+        path = '/api/events/{}/'.format(self.future.id)
+        member_etag = self.etag(path, self.member)
+        admin_etag = self.etag(path, self.admin)
+        self.assertNotEqual(member_etag, admin_etag)
+
+        self.client.force_authenticate(self.member)
+        self.assertModified(path, admin_etag)
+        self.assertLessEqual(self.assertNotModified(path, member_etag), 2)
+
+    def test_event_detail_changes_with_bets_and_results(self):
+        path = '/api/events/{}/'.format(self.future.id)
+
+        etag = self.etag(path)
+        response = self.client.post('/api/bets/place_bet/', {'event': self.future.id, 'score1': 1, 'score2': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertModified(path, etag)
+
+        etag = self.etag(path)
+        response = self.client.post('/api/bets/place_bets/', {'bets': [
+            {'event': self.future.id, 'score1': 2, 'score2': 0}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertModified(path, etag)
+
+        etag = self.etag(path)
+        self.client.delete('/api/bets/{}/'.format(Bet.objects.get().id))
+        self.assertModified(path, etag)
+
+    def test_scoring_changes_event_and_group(self):
+        finished = Event.objects.create(team1="C", team2="D", group=self.group,
+                                        time=timezone.now() - timedelta(hours=2))
+        Bet.objects.create(user=self.member, event=finished, score1=1, score2=0)
+        event_path = '/api/events/{}/'.format(finished.id)
+        group_path = '/api/groups/{}/'.format(self.group.id)
+        event_etag, group_etag = self.etag(event_path), self.etag(group_path)
+
+        finished.score1, finished.score2 = 1, 0
+        finished.save()
+        finished.calculate_points()
+
+        self.assertModified(event_path, event_etag)
+        self.assertModified(group_path, group_etag)
+
+    def test_query_string_is_part_of_the_tag(self):
+        path = '/api/groups/{}/'.format(self.group.id)
+        self.assertNotEqual(self.etag(path), self.etag(path + '?x=1'))
+
+    def test_missing_objects_are_404(self):
+        response = self.client.get('/api/groups/999/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/events/999/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
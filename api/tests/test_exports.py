@@ -0,0 +1,92 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event, Bet
+
+
+class TestExports(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.other = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        self.admin = User.objects.create_user(username="admin", password="Pol123")
+        self.member = User.objects.create_user(username="member", password="Pol123")
+        Member.objects.create(user=self.admin, group=self.group, admin=True)
+        Member.objects.create(user=self.member, group=self.group)
+        Member.objects.create(user=self.member, group=self.other)
+        self.event = Event.objects.create(team1="A", team2="B", group=self.group,
+                                          time=timezone.now() - timedelta(hours=2), score1=2, score2=1)
+        Event.objects.create(team1="C", team2="D", group=self.other, time=timezone.now())
+        Bet.objects.create(user=self.member, event=self.event, score1=2, score2=1)
+        Bet.objects.create(user=self.admin, event=self.event, score1=0, score2=1)
+        self.event.calculate_points()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, kind, **params):
+        response = self.client.get('/api/groups/{}/export_{}/'.format(self.group.id, kind), params)
+        if response.status_code == 200:
+            self.assertTrue(response.streaming)
+            response.body = b''.join(response.streaming_content)
+        return response
+
+    def test_bets_as_csv(self):
+        response = self.get('bets')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(response.body.decode())))
+        self.assertEqual([(r['username'], r['bet_score1'], r['points']) for r in rows],
+                         [('member', '2', '3'), ('admin', '0', '0')])
+        self.assertEqual(rows[0]['score1'], '2')
+        self.assertEqual(rows[0]['team1'], 'A')
+
+    def test_standings_as_gzipped_jsonl(self):
+        response = self.get('standings', output='jsonl', gzip=1)
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('standings.jsonl.gz', response['Content-Disposition'])
+        lines = [json.loads(line) for line in gzip.decompress(response.body).decode().splitlines()]
+        self.assertEqual([(l['rank'], l['username'], l['points']) for l in lines],
+                         [(1, 'member', 3), (2, 'admin', 0)])
+
+    def test_only_admins_export(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.get('bets').status_code, 403)
+
+    def test_unknown_output_is_rejected(self):
+        self.assertEqual(self.get('bets', output='xml').status_code, 400)
+
+    def test_query_count_does_not_depend_on_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            self.get('bets')
+        for i in range(20):
+            user = User.objects.create_user(username="user_{}".format(i), password="Pol123")
+            Bet.objects.create(user=user, event=self.event, score1=1, score2=1)
+        with CaptureQueriesContext(connection) as large:
+            self.get('bets')
+        self.assertEqual(len(small), len(large))
+
+    def test_command_exports_all_groups(self):
+        out = io.StringIO()
+        call_command('export_group_data', 'standings', output='jsonl', stdout=out)
+        groups = {json.loads(line)['group_id'] for line in out.getvalue().splitlines()}
+        self.assertEqual(groups, {self.group.id, self.other.id})
+
+    def test_command_writes_gzip_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bets.csv.gz')
+            call_command('export_group_data', 'bets', group=[self.group.id], gzip=True, file=path)
+            with gzip.open(path, 'rt') as handle:
+                rows = list(csv.DictReader(handle))
+        self.assertEqual(len(rows), 2)
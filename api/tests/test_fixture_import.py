@@ -0,0 +1,114 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event
+
+KICKOFF = datetime(2026, 6, 11, 18, 0, tzinfo=dt_timezone.utc)
+
+
+class TestFixtureImport(TestCase):
+    url = '/api/events/import/'
+
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.other = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        self.admin = User.objects.create_user(username="admin", password="Pol123")
+        Member.objects.create(user=self.admin, group=self.group, admin=True)
+        Member.objects.create(user=self.admin, group=self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def row(self, team1, team2, hours=0, group=None):
+        row = {'team1': team1, 'team2': team2, 'time': (KICKOFF + timedelta(hours=hours)).isoformat()}
+        if group is not None:
+            row['group'] = group
+        return row
+
+    def test_json_schedule_is_imported(self):
+        rows = [self.row('Poland', 'Spain', group=self.group.id), self.row('Italy', 'France', 3, self.group.id)]
+        response = self.client.post(self.url, {'events': rows}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(set(Event.objects.values_list('team1', flat=True)), {'Poland', 'Italy'})
+
+    def test_csv_body_with_default_group(self):
+        body = "team1,team2,time\nPoland,Spain,2026-06-11T18:00:00Z\nItaly,France,2026-06-11T21:00:00Z\n"
+        response = self.client.post('{}?group={}'.format(self.url, self.group.id), body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Event.objects.filter(group=self.group).count(), 2)
+
+    def test_uploaded_files(self):
+        csv_file = SimpleUploadedFile('schedule.csv', "group,team1,team2,time\n{},Poland,Spain,{}\n".format(
+            self.group.id, KICKOFF.isoformat()).encode())
+        response = self.client.post(self.url, {'file': csv_file}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+
+        json_file = SimpleUploadedFile('schedule.json', json.dumps(
+            [self.row('Italy', 'France', 3, self.group.id)]).encode())
+        response = self.client.post(self.url, {'file': json_file}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Event.objects.count(), 2)
+
+    def test_one_bad_row_rejects_the_whole_schedule(self):
+        Event.objects.create(team1='Germany', team2='Japan', time=KICKOFF, group=self.group)
+        rows = [
+            self.row('Poland', 'Spain', 1, self.group.id),
+            self.row('Poland', 'Italy', 1, self.group.id),       # Poland twice at once
+            self.row('Germany', 'Brazil', 0, self.group.id),     # clashes with the stored event
+            self.row('Chile', 'Peru', 0, self.other.id),         # not admin there
+            self.row('Chile', 'Chile', 2, self.group.id),
+            self.row('Chile', 'Peru', 0, 999),
+            {'team1': 'Chile', 'time': 'soon', 'group': self.group.id},
+            self.row('Chile', 'Peru', 5),                        # no group
+        ]
+        response = self.client.post(self.url, rows, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        errors = {e['row']: e['errors'] for e in response.data['errors']}
+        self.assertEqual(set(errors), {2, 3, 4, 5, 6, 7, 8})
+        self.assertIn('Poland', errors[2]['time'][0])
+        self.assertIn('Germany', errors[3]['time'][0])
+        self.assertEqual(set(errors[7]), {'team2', 'time'})
+        self.assertEqual(Event.objects.count(), 1)
+
+    def test_same_teams_in_different_groups_are_fine(self):
+        superuser = User.objects.create_superuser(username="root", password="Pol123")
+        self.client.force_authenticate(superuser)
+        rows = [self.row('Poland', 'Spain', group=g.id) for g in (self.group, self.other)]
+
+        response = self.client.post(self.url, rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['groups'], sorted([self.group.id, self.other.id]))
+
+    def test_thousands_of_fixtures_in_few_queries(self):
+        superuser = User.objects.create_superuser(username="root", password="Pol123")
+        self.client.force_authenticate(superuser)
+        groups = [self.group, self.other] + [
+            Group.objects.create(name="G{}".format(i), location="X", description="d") for i in range(8)]
+        rows = [self.row('Team{}'.format(n % 40), 'Rival{}'.format(n % 40), n // 40, g.id)
+                for g in groups for n in range(300)]
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, rows, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(queries) - len(inserts), 5)
+        self.assertEqual(Event.objects.count(), 3000)
+        self.assertLess(time.perf_counter() - started, 10)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, 401)
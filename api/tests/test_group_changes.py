@@ -0,0 +1,161 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event, Bet, Comment, GroupChange
+from api import changes, scoring
+
+
+@override_settings(BWF_SCORING={'THREADS': 0})
+class TestGroupChanges(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.other = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        self.admin = User.objects.create_user(username="admin", password="Pol123")
+        self.member = User.objects.create_user(username="member", password="Pol123")
+        Member.objects.create(user=self.admin, group=self.group, admin=True)
+        Member.objects.create(user=self.member, group=self.group)
+        self.event = Event.objects.create(team1="A", team2="B", group=self.group,
+                                          time=timezone.now() + timedelta(hours=2))
+        Bet.objects.create(user=self.member, event=self.event, score1=2, score2=1)
+        Comment.objects.create(user=self.member, group=self.group, description="hi")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def sync(self, **params):
+        response = self.client.get('/api/groups/{}/changes/'.format(self.group.id), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_first_sync_is_a_snapshot(self):
+        data = self.sync()
+
+        self.assertTrue(data['full'])
+        self.assertEqual([e['team1'] for e in data['events']], ['A'])
+        self.assertEqual({m['user']['username'] for m in data['members']}, {'admin', 'member'})
+        self.assertEqual([c['description'] for c in data['comments']], ['hi'])
+        self.assertEqual(len(data['standings']), 2)
+        self.assertEqual(self.sync(since=data['version'])['version'], data['version'])
+
+    def test_nothing_changed(self):
+        version = self.sync()['version']
+        data = self.sync(since=version)
+
+        self.assertFalse(data['full'])
+        self.assertEqual((data['events'], data['members'], data['comments'], data['standings']), ([], [], [], []))
+        self.assertEqual(data['deleted'], {'events': [], 'members': [], 'comments': [], 'standings': []})
+
+    def test_only_changes_are_returned(self):
+        version = self.sync()['version']
+        Event.objects.create(team1="C", team2="D", group=self.group, time=timezone.now() + timedelta(days=1))
+        Event.objects.create(team1="E", team2="F", group=self.other, time=timezone.now() + timedelta(days=1))
+        Comment.objects.create(user=self.admin, group=self.group, description="welcome")
+
+        data = self.sync(since=version)
+
+        self.assertEqual([e['team1'] for e in data['events']], ['C'])
+        self.assertEqual([c['description'] for c in data['comments']], ['welcome'])
+        self.assertEqual(data['members'], [])
+        self.assertGreater(data['version'], version)
+
+    def test_results_and_standings(self):
+        version = self.sync()['version']
+        self.event.score1, self.event.score2 = 2, 1
+        self.event.save()
+        scoring.score_event(self.event)
+
+        data = self.sync(since=version)
+
+        self.assertEqual([(e['score1'], e['score2']) for e in data['events']], [(2, 1)])
+        standings = {s['username']: (s['rank'], s['points']) for s in data['standings']}
+        self.assertEqual(standings['member'], (1, 3))
+
+    def test_deletions_are_listed(self):
+        outsider = User.objects.create_user(username="outsider", password="Pol123")
+        Member.objects.create(user=outsider, group=self.group)
+        version = self.sync()['version']
+        comment = Comment.objects.get()
+        event_id = self.event.id
+
+        Member.objects.get(user=outsider).delete()
+        self.client.delete('/api/comments/{}/'.format(comment.id))
+        self.event.delete()
+        data = self.sync(since=version)
+
+        self.assertEqual(data['deleted']['members'], [outsider.id])
+        self.assertEqual(data['deleted']['standings'], [outsider.id])
+        self.assertEqual(data['deleted']['comments'], [comment.id])
+        self.assertEqual(data['deleted']['events'], [event_id])
+
+    def test_rejoining_is_not_a_deletion(self):
+        version = self.sync()['version']
+        Member.objects.get(user=self.member).delete()
+        Member.objects.create(user=self.member, group=self.group)
+
+        data = self.sync(since=version)
+
+        self.assertEqual([m['user']['id'] for m in data['members']], [self.member.id])
+        self.assertEqual(data['deleted']['members'], [])
+
+    def test_cost_depends_on_changes_not_group_size(self):
+        version = self.sync()['version']
+        with CaptureQueriesContext(connection) as small:
+            self.sync(since=version)
+        for i in range(20):
+            user = User.objects.create_user(username="user_{}".format(i), password="Pol123")
+            Member.objects.create(user=user, group=self.group)
+            Comment.objects.create(user=user, group=self.group, description="hi")
+        version = self.sync()['version']
+        with CaptureQueriesContext(connection) as large:
+            data = self.sync(since=version)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(data['comments'], [])
+
+    def test_group_edits_are_synced(self):
+        version = self.sync()['version']
+        self.assertIsNone(self.sync(since=version)['group'])
+
+        self.group.name = "Renamed"
+        self.group.save()
+        data = self.sync(since=version)
+
+        self.assertEqual(data['group']['name'], "Renamed")
+        self.assertEqual(data['events'], [])
+
+    def test_pruned_versions_get_a_snapshot(self):
+        ancient = self.sync()['version']
+        for i in range(3):
+            Comment.objects.create(user=self.member, group=self.group, description=str(i))
+        recent = self.sync()['version']
+        Comment.objects.create(user=self.member, group=self.group, description="last")
+
+        out = StringIO()
+        call_command('prune_group_changes', keep=2, stdout=out)
+
+        self.assertIn('Pruned', out.getvalue())
+        self.assertEqual(GroupChange.objects.filter(group=self.group).count(), 2)
+        data = self.sync(since=ancient)
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['comments']), 5)
+        data = self.sync(since=recent)
+        self.assertFalse(data['full'])
+        self.assertEqual([c['description'] for c in data['comments']], ['last'])
+
+    def test_small_logs_are_not_pruned(self):
+        version = self.sync()['version']
+        changes.prune(1000)
+        self.assertFalse(self.sync(since=version)['full'])
+
+    def test_bad_version(self):
+        response = self.client.get('/api/groups/{}/changes/'.format(self.group.id), {'since': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_deleting_a_group_drops_its_log(self):
+        self.group.delete()
+        self.assertFalse(GroupChange.objects.filter(group_id=self.group.id).exists())
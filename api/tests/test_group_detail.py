@@ -0,0 +1,56 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event, Comment, UserProfile
+
+
+class TestGroupDetailQueries(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.other_group = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        self.viewer = User.objects.create_user(username="viewer", password="Pol123")
+        Member.objects.create(user=self.viewer, group=self.group, admin=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def add_members(self, start, count):
+        for i in range(start, start + count):
+            user = User.objects.create_user(username="user_{}".format(i), password="Pol123")
+            if i % 2:
+                UserProfile.objects.create(user=user, bio="bio")
+            Member.objects.create(user=user, group=self.group)
+            Member.objects.create(user=user, group=self.other_group)
+            Comment.objects.create(user=user, group=self.group, description="hi")
+            Event.objects.create(team1="A{}".format(i), team2="B", group=self.group,
+                                 time=timezone.now() + timedelta(days=i))
+
+    def fetch(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/groups/{}/'.format(self.group.id), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_depend_on_group_size(self):
+        self.add_members(0, 2)
+        _, small = self.fetch()
+        self.add_members(2, 20)
+        response, large = self.fetch()
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 8)
+        self.assertEqual(len(response.data['members']), 23)
+        self.assertEqual(len(response.data['comments']), 20)
+
+    def test_nested_memberships_and_profiles_are_serialized(self):
+        self.add_members(0, 2)
+        response, _ = self.fetch(expand='user')
+
+        member = next(m for m in response.data['members'] if m['user']['username'] == 'user_1')
+        self.assertEqual(member['user']['profile']['bio'], 'bio')
+        self.assertEqual({g['group_name'] for g in member['user']['members']}, {'Group', 'Other'})
+        viewer = next(m for m in response.data['members'] if m['user']['username'] == 'viewer')
+        self.assertIsNone(viewer['user']['profile'])
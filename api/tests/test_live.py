@@ -0,0 +1,64 @@
+import asyncio
+from unittest import mock
+
+from django.test import TestCase, AsyncClient, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from api.live import broker
+from api.models import User, Group, Member, Event, Bet
+
+
+class TestGroupStream(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="user", password="Pol123")
+        self.outsider = User.objects.create_user(username="outsider", password="Pol123")
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        Member.objects.create(user=self.user, group=self.group, admin=True)
+        self.token = Token.objects.create(user=self.user).key
+        self.outsider_token = Token.objects.create(user=self.outsider).key
+        self.url = '/api/groups/{}/stream/'.format(self.group.id)
+
+    async def test_streams_published_events(self):
+        response = await AsyncClient().get(self.url, {'token': self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b': connected\n\n')
+        self.assertEqual(broker.subscriber_count(self.group.id), 1)
+
+        broker.publish(self.group.id, 'result', {'event': 1, 'score1': 2, 'score2': 0})
+        message = await asyncio.wait_for(anext(stream), 1)
+
+        self.assertEqual(message, b'event: result\ndata: {"event": 1, "score1": 2, "score2": 0}\n\n')
+        await stream.aclose()
+
+    async def test_rejects_non_members(self):
+        response = await AsyncClient().get(self.url, {'token': self.outsider_token})
+        self.assertEqual(response.status_code, 403)
+
+    async def test_requires_token(self):
+        response = await AsyncClient().get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(BWF_SCORING={'EAGER': True})
+    def test_set_results_publishes_result_and_standings(self):
+        event = Event.objects.create(team1="Poland", team2="Germany", group=self.group,
+                                     time=timezone.now() - timedelta(days=1))
+        Bet.objects.create(user=self.user, event=event, score1=2, score2=1)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with mock.patch.object(broker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                client.put('/api/events/{}/set_results/'.format(event.id),
+                           {'score1': 2, 'score2': 1}, format='json')
+
+        published = {call.args[1]: call.args[2] for call in publish.call_args_list}
+        self.assertEqual(published['result'], {'event': event.id, 'score1': 2, 'score2': 1})
+        self.assertEqual(published['standings'][0]['points'], 3)
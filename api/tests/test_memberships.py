@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import memberships
+from api.models import User, Group, Member, Event, Bet, MembershipSummary
+from api.serializers import UserSerializer
+
+
+class TestMembershipSummary(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.other = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        self.user = User.objects.create_user(username="user", password="Pol123")
+
+    def summary(self):
+        return MembershipSummary.objects.get(user=self.user).groups
+
+    def test_follows_member_changes(self):
+        member = Member.objects.create(user=self.user, group=self.group)
+        Member.objects.create(user=self.user, group=self.other, admin=True)
+        self.assertEqual(self.summary(), [
+            {'group_id': self.group.id, 'group_name': 'Group', 'admin': False},
+            {'group_id': self.other.id, 'group_name': 'Other', 'admin': True},
+        ])
+
+        member.admin = True
+        member.save()
+        self.assertTrue(self.summary()[0]['admin'])
+
+        member.delete()
+        self.assertEqual([g['group_id'] for g in self.summary()], [self.other.id])
+
+    def test_follows_group_changes(self):
+        Member.objects.create(user=self.user, group=self.group)
+        Member.objects.create(user=self.user, group=self.other)
+
+        self.group.name = "Renamed"
+        self.group.save()
+        self.assertEqual(self.summary()[0]['group_name'], "Renamed")
+
+        self.other.delete()
+        self.assertEqual([g['group_id'] for g in self.summary()], [self.group.id])
+
+    def test_deleting_the_user_removes_the_summary(self):
+        Member.objects.create(user=self.user, group=self.group)
+        self.user.delete()
+        self.assertFalse(MembershipSummary.objects.exists())
+
+    def test_serializer_reads_the_summary(self):
+        Member.objects.create(user=self.user, group=self.group, admin=True)
+        user = UserSerializer.prefetch(User.objects.filter(pk=self.user.pk)).get()
+        with self.assertNumQueries(0):
+            data = UserSerializer(user).data
+        self.assertEqual(data['members'], [{'group_id': self.group.id, 'group_name': 'Group', 'admin': True}])
+
+    def test_users_without_memberships_have_no_summary(self):
+        user = UserSerializer.prefetch(User.objects.filter(pk=self.user.pk)).get()
+        with self.assertNumQueries(0):
+            self.assertEqual(UserSerializer(user).data['members'], [])
+
+    def test_rebuild_restores_bulk_inserted_memberships(self):
+        Member.objects.bulk_create([Member(user=self.user, group=self.group)])
+        self.assertFalse(MembershipSummary.objects.exists())
+
+        self.assertEqual(memberships.rebuild(), 1)
+        self.assertEqual(len(self.summary()), 1)
+
+    def test_rebuild_empties_summary_of_user_without_groups(self):
+        MembershipSummary.objects.create(
+            user=self.user, groups=[{'group_id': self.group.id, 'group_name': 'Group', 'admin': False}])
+
+        self.assertEqual(memberships.rebuild(), 1)
+        self.assertEqual(self.summary(), [])
+
+
+class TestNestedUsersCostNoQueries(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.event = Event.objects.create(team1="A", team2="B", group=self.group,
+                                          time=timezone.now() - timedelta(hours=2))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username="root", password="Pol123"))
+
+    def add_bettors(self, start, count):
+        for i in range(start, start + count):
+            user = User.objects.create_user(username="user_{}".format(i), password="Pol123")
+            Member.objects.create(user=user, group=self.group)
+            Bet.objects.create(user=user, event=self.event, score1=1, score2=0)
+
+    def fetch(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/events/{}/?expand=user'.format(self.event.id))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_event_detail(self):
+        self.add_bettors(0, 2)
+        _, small = self.fetch()
+        self.add_bettors(2, 30)
+        response, large = self.fetch()
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['bets']), 32)
+        self.assertEqual(response.data['bets'][0]['user']['members'][0]['group_name'], 'Group')
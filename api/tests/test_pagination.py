@@ -0,0 +1,93 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event, Bet, Comment
+
+
+@override_settings(BWF_PAGE_SIZE=3, BWF_MAX_PAGE_SIZE=5)
+class TestCursorPagination(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="Pol123")
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        Member.objects.create(user=self.user, group=self.group)
+        start = timezone.now() + timedelta(days=1)
+        self.events = [
+            Event.objects.create(team1="A{}".format(i), team2="B", group=self.group,
+                                 time=start + timedelta(hours=i % 4))
+            for i in range(8)
+        ]
+        for event in self.events:
+            Bet.objects.create(user=self.user, event=event, score1=1, score2=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 5)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_events_are_paged_by_time_then_id(self):
+        ids = self.collect('/api/events/')
+
+        expected = [e.id for e in sorted(self.events, key=lambda e: (e.time, e.id))]
+        self.assertEqual(ids, expected)
+
+    def test_rows_sharing_a_time_across_page_boundaries(self):
+        kickoff = timezone.now() + timedelta(days=3)
+        tied = [Event.objects.create(team1="T{}".format(i), team2="B", group=self.group, time=kickoff)
+                for i in range(7)]
+        first = self.client.get('/api/events/')
+        url = first.data['next']
+        seen = [row['id'] for row in first.data['results']]
+        # A row inserted at the same kickoff while paging is neither skipped nor repeated.
+        late = Event.objects.create(team1="Late", team2="B", group=self.group, time=kickoff)
+        seen += self.collect(url)
+
+        expected = [e.id for e in sorted(self.events + tied + [late], key=lambda e: (e.time, e.id))]
+        self.assertEqual(seen, expected)
+
+    def test_previous_pages_mirror_next_pages(self):
+        pages = []
+        url = '/api/events/'
+        while url:
+            response = self.client.get(url)
+            pages.append([row['id'] for row in response.data['results']])
+            last, url = response, response.data['next']
+
+        back = []
+        url = last.data['previous']
+        while url:
+            response = self.client.get(url)
+            back.insert(0, [row['id'] for row in response.data['results']])
+            url = response.data['previous']
+        self.assertEqual(back, pages[:-1])
+
+    def test_comments_newest_first_with_equal_times(self):
+        posted = timezone.now()
+        comments = [Comment.objects.create(user=self.user, group=self.group, description=str(i))
+                    for i in range(7)]
+        Comment.objects.update(time=posted)
+
+        self.assertEqual(self.collect('/api/comments/'), sorted((c.id for c in comments), reverse=True))
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get('/api/events/?after=nope').status_code, 400)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get('/api/bets/?page_size=1000')
+
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_default_page_size(self):
+        response = self.client.get('/api/bets/')
+
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(self.collect('/api/bets/'), sorted(b.id for b in Bet.objects.all()))
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event, Bet
+
+
+class TestPlaceBets(TestCase):
+    url = '/api/bets/place_bets/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="Pol123")
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.foreign_group = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        Member.objects.create(user=self.user, group=self.group)
+        kickoff = timezone.now() + timedelta(days=1)
+        self.events = [Event.objects.create(team1="A{}".format(i), team2="B", group=self.group, time=kickoff)
+                       for i in range(3)]
+        self.past_event = Event.objects.create(team1="C", team2="D", group=self.group,
+                                               time=timezone.now() - timedelta(days=1))
+        self.foreign_event = Event.objects.create(team1="E", team2="F", group=self.foreign_group, time=kickoff)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_places_whole_round_with_per_item_results(self):
+        Bet.objects.create(user=self.user, event=self.events[0], score1=0, score2=0)
+        payload = {'bets': [
+            {'event': self.events[0].id, 'score1': 2, 'score2': 1},
+            {'event': self.events[1].id, 'score1': 1, 'score2': 1},
+            {'event': self.past_event.id, 'score1': 1, 'score2': 0},
+            {'event': self.foreign_event.id, 'score1': 1, 'score2': 0},
+            {'event': 9999, 'score1': 1, 'score2': 0},
+        ]}
+
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['placed'], 2)
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, ['updated', 'created', 'error', 'error', 'error'])
+        self.assertEqual(response.data['results'][3]['message'], 'User not in group')
+        scores = dict((b.event_id, (b.score1, b.score2)) for b in Bet.objects.filter(user=self.user))
+        self.assertEqual(scores, {self.events[0].id: (2, 1), self.events[1].id: (1, 1)})
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def place(events):
+            payload = {'bets': [{'event': e.id, 'score1': 1, 'score2': 0} for e in events]}
+            with self.assertNumQueries(7):
+                self.client.post(self.url, payload, format='json')
+
+        place(self.events[:1])
+        Bet.objects.all().delete()
+        place(self.events)
+
+    def test_duplicate_events_are_reported(self):
+        payload = {'bets': [{'event': self.events[0].id, 'score1': 1, 'score2': 0}] * 2}
+
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'error'])
+        self.assertEqual(Bet.objects.count(), 1)
+
+    def test_rejects_empty_batch(self):
+        response = self.client.post(self.url, {'bets': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bet_placed_concurrently_is_updated(self):
+        def place_meanwhile(request, group_id):
+            # Another request wins the race between the read and the insert.
+            Bet.objects.get_or_create(user=self.user, event=self.events[0], defaults={'score1': 0, 'score2': 0})
+            return True
+
+        payload = {'bets': [{'event': self.events[0].id, 'score1': 3, 'score2': 2}]}
+        with mock.patch('api.views.roles.is_member', side_effect=place_meanwhile):
+            response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        bet = Bet.objects.get(user=self.user, event=self.events[0])
+        self.assertEqual((bet.score1, bet.score2), (3, 2))
+        self.assertEqual(response.data['results'][0]['id'], bet.id)
@@ -0,0 +1,66 @@
+import json
+
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from api.models import User, Group, Member
+from api.profiling import current_profile
+
+
+class TestProfilingMiddleware(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="user", password="Pol123")
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        Member.objects.create(user=self.user, group=self.group)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(Token.objects.create(user=self.user).key))
+
+    @override_settings(BWF_PROFILING={'ENABLED': True, 'SAMPLE_RATE': 1.0, 'TOP_QUERIES': 2})
+    def test_sampled_request_gets_server_timing_and_log(self):
+        with self.assertLogs('api.profiling', level='INFO') as logs:
+            response = self.client.get('/api/groups/{}/'.format(self.group.id))
+
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        for name in ('auth;dur=', 'perm;dur=', 'view;dur=', 'serialize;dur=', 'render;dur=', 'db;dur=',
+                     'total;dur='):
+            self.assertIn(name, timing)
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['path'], '/api/groups/{}/'.format(self.group.id))
+        self.assertGreater(entry['queries'], 1)
+        self.assertGreater(entry['phases_ms']['serialize'], 0)
+        self.assertEqual(len(entry['slowest_queries']), 2)
+        self.assertIn('queries"', timing.split('db;')[1])
+
+    @override_settings(BWF_PROFILING={'ENABLED': True, 'SAMPLE_RATE': 1.0})
+    def test_serializers_outside_requests_are_not_timed(self):
+        with self.assertLogs('api.profiling', level='INFO'):
+            self.client.get('/api/groups/{}/'.format(self.group.id))
+
+        self.assertIsNone(current_profile.get())
+
+    @override_settings(BWF_PROFILING={'ENABLED': True, 'SAMPLE_RATE': 1.0})
+    async def test_async_view(self):
+        with self.assertLogs('api.profiling', level='INFO') as logs:
+            response = await AsyncClient().post('/api/bets/place_bet_async/', {}, content_type='application/json',
+                                                headers={'Authorization': self.client._credentials['HTTP_AUTHORIZATION']})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertGreater(json.loads(logs.records[0].getMessage())['queries'], 0)
+
+    @override_settings(BWF_PROFILING={'ENABLED': True, 'SAMPLE_RATE': 0.0})
+    def test_unsampled_request_is_untouched(self):
+        response = self.client.get('/api/groups/{}/'.format(self.group.id))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(BWF_PROFILING={'ENABLED': False, 'SAMPLE_RATE': 1.0})
+    def test_disabled_by_default(self):
+        response = self.client.get('/api/groups/')
+        self.assertNotIn('Server-Timing', response)
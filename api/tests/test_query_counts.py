@@ -0,0 +1,214 @@
+"""Query-count regression harness for every route in api/urls.py.
+
+Each route is requested against a small and a large dataset. The number of
+SQL queries must be the same for both sizes and stay within the route's
+budget. Add new routes to BUDGETS and SCENARIOS, test_every_route_has_a_budget
+fails until you do.
+"""
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import urls
+from api.authentication import token_cache
+from api.models import User, Group, Member, Event, Bet, Comment, UserProfile, ScoringJob
+
+# Maximum number of SQL queries per route, including savepoints and token
+# authentication. None marks routes the harness cannot drive.
+BUDGETS = {
+    'api-root': 0,
+    'authenticate': 6,
+    'place-bet-async': 10,
+    'group-stream': None,  # endless stream, covered by test_live
+    'group-list': 2,
+    'group-detail': 9,
+    'group-leaderboard': 3,
+    'group-comments': 3,
+    'group-changes': 7,
+    'group-cache-stats': 1,
+    'group-export-bets': 3,
+    'group-export-standings': 3,
+    'event-list': 2,
+    'event-detail': 5,
+    'event-set-results': 15,
+    'event-import-fixtures': 10,
+    'bet-list': 3,
+    'bet-detail': 3,
+    'bet-place-bet': 10,
+    'bet-place-bets': 8,
+    'member-list': 3,
+    'member-detail': 3,
+    'member-join': 21,
+    'member-leave': 15,
+    'member-set-admin': 13,
+    'comment-list': 1,
+    'comment-detail': 1,
+    'user-list': 3,
+    'user-detail': 4,
+    'user-change-pass': 5,
+    'userprofile-list': 2,
+    'userprofile-detail': 2,
+    'scoringjob-list': 3,
+    'scoringjob-detail': 3,
+}
+
+# route -> (who, method, url kwargs, payload), all built from the dataset.
+SCENARIOS = {
+    'api-root': lambda d: ('admin', 'get', {}, None),
+    'authenticate': lambda d: (None, 'post', {}, {'username': 'member_0', 'password': 'Pol123'}),
+    'place-bet-async': lambda d: ('member', 'post', {}, {'event': d['future'].id, 'score1': 1, 'score2': 0}),
+    'group-list': lambda d: ('admin', 'get', {}, None),
+    'group-detail': lambda d: ('admin', 'get', {'pk': d['group'].id}, None),
+    'group-leaderboard': lambda d: ('admin', 'get', {'pk': d['group'].id}, None),
+    'group-comments': lambda d: ('member', 'get', {'pk': d['group'].id}, None),
+    'group-changes': lambda d: ('member', 'get', {'pk': d['group'].id}, None),
+    'group-cache-stats': lambda d: ('superuser', 'get', {}, None),
+    'group-export-bets': lambda d: ('admin', 'get', {'pk': d['group'].id}, None),
+    'group-export-standings': lambda d: ('admin', 'get', {'pk': d['group'].id}, None),
+    'event-list': lambda d: ('admin', 'get', {}, None),
+    'event-detail': lambda d: ('admin', 'get', {'pk': d['finished'].id}, None),
+    'event-set-results': lambda d: ('admin', 'put', {'pk': d['finished'].id}, {'score1': 2, 'score2': 1}),
+    'event-import-fixtures': lambda d: ('admin', 'post', {}, {'events': [
+        {'group': d['group'].id, 'team1': 'X{}'.format(i), 'team2': 'Y{}'.format(i), 'time': '2030-01-01T18:00:00Z'}
+        for i in range(len(d['future_events']))]}),
+    'bet-list': lambda d: ('admin', 'get', {}, None),
+    'bet-detail': lambda d: ('admin', 'get', {'pk': d['bet'].id}, None),
+    'bet-place-bet': lambda d: ('member', 'post', {}, {'event': d['future'].id, 'score1': 1, 'score2': 0}),
+    'bet-place-bets': lambda d: ('member', 'post', {}, {'bets': [
+        {'event': e.id, 'score1': 1, 'score2': 0} for e in d['future_events']]}),
+    'member-list': lambda d: ('admin', 'get', {}, None),
+    'member-detail': lambda d: ('admin', 'get', {'pk': d['membership'].id}, None),
+    'member-join': lambda d: ('outsider', 'post', {}, {'group': d['group'].id, 'user': d['outsider'].id}),
+    'member-leave': lambda d: ('member', 'post', {}, {'group': d['group'].id, 'user': d['member'].id}),
+    'member-set-admin': lambda d: ('admin', 'patch', {}, {
+        'user_id': d['member'].id, 'group_id': d['group'].id, 'admin': True}),
+    'comment-list': lambda d: ('admin', 'get', {}, None),
+    'comment-detail': lambda d: ('admin', 'get', {'pk': d['comment'].id}, None),
+    'user-list': lambda d: ('superuser', 'get', {}, None),
+    'user-detail': lambda d: ('admin', 'get', {'pk': d['member'].id}, None),
+    'user-change-pass': lambda d: ('superuser', 'put', {'pk': d['superuser'].id}, {
+        'old_password': 'Pol123', 'new_password': 'Pol1234'}),
+    'userprofile-list': lambda d: ('superuser', 'get', {}, None),
+    'userprofile-detail': lambda d: ('superuser', 'get', {'pk': d['profile'].id}, None),
+    'scoringjob-list': lambda d: ('admin', 'get', {}, None),
+    'scoringjob-detail': lambda d: ('admin', 'get', {'pk': d['job'].id}, None),
+}
+
+SMALL, LARGE = 2, 6
+
+
+def route_names(patterns=urls.urlpatterns):
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def normalize(sql):
+    sql = re.sub(r"'[^']*'", '?', sql)
+    sql = re.sub(r'\b\d+\b', '?', sql)
+    return re.sub(r'\bs\w+_x\d+\b', 'sp', sql)
+
+
+def build_dataset(size):
+    """A group with `size` members, events, bets, comments and profiles."""
+    now = timezone.now()
+    group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+    other = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+    superuser = User.objects.create_superuser(username="root", password="Pol123")
+    admin = User.objects.create_user(username="group_admin", password="Pol123")
+    outsider = User.objects.create_user(username="outsider", password="Pol123")
+    Member.objects.create(user=admin, group=group, admin=True)
+
+    members = []
+    for i in range(size):
+        user = User.objects.create_user(username="member_{}".format(i), password="Pol123")
+        UserProfile.objects.create(user=user, bio="bio")
+        members.append(Member.objects.create(user=user, group=group))
+        Member.objects.create(user=user, group=other)
+        Comment.objects.create(user=user, group=group, description="hi")
+
+    future_events, finished_events = [], []
+    for i in range(size):
+        future_events.append(Event.objects.create(
+            team1="A{}".format(i), team2="B", group=group, time=now + timedelta(days=i + 1)))
+        finished_events.append(Event.objects.create(
+            team1="C{}".format(i), team2="D", group=group, time=now - timedelta(days=i + 1)))
+    bets = [Bet.objects.create(user=m.user, event=e, score1=1, score2=0)
+            for m in members for e in future_events + finished_events]
+
+    job = ScoringJob.objects.create(event=finished_events[0], score1=1, score2=0)
+    users = {
+        'superuser': superuser, 'admin': admin, 'outsider': outsider, 'member': members[0].user,
+    }
+    return {
+        'group': group,
+        'future': future_events[0],
+        'future_events': future_events,
+        'finished': finished_events[0],
+        'bet': bets[0],
+        'membership': members[0],
+        'comment': Comment.objects.filter(group=group).first(),
+        'profile': UserProfile.objects.get(user=members[0].user),
+        'job': job,
+        'tokens': {who: Token.objects.create(user=user).key for who, user in users.items()},
+        **users,
+    }
+
+
+@override_settings(BWF_SCORING={'THREADS': 0})
+class TestQueryCounts(TestCase):
+
+    def measure(self, size):
+        """Run every scenario against a dataset of the given size, rolled back afterwards."""
+        results = {}
+        with transaction.atomic():
+            data = build_dataset(size)
+            for name, scenario in SCENARIOS.items():
+                who, method, kwargs, payload = scenario(data)
+                client = APIClient()
+                if who is not None:
+                    client.credentials(HTTP_AUTHORIZATION='Token {}'.format(data['tokens'][who]))
+                token_cache.clear()
+
+                with transaction.atomic():
+                    with CaptureQueriesContext(connection) as queries:
+                        response = getattr(client, method)(reverse(name, kwargs=kwargs), payload, format='json')
+                    transaction.set_rollback(True)
+                results[name] = (response.status_code, [q['sql'] for q in queries.captured_queries])
+            transaction.set_rollback(True)
+        return results
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(route_names(), set(BUDGETS))
+        self.assertEqual({name for name, budget in BUDGETS.items() if budget is not None}, set(SCENARIOS))
+
+    def test_query_counts_do_not_grow_with_data(self):
+        small = self.measure(SMALL)
+        large = self.measure(LARGE)
+
+        for name in SCENARIOS:
+            with self.subTest(route=name):
+                status, queries = large[name]
+                self.assertLess(status, 400, "{} answered {}".format(name, status))
+                repeated = [
+                    "{}x {}".format(count, sql)
+                    for sql, count in Counter(normalize(q) for q in queries).items() if count > 1
+                ]
+                report = "\n".join(["{} ran {} queries with {} rows and {} with {} rows.".format(
+                    name, len(small[name][1]), SMALL, len(queries), LARGE),
+                    "Repeated statements:"] + repeated)
+
+                self.assertEqual(len(small[name][1]), len(queries), report)
+                self.assertLessEqual(len(queries), BUDGETS[name], report)
@@ -0,0 +1,86 @@
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from api import replicas
+from api.models import Bet
+
+router = replicas.ReplicaRouter()
+
+
+def respond_with(status):
+    """A view recording where its reads would go."""
+    seen = []
+
+    def view(request):
+        seen.append(router.db_for_read(Bet))
+        with replicas.primary():
+            seen.append(router.db_for_read(Bet))
+        return HttpResponse(status=status)
+    return view, seen
+
+
+def async_respond_with(status):
+    view, seen = respond_with(status)
+
+    async def async_view(request):
+        return view(request)
+    return async_view, seen
+
+
+@override_settings(BWF_READ_REPLICAS=['replica_1', 'replica_2'], BWF_REPLICA_STICKY_SECONDS=10)
+class TestReplicaRouting(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, method, status=200, token='a'):
+        view, seen = respond_with(status)
+        request = getattr(self.factory, method)('/api/bets/', HTTP_AUTHORIZATION='Token {}'.format(token))
+        replicas.ReplicaMiddleware(view)(request)
+        return seen
+
+    def test_safe_reads_go_to_a_replica(self):
+        read, pinned = self.request('get')
+        self.assertIn(read, ['replica_1', 'replica_2'])
+        self.assertIsNone(pinned)
+
+    def test_writes_and_unsafe_requests_use_the_primary(self):
+        self.assertEqual(router.db_for_write(Bet), 'default')
+        self.assertEqual(self.request('post'), [None, None])
+
+    def test_client_reads_its_own_writes(self):
+        self.request('post')
+
+        self.assertEqual(self.request('get'), [None, None])
+        self.assertIn(self.request('get', token='b')[0], ['replica_1', 'replica_2'])
+
+    def test_failed_writes_do_not_stick(self):
+        self.request('post', status=400)
+        self.assertIn(self.request('get')[0], ['replica_1', 'replica_2'])
+
+    async def test_async_requests(self):
+        async def request(method, status=200):
+            view, seen = async_respond_with(status)
+            middleware = replicas.ReplicaMiddleware(view)
+            self.assertTrue(iscoroutinefunction(middleware))
+            await middleware(getattr(self.factory, method)('/api/bets/', HTTP_AUTHORIZATION='Token a'))
+            return seen
+
+        self.assertIn((await request('get'))[0], ['replica_1', 'replica_2'])
+        self.assertEqual(await request('post'), [None, None])
+        self.assertEqual(await request('get'), [None, None])
+        self.assertIsNone(router.db_for_read(Bet))
+
+    def test_outside_requests_use_the_primary(self):
+        self.assertIsNone(router.db_for_read(Bet))
+        self.assertTrue(router.allow_migrate('default', 'api'))
+        self.assertFalse(router.allow_migrate('replica_1', 'api'))
+
+
+class TestWithoutReplicas(SimpleTestCase):
+    def test_everything_uses_the_primary(self):
+        view, seen = respond_with(200)
+        replicas.ReplicaMiddleware(view)(RequestFactory().get('/api/bets/'))
+        self.assertEqual(seen, [None, None])
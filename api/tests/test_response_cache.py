@@ -0,0 +1,112 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api import response_cache
+from api.models import User, Group, Member, Comment
+
+
+class TestGroupDetailCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.stats.reset()
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.member = User.objects.create_user(username="member", password="Pol123")
+        self.admin = User.objects.create_user(username="admin", password="Pol123")
+        Member.objects.create(user=self.member, group=self.group)
+        Member.objects.create(user=self.admin, group=self.group, admin=True)
+        self.path = '/api/groups/{}/'.format(self.group.id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def fetch(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_second_request_is_served_from_cache(self):
+        first, cold = self.fetch()
+        second, warm = self.fetch()
+
+        self.assertEqual(first.data, second.data)
+        self.assertLess(warm, cold)
+        self.assertLessEqual(warm, 2)
+        self.assertEqual(response_cache.stats.snapshot()['hits'], 1)
+        self.assertEqual(response_cache.stats.snapshot()['misses'], 1)
+
+    def test_writes_invalidate_the_payload(self):
+        self.fetch()
+        Comment.objects.create(user=self.member, group=self.group, description="new")
+
+        response, _ = self.fetch()
+
+        self.assertEqual([c['description'] for c in response.data['comments']], ["new"])
+        self.assertEqual(response_cache.stats.snapshot()['misses'], 2)
+
+    def test_visibility_classes_are_cached_separately(self):
+        self.fetch()
+        self.client.force_authenticate(self.admin)
+        self.fetch()
+
+        self.assertEqual(response_cache.stats.snapshot()['misses'], 2)
+
+    @override_settings(BWF_RESPONSE_CACHE={'ENABLED': False})
+    def test_cache_can_be_disabled(self):
+        self.fetch()
+        self.fetch()
+        self.assertEqual(response_cache.stats.snapshot()['misses'], 0)
+
+    def test_stats_are_superuser_only(self):
+        response = self.client.get('/api/groups/cache_stats/')
+        self.assertEqual(response.status_code, 403)
+
+        self.fetch()
+        self.client.force_authenticate(User.objects.create_superuser(username="root", password="Pol123"))
+        response = self.client.get('/api/groups/cache_stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['misses'], 1)
+
+
+class TestCoalescing(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.stats.reset()
+
+    def test_cold_key_is_computed_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 1}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(response_cache.get_or_compute('k', compute)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 1}] * 8)
+        counts = response_cache.stats.snapshot()
+        self.assertEqual(counts['misses'], 1)
+        self.assertEqual(counts['hits'] + counts['coalesced'], 7)
+
+    def test_waits_for_a_computation_in_another_process(self):
+        cache.add('k:lock', 1)
+
+        def finish():
+            time.sleep(0.1)
+            cache.set('k', 'theirs')
+
+        threading.Thread(target=finish).start()
+        self.assertEqual(response_cache.get_or_compute('k', lambda: 'ours'), 'theirs')
+        self.assertEqual(response_cache.stats.snapshot()['coalesced'], 1)
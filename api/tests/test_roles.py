@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.request import Request
+from rest_framework.parsers import JSONParser
+
+from api import roles
+from api.models import User, Group, Member
+from api.permission import GroupPermission, IsGroupAdminForEventCreate
+
+
+class TestRoles(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(username="user", password="Pol123")
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.other_group = Group.objects.create(name="Other", location="Spain", description="Test_desc")
+        Member.objects.create(user=self.user, group=self.group, admin=True)
+        Member.objects.create(user=self.user, group=self.other_group, admin=False)
+        cache.clear()
+
+    def request(self):
+        request = self.factory.post("/events/", {"group": self.group.id}, format='json')
+        force_authenticate(request, user=self.user)
+        return Request(request, parsers=[JSONParser()])
+
+    def test_permissions_share_one_lookup_per_request(self):
+        request = self.request()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(IsGroupAdminForEventCreate().has_permission(request, None))
+            self.assertTrue(GroupPermission().has_object_permission(request, None, self.group))
+            self.assertFalse(GroupPermission().has_object_permission(request, None, self.other_group))
+            self.assertTrue(roles.is_admin_anywhere(request))
+
+    def test_roles_accept_string_group_ids(self):
+        request = self.request()
+
+        self.assertTrue(roles.is_admin(request, str(self.group.id)))
+        self.assertTrue(roles.is_member(request, str(self.other_group.id)))
+        self.assertFalse(roles.is_admin(request, str(self.other_group.id)))
+        self.assertFalse(roles.is_member(request, "not-a-number"))
+
+    @override_settings(BWF_ROLE_CACHE_TTL=30)
+    def test_cross_request_cache_is_invalidated_on_member_change(self):
+        self.assertTrue(roles.is_admin(self.request(), self.group.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(roles.is_admin(self.request(), self.group.id))
+
+        Member.objects.filter(user=self.user, group=self.group).get().delete()
+
+        self.assertFalse(roles.is_member(self.request(), self.group.id))
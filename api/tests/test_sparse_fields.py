@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event, Bet, Comment, UserProfile
+
+
+class TestSparseFields(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.root = User.objects.create_superuser(username="root", password="Pol123")
+        self.user = User.objects.create_user(username="user", password="Pol123", email="u@example.com")
+        UserProfile.objects.create(user=self.user, bio="bio")
+        Member.objects.create(user=self.user, group=self.group, admin=True)
+        self.event = Event.objects.create(team1="A", team2="B", group=self.group,
+                                          time=timezone.now() - timedelta(hours=2))
+        Bet.objects.create(user=self.user, event=self.event, score1=1, score2=0)
+        Comment.objects.create(user=self.user, group=self.group, description="hi")
+        self.client = APIClient()
+        self.client.force_authenticate(self.root)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in queries.captured_queries]
+
+    def test_nested_users_are_compact_by_default(self):
+        response, queries = self.get('/api/bets/')
+
+        self.assertEqual(response.data['results'][0]['user'], {'id': self.user.id, 'username': 'user'})
+        self.assertFalse(any('api_userprofile' in sql or 'email' in sql for sql in queries))
+
+    def test_expand_nests_the_full_user(self):
+        response, _ = self.get('/api/bets/', expand='user')
+
+        user = response.data['results'][0]['user']
+        self.assertEqual(user['profile']['bio'], 'bio')
+        self.assertEqual(user['members'][0]['group_name'], 'Group')
+
+    def test_fields_limit_the_output_and_the_columns(self):
+        response, queries = self.get('/api/bets/', fields='id,points')
+
+        self.assertEqual(response.data['results'], [{'id': Bet.objects.get().id, 'points': None}])
+        self.assertFalse(any('auth_user' in sql or '"score1"' in sql for sql in queries if 'api_bet' in sql))
+
+    def test_fields_skip_relations_of_users(self):
+        response, queries = self.get('/api/users/', fields='id,username')
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username'})
+        self.assertFalse(any('api_userprofile' in sql or 'api_membershipsummary' in sql for sql in queries))
+
+    def test_group_detail_loads_only_requested_relations(self):
+        _, everything = self.get('/api/groups/{}/'.format(self.group.id))
+        response, queries = self.get('/api/groups/{}/'.format(self.group.id), fields='id,name,members')
+
+        self.assertEqual(set(response.data), {'id', 'name', 'members'})
+        self.assertEqual(response.data['members'][0]['user'], {'id': self.user.id, 'username': 'user'})
+        self.assertEqual(set(response.data['members'][0]), {'admin', 'group_id', 'user', 'points', 'rank'})
+        self.assertLess(len(queries), len(everything))
+        self.assertFalse(any('api_comment' in sql or 'api_event' in sql for sql in queries))
+
+    def test_event_detail_without_bets_skips_them(self):
+        response, queries = self.get('/api/events/{}/'.format(self.event.id), fields='id,team1,team2')
+
+        self.assertEqual(set(response.data), {'id', 'team1', 'team2'})
+        self.assertFalse(any('api_bet' in sql for sql in queries))
+
+    def columns_read(self, queries, table):
+        """Columns of table in the queries reading from it."""
+        sql = ' '.join(q for q in queries if 'FROM "{}"'.format(table) in q)
+        self.assertTrue(sql)
+        return {name for name in ('id', 'team1', 'team2', 'time', 'score1', 'score2', 'group_id', 'user_id',
+                                  'description', 'name', 'location')
+                if '"{}"."{}"'.format(table, name) in sql}
+
+    def test_event_list_reads_only_requested_columns(self):
+        response, queries = self.get('/api/events/', fields='team1')
+
+        self.assertEqual(response.data['results'], [{'team1': 'A'}])
+        # time is the cursor of the page.
+        self.assertEqual(self.columns_read(queries, 'api_event'), {'id', 'team1', 'time'})
+
+    def test_event_detail_reads_only_requested_columns(self):
+        response, queries = self.get('/api/events/{}/'.format(self.event.id), fields='id,team1')
+
+        self.assertEqual(response.data, {'id': self.event.id, 'team1': 'A'})
+        self.assertNotIn('team2', self.columns_read([q for q in queries if 'api_resourceversion' not in q],
+                                                    'api_event'))
+
+    def test_event_detail_bets_read_what_they_need(self):
+        response, _ = self.get('/api/events/{}/'.format(self.event.id), fields='id,bets')
+
+        self.assertEqual(set(response.data), {'id', 'bets'})
+        self.assertEqual(len(response.data['bets']), 1)
+
+    def test_comment_list_reads_only_requested_columns(self):
+        response, queries = self.get('/api/comments/', fields='id,description')
+
+        self.assertEqual(response.data['results'], [{'id': Comment.objects.get().id, 'description': 'hi'}])
+        self.assertEqual(self.columns_read(queries, 'api_comment'), {'id', 'description', 'time'})
+
+    def test_group_list_reads_only_requested_columns(self):
+        response, queries = self.get('/api/groups/', fields='id,name')
+
+        self.assertEqual(response.data[0], {'id': self.group.id, 'name': 'Group'})
+        self.assertEqual(self.columns_read(queries, 'api_group'), {'id', 'name'})
+
+    def test_fields_are_ignored_on_writes(self):
+        self.client.force_authenticate(self.user)
+        event = Event.objects.create(team1="C", team2="D", group=self.group,
+                                     time=timezone.now() + timedelta(days=1))
+        response = self.client.post('/api/bets/place_bet/?fields=id', {'event': event.id, 'score1': 1, 'score2': 1},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['result']), {'id', 'user', 'event', 'score1', 'score2', 'points'})
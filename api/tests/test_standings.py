@@ -0,0 +1,147 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event, Bet, Standing
+
+
+class TestStandings(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.users = [User.objects.create_user(username="user_{}".format(i), password="Pol123")
+                      for i in range(3)]
+        for user in self.users:
+            Member.objects.create(user=user, group=self.group, admin=False)
+
+        self.event = Event.objects.create(
+            team1="Poland", team2="Germany",
+            time=timezone.now() - timedelta(days=1), group=self.group
+        )
+        Bet.objects.create(user=self.users[0], event=self.event, score1=2, score2=1)
+        Bet.objects.create(user=self.users[1], event=self.event, score1=3, score2=0)
+        Bet.objects.create(user=self.users[2], event=self.event, score1=0, score2=0)
+
+    def set_result(self, score1, score2):
+        self.event.score1 = score1
+        self.event.score2 = score2
+        self.event.save()
+        self.event.calculate_points()
+
+    def standing(self, user):
+        return Standing.objects.get(group=self.group, user=user)
+
+    def test_member_gets_empty_standing(self):
+        standing = self.standing(self.users[0])
+        self.assertEqual((standing.points, standing.exact_hits, standing.correct_outcomes), (0, 0, 0))
+
+    def test_scoring_updates_points_and_ranks(self):
+        self.set_result(2, 1)
+
+        first, second, third = (self.standing(u) for u in self.users)
+        self.assertEqual((first.points, first.exact_hits, first.rank), (3, 1, 1))
+        self.assertEqual((second.points, second.correct_outcomes, second.rank), (1, 1, 2))
+        self.assertEqual((third.points, third.rank), (0, 3))
+
+    def test_rescoring_applies_only_the_difference(self):
+        self.set_result(2, 1)
+        self.set_result(0, 0)
+
+        first, second, third = (self.standing(u) for u in self.users)
+        self.assertEqual((first.points, first.exact_hits), (0, 0))
+        self.assertEqual(second.points, 0)
+        self.assertEqual((third.points, third.exact_hits, third.rank), (3, 1, 1))
+
+    def test_deleting_event_reverts_points(self):
+        self.set_result(2, 1)
+        self.event.delete()
+
+        self.assertEqual([self.standing(u).points for u in self.users], [0, 0, 0])
+
+    def test_rebuild_matches_incremental_state(self):
+        self.set_result(2, 1)
+        expected = list(Standing.objects.order_by('user_id').values_list(
+            'user_id', 'points', 'exact_hits', 'correct_outcomes', 'rank'))
+        Standing.objects.all().update(points=0, rank=1)
+
+        call_command('rebuild_standings', stdout=open('/dev/null', 'w'))
+
+        rebuilt = list(Standing.objects.order_by('user_id').values_list(
+            'user_id', 'points', 'exact_hits', 'correct_outcomes', 'rank'))
+        self.assertEqual(rebuilt, expected)
+
+    def test_leaderboard_endpoint_is_ranked(self):
+        self.set_result(2, 1)
+        client = APIClient()
+        client.force_authenticate(self.users[2])
+
+        response = client.get('/api/groups/{}/leaderboard/'.format(self.group.id))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['username'] for row in response.data], ['user_0', 'user_1', 'user_2'])
+        self.assertEqual(response.data[0]['points'], 3)
+
+    def test_deleting_a_scored_bet_reverts_its_points(self):
+        self.set_result(2, 1)
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+
+        response = client.delete('/api/bets/{}/'.format(Bet.objects.get(user=self.users[0]).id))
+
+        self.assertEqual(response.status_code, 204)
+        first, second = self.standing(self.users[0]), self.standing(self.users[1])
+        self.assertEqual((first.points, first.exact_hits, first.rank), (0, 0, 2))
+        self.assertEqual(second.rank, 1)
+
+    def test_deleting_bets_outside_the_api_reverts_their_points(self):
+        self.set_result(2, 1)
+
+        Bet.objects.get(user=self.users[0]).delete()
+        self.assertEqual(self.standing(self.users[0]).points, 0)
+
+        Bet.objects.filter(event=self.event).delete()
+        self.assertEqual([(s.points, s.rank) for s in Standing.objects.filter(group=self.group)],
+                         [(0, 1)] * 3)
+
+    def test_deleting_event_reverts_its_bets_once(self):
+        other = Event.objects.create(team1="Spain", team2="Italy", group=self.group,
+                                     time=timezone.now() - timedelta(days=1))
+        Bet.objects.create(user=self.users[0], event=other, score1=1, score2=0)
+        other.score1, other.score2 = 1, 0
+        other.save()
+        other.calculate_points()
+        self.set_result(2, 1)
+
+        self.event.delete()
+
+        self.assertEqual(self.standing(self.users[0]).points, 3)
+        self.assertEqual(self.standing(self.users[1]).points, 0)
+
+    def test_rebuild_clears_standings_of_groups_without_members(self):
+        Member.objects.filter(group=self.group).update(
+            group=Group.objects.create(name="Other", location="Spain", description="Test_desc"))
+
+        call_command('rebuild_standings', stdout=open('/dev/null', 'w'))
+
+        self.assertFalse(Standing.objects.filter(group=self.group).exists())
+        self.assertEqual(Standing.objects.count(), 3)
+
+    def test_bulk_member_delete_reranks_once(self):
+        self.set_result(2, 1)
+        with CaptureQueriesContext(connection) as queries:
+            Member.objects.filter(user__in=self.users[:2]).delete()
+
+        self.assertEqual([(s.user_id, s.rank) for s in Standing.objects.filter(group=self.group)],
+                         [(self.users[2].id, 1)])
+        selects = [q for q in queries.captured_queries if q['sql'].startswith('SELECT "api_standing"')]
+        self.assertEqual(len(selects), 1)
+
+    def test_deleting_group_skips_reranking(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.group.delete()
+
+        self.assertFalse(Standing.objects.exists())
+        self.assertFalse(any(q['sql'].startswith('SELECT "api_standing"') for q in queries.captured_queries))
@@ -0,0 +1,63 @@
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import streaming
+from api.models import User, Group, Member, Event, Bet, UserProfile
+
+
+@override_settings(BWF_LIST_STREAM_CHUNK_SIZE=4)
+class TestStreamingLists(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.superuser = User.objects.create_superuser(username="root", password="Pol123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.superuser)
+
+    def add_rows(self, count):
+        event = Event.objects.create(team1="A", team2="B", group=self.group,
+                                     time=timezone.now() + timedelta(days=1))
+        for i in range(count):
+            user = User.objects.create_user(username="user_{}_{}".format(event.id, i), password="Pol123")
+            UserProfile.objects.create(user=user, bio="bio")
+            Member.objects.create(user=user, group=self.group)
+            Bet.objects.create(user=user, event=event, score1=1, score2=0)
+
+    def stream(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'stream': 1})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            body = b''.join(response.streaming_content)
+        return json.loads(body), len(queries)
+
+    def test_streamed_rows_match_the_paginated_ones(self):
+        self.add_rows(7)
+        for url in ('/api/bets/', '/api/members/', '/api/users/'):
+            with self.subTest(url=url):
+                rows, _ = self.stream(url)
+                paged = self.client.get(url, {'page_size': 100}).json()['results']
+                self.assertEqual(rows, paged)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.add_rows(4)
+        _, one_chunk = self.stream('/api/bets/')
+        self.add_rows(4)
+        _, two_chunks = self.stream('/api/bets/')
+
+        # The rows and their joined users come from one cursor.
+        self.assertEqual(two_chunks, one_chunk)
+
+    def test_empty_list(self):
+        rows, _ = self.stream('/api/bets/')
+        self.assertEqual(rows, [])
+
+    def test_body_is_sent_in_pieces(self):
+        pieces = list(streaming.json_array(range(50000), lambda row: {'id': row}))
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual(json.loads(b''.join(pieces)), [{'id': i} for i in range(50000)])
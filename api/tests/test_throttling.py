@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.models import User, Group, Member, Event
+from api.throttling import SlidingWindow, client_ip
+
+RULES = {
+    'bet-place-bet': {'methods': ('POST',), 'user': '3/min', 'ip': '5/min'},
+    'authenticate': {'methods': ('POST',), 'endpoint': '2/min'},
+    'place-bet-async': {'methods': ('POST',), 'user': '2/min'},
+}
+
+
+@override_settings(BWF_THROTTLE={'ENABLED': True, 'CACHE': 'throttle', 'RULES': RULES})
+class TestThrottling(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        self.event = Event.objects.create(team1="A", team2="B", group=self.group,
+                                          time=timezone.now() + timedelta(days=1))
+        self.tokens = []
+        for i in range(3):
+            user = User.objects.create_user(username="user_{}".format(i), password="Pol123")
+            Member.objects.create(user=user, group=self.group)
+            self.tokens.append(Token.objects.create(user=user).key)
+
+    def bet(self, token, address='10.0.0.1'):
+        client = APIClient(REMOTE_ADDR=address)
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        return client.post('/api/bets/place_bet/', {'event': self.event.id, 'score1': 1, 'score2': 0},
+                           format='json')
+
+    def test_limit_per_user(self):
+        statuses = [self.bet(self.tokens[0]).status_code for _ in range(4)]
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(self.bet(self.tokens[1]).status_code, 200)
+
+    def test_limit_per_ip(self):
+        for token in self.tokens[:2]:
+            for _ in range(2):
+                self.bet(token)
+        self.bet(self.tokens[2])
+
+        self.assertEqual(self.bet(self.tokens[2]).status_code, 429)
+        self.assertEqual(self.bet(self.tokens[2], address='10.0.0.2').status_code, 200)
+
+    def test_rejection_costs_no_queries(self):
+        for _ in range(3):
+            self.bet(self.tokens[0])
+
+        with self.assertNumQueries(0):
+            response = self.bet(self.tokens[0])
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_limit_per_endpoint(self):
+        client = APIClient()
+        for _ in range(2):
+            client.post('/api/authenticate/', {'username': 'user_0', 'password': 'wrong'}, format='json')
+
+        response = APIClient(REMOTE_ADDR='10.0.0.9').post(
+            '/api/authenticate/', {'username': 'user_0', 'password': 'Pol123'}, format='json')
+        self.assertEqual(response.status_code, 429)
+
+    def test_other_routes_and_methods_are_not_limited(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + self.tokens[0])
+        for _ in range(5):
+            self.assertEqual(client.get('/api/bets/').status_code, 200)
+
+    async def test_async_route(self):
+        client = AsyncClient()
+        headers = {'Authorization': 'Token ' + self.tokens[0]}
+        statuses = []
+        for _ in range(3):
+            response = await client.post('/api/bets/place_bet_async/', {'event': self.event.id, 'score1': 1,
+                                          'score2': 0}, content_type='application/json', headers=headers)
+            statuses.append(response.status_code)
+
+        self.assertEqual(statuses, [200, 200, 429])
+
+    @override_settings(BWF_THROTTLE={'ENABLED': False, 'CACHE': 'throttle', 'RULES': RULES})
+    def test_disabled(self):
+        self.assertEqual([self.bet(self.tokens[0]).status_code for _ in range(4)], [200] * 4)
+
+
+class TestClientIp(TestCase):
+    def request(self, forwarded=None):
+        headers = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded else {}
+        return RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', **headers)
+
+    @override_settings(BWF_THROTTLE={'NUM_PROXIES': 0})
+    def test_forwarded_header_is_ignored_without_proxies(self):
+        self.assertEqual(client_ip(self.request('1.2.3.4')), '10.0.0.1')
+
+    @override_settings(BWF_THROTTLE={'NUM_PROXIES': 1})
+    def test_address_added_by_the_proxy(self):
+        self.assertEqual(client_ip(self.request('6.6.6.6, 1.2.3.4')), '1.2.3.4')
+        self.assertEqual(client_ip(self.request()), '10.0.0.1')
+
+    @override_settings(BWF_THROTTLE={'NUM_PROXIES': 2})
+    def test_chain_of_proxies(self):
+        self.assertEqual(client_ip(self.request('6.6.6.6, 1.2.3.4, 172.16.0.1')), '1.2.3.4')
+        self.assertEqual(client_ip(self.request('1.2.3.4')), '1.2.3.4')
+
+
+class TestSlidingWindow(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.window = SlidingWindow(caches['throttle'])
+        self.limits = [('user', 'u', 10, 60)]
+
+    def test_previous_window_slides_out(self):
+        for _ in range(10):
+            self.assertIsNone(self.window.check('r', self.limits, now=60 * 100 + 30))
+
+        # Half of the previous window still counts, 5 of the 10 requests.
+        allowed = [self.window.check('r', self.limits, now=60 * 101 + 30) is None for _ in range(6)]
+        self.assertEqual(allowed, [True] * 5 + [False])
+
+    def test_retry_after(self):
+        for _ in range(10):
+            self.window.check('r', self.limits, now=60 * 100 + 30)
+
+        wait = self.window.check('r', self.limits, now=60 * 100 + 30)
+        self.assertIsNone(self.window.check('r', self.limits, now=60 * 100 + 30 + wait))
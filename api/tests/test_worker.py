@@ -0,0 +1,158 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import standings, worker
+from api.scoring import score_bets
+from api.models import User, Group, Member, Event, Bet, ScoringJob, Standing
+
+
+@override_settings(BWF_SCORING={'THREADS': 0, 'CHUNK_SIZE': 3})
+class TestScoringWorker(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", password="Pol123")
+        self.group = Group.objects.create(name="Group", location="Poland", description="Test_desc")
+        Member.objects.create(user=self.admin, group=self.group, admin=True)
+        self.event = Event.objects.create(team1="Poland", team2="Germany", group=self.group,
+                                          time=timezone.now() - timedelta(days=1))
+        self.users = [User.objects.create_user(username="user_{}".format(i), password="Pol123")
+                      for i in range(7)]
+        for i, user in enumerate(self.users):
+            Member.objects.create(user=user, group=self.group)
+            Bet.objects.create(user=user, event=self.event, score1=i % 3, score2=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def set_results(self, score1, score2):
+        return self.client.put('/api/events/{}/set_results/'.format(self.event.id),
+                               {'score1': score1, 'score2': score2}, format='json')
+
+    def test_set_results_returns_queued_job(self):
+        response = self.set_results(2, 1)
+
+        self.assertEqual(response.status_code, 202)
+        job = response.data['job']
+        self.assertEqual((job['status'], job['total'], job['processed']), ('pending', 7, 0))
+        self.assertFalse(Bet.objects.exclude(points=None).exists())
+
+        status = self.client.get('/api/scoring_jobs/{}/'.format(job['id']))
+        self.assertEqual(status.data['status'], 'pending')
+
+    def test_worker_scores_in_chunks(self):
+        job_id = self.set_results(2, 1).data['job']['id']
+
+        self.assertEqual(worker.drain(), 1)
+
+        job = ScoringJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.processed), (ScoringJob.DONE, 7))
+        points = dict(Bet.objects.values_list('score1', 'points').distinct())
+        self.assertEqual(points, {0: 0, 1: 0, 2: 3})
+        self.assertEqual(Standing.objects.get(group=self.group, user=self.users[2]).points, 3)
+
+    def test_job_ranks_once_after_the_last_chunk(self):
+        self.set_results(2, 1)
+
+        with mock.patch('api.worker.refresh_ranks', wraps=worker.refresh_ranks) as refresh_ranks, \
+                mock.patch('api.standings.rank_standings', wraps=standings.rank_standings) as rank_standings:
+            worker.drain()
+
+        refresh_ranks.assert_called_once_with(self.group.id)
+        self.assertEqual(rank_standings.call_count, 1)
+        self.assertEqual(Standing.objects.get(group=self.group, user=self.users[2]).rank, 1)
+
+    def test_new_result_supersedes_pending_job(self):
+        first = self.set_results(2, 1).data['job']['id']
+        self.set_results(0, 1)
+
+        worker.drain()
+
+        self.assertEqual(ScoringJob.objects.get(pk=first).status, ScoringJob.SUPERSEDED)
+        self.assertEqual(Standing.objects.get(group=self.group, user=self.users[0]).points, 3)
+
+    def test_stale_job_resumes_from_cursor(self):
+        self.event.score1, self.event.score2 = 2, 1
+        self.event.save()
+        job = worker.enqueue(self.event)
+        # A worker scored the first chunk and died.
+        scored, last_id = score_bets(self.event.id, self.group.id, 2, 1, limit=3)
+        ScoringJob.objects.filter(pk=job.pk).update(
+            status=ScoringJob.RUNNING, processed=scored, last_bet_id=last_id,
+            updated=timezone.now() - timedelta(hours=1))
+
+        worker.run_worker(once=True)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.attempts), (ScoringJob.DONE, 7, 1))
+        self.assertFalse(Bet.objects.filter(points=None).exists())
+        totals = sorted(Standing.objects.filter(user__in=self.users).values_list('points', flat=True))
+        self.assertEqual(totals, [0, 0, 0, 0, 0, 3, 3])
+
+    def test_drain_requeues_stale_jobs(self):
+        self.event.score1, self.event.score2 = 2, 1
+        self.event.save()
+        job = worker.enqueue(self.event)
+        ScoringJob.objects.filter(pk=job.pk).update(
+            status=ScoringJob.RUNNING, attempts=1, updated=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(worker.drain(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (ScoringJob.DONE, 2))
+
+    def test_stale_job_out_of_attempts_fails(self):
+        job_id = self.set_results(2, 1).data['job']['id']
+        job = ScoringJob.objects.get(pk=job_id)
+        ScoringJob.objects.filter(pk=job.pk).update(
+            status=ScoringJob.RUNNING, attempts=3, updated=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(worker.drain(), 0)
+        self.assertEqual(ScoringJob.objects.get(pk=job.pk).status, ScoringJob.FAILED)
+
+    def test_failed_job_is_retried(self):
+        job_id = self.set_results(2, 1).data['job']['id']
+        with mock.patch('api.worker.refresh_ranks', side_effect=[RuntimeError('locked'), []]), \
+                self.assertLogs('api.worker', 'ERROR'):
+            self.assertEqual(worker.drain(), 2)
+
+        job = ScoringJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.attempts, job.processed), (ScoringJob.DONE, 2, 7))
+        self.assertIn('locked', job.error)
+
+    def test_retries_are_bounded(self):
+        job_id = self.set_results(2, 1).data['job']['id']
+        with mock.patch('api.worker.refresh_ranks', side_effect=RuntimeError('broken')), \
+                self.assertLogs('api.worker', 'ERROR') as logs:
+            self.assertEqual(worker.drain(), 3)
+
+        self.assertEqual(len(logs.records), 3)
+
+        job = ScoringJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.attempts), (ScoringJob.FAILED, 3))
+        self.assertIsNotNone(job.finished)
+
+    def test_streams_warn_about_a_separate_worker(self):
+        with self.assertLogs('api.worker', 'WARNING'):
+            worker.start(streams=True)
+
+    def test_start_leaves_the_queue_alone_by_default(self):
+        with mock.patch('api.worker.kick') as kick:
+            worker.start()
+        kick.assert_not_called()
+
+    @override_settings(BWF_SCORING={'THREADS': 0, 'EAGER': True, 'RESUME_ON_START': True})
+    def test_start_resumes_left_jobs_when_asked(self):
+        with mock.patch('api.worker.kick') as kick:
+            worker.start()
+        kick.assert_called_once_with()
+        worker.start()
+
+    @override_settings(BWF_SCORING={'EAGER': True})
+    def test_eager_mode_scores_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.set_results(2, 1)
+
+        self.assertEqual(ScoringJob.objects.get(pk=response.data['job']['id']).status, ScoringJob.DONE)
+        self.assertEqual(Standing.objects.get(group=self.group, user=self.users[2]).rank, 1)
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import write_gate
+from api.models import User
+
+
+class TestWriteGate(TestCase):
+    def test_writers_are_served_in_arrival_order(self):
+        gate = write_gate.WriteGate()
+        gate.acquire()
+        order = []
+
+        def writer(number):
+            gate.acquire()
+            order.append(number)
+            gate.release()
+
+        threads = []
+        for number in range(5):
+            thread = threading.Thread(target=writer, args=(number,))
+            thread.start()
+            threads.append(thread)
+            while gate.waiting <= number:
+                time.sleep(0.001)
+        gate.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        self.assertTrue(gate.acquire(timeout=0))
+
+    def test_acquire_gives_up_after_timeout(self):
+        gate = write_gate.WriteGate()
+        gate.acquire()
+
+        self.assertFalse(gate.acquire(timeout=0.01))
+        self.assertEqual(gate.waiting, 0)
+        gate.release()
+        self.assertTrue(gate.acquire(timeout=0))
+
+    async def test_coroutines_wait_in_line_with_threads(self):
+        gate = write_gate.WriteGate()
+        gate.acquire()
+        waiter = asyncio.ensure_future(gate.aacquire(timeout=1))
+        while gate.waiting < 1:
+            await asyncio.sleep(0.001)
+
+        self.assertFalse(waiter.done())
+        await asyncio.to_thread(gate.release)
+        self.assertTrue(await waiter)
+        self.assertFalse(gate.acquire(timeout=0))
+        gate.release()
+
+    async def test_aacquire_gives_up_after_timeout(self):
+        gate = write_gate.WriteGate()
+        gate.acquire()
+
+        self.assertFalse(await gate.aacquire(timeout=0.01))
+        self.assertEqual(gate.waiting, 0)
+
+    async def test_cancelled_waiter_passes_the_gate_on(self):
+        gate = write_gate.WriteGate()
+        gate.acquire()
+        waiter = asyncio.ensure_future(gate.aacquire(timeout=1))
+        while gate.waiting < 1:
+            await asyncio.sleep(0.001)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+
+        self.assertEqual(gate.waiting, 0)
+        gate.release()
+        self.assertTrue(gate.acquire(timeout=0))
+
+
+@override_settings(BWF_WRITE_GATE={'ENABLED': True, 'TIMEOUT': 0.01})
+class TestWriteGateMiddleware(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username="root", password="Pol123"))
+
+    def test_busy_gate_answers_503(self):
+        write_gate.gate.acquire()
+        try:
+            response = self.client.post('/api/groups/', {'name': 'G', 'location': 'PL', 'description': 'd'})
+        finally:
+            write_gate.gate.release()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_reads_and_free_gate_pass(self):
+        write_gate.gate.acquire()
+        try:
+            self.assertEqual(self.client.get('/api/groups/').status_code, 200)
+        finally:
+            write_gate.gate.release()
+
+        response = self.client.post('/api/groups/', {'name': 'G', 'location': 'PL', 'description': 'd'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(write_gate.gate.waiting, 0)
+        self.assertTrue(write_gate.gate.acquire(timeout=0))
+        write_gate.gate.release()
+
+    async def test_async_chain_stays_async(self):
+        async def view(request):
+            return HttpResponse(status=201)
+
+        middleware = write_gate.WriteGateMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        request = RequestFactory().post('/api/groups/')
+        self.assertEqual((await middleware(request)).status_code, 201)
+        await write_gate.gate.aacquire()
+        try:
+            self.assertEqual((await middleware(request)).status_code, 503)
+        finally:
+            write_gate.gate.release()
+
+
+class TestSqliteProfile(TestCase):
+    def test_production_profile_uses_wal_and_immediate_transactions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = DatabaseWrapper(dict(connection.settings_dict, **settings.BWF_SQLITE_PRODUCTION,
+                                            NAME=os.path.join(directory, 'db.sqlite3')))
+            try:
+                database.ensure_connection()
+                with database.cursor() as cursor:
+                    journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+                self.assertEqual(database.transaction_mode, 'IMMEDIATE')
+                self.assertEqual(journal_mode, 'wal')
+            finally:
+                database.close()
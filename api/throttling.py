@@ -0,0 +1,177 @@
+import hashlib
+import math
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'RULES': {},
+    'NUM_PROXIES': 0,
+}
+
+KEY = 'bwf:throttle:{}:{}:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+SCOPES = ('user', 'ip', 'endpoint')
+
+
+def option(name):
+    return getattr(settings, 'BWF_THROTTLE', {}).get(name, DEFAULTS[name])
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60), the period is read from its first letter like DRF does."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def client_ip(request):
+    """Address of the client, taken from X-Forwarded-For behind NUM_PROXIES proxies.
+
+    Only the entries appended by the trusted proxies are used, counted from
+    the right, so a client can't pick its address by sending the header.
+    """
+    num_proxies = option('NUM_PROXIES')
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def identities(request):
+    """scope -> who the request is counted against, read from headers only.
+
+    The user is the hash of the Authorization header, so throttling needs
+    no database; anonymous requests are only limited per ip and endpoint.
+    """
+    found = {'ip': client_ip(request), 'endpoint': '*'}
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        found['user'] = hashlib.sha256(authorization.encode()).hexdigest()[:32]
+    return found
+
+
+class SlidingWindow:
+    """Sliding window counter kept in a Django cache.
+
+    Each period has a counter; the rate is estimated as the current count
+    plus the previous one weighted by how much of it the window still
+    covers. Two cache reads per limit, and an increment only for requests
+    that are let through.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def keys(self, route, scope, ident, period, now):
+        window = int(now // period)
+        return (KEY.format(route, scope, ident, window),
+                KEY.format(route, scope, ident, window - 1))
+
+    def check(self, route, limits, now=None):
+        """Count the request against every (scope, ident, count, period) limit.
+
+        Returns None when it is allowed, else the seconds to wait.
+        """
+        now = time.time() if now is None else now
+        keys = [self.keys(route, scope, ident, period, now) for scope, ident, _, period in limits]
+        counts = self.cache.get_many([key for pair in keys for key in pair])
+
+        wait = 0
+        for (current, previous), (_, _, count, period) in zip(keys, limits):
+            elapsed = (now % period) / period
+            used = counts.get(current, 0)
+            before = counts.get(previous, 0)
+            if before * (1 - elapsed) + used + 1 > count:
+                wait = max(wait, self.retry_after(count, period, elapsed, used, before))
+        if wait:
+            return wait
+
+        for (current, _), (_, _, _, period) in zip(keys, limits):
+            # Kept for two periods, the next window reads it as its previous one.
+            if not self.cache.add(current, 1, 2 * period):
+                try:
+                    self.cache.incr(current)
+                except ValueError:
+                    # Expired between add() and incr().
+                    self.cache.add(current, 1, 2 * period)
+        return None
+
+    @staticmethod
+    def retry_after(count, period, elapsed, used, before):
+        """Seconds until one more request fits in the window."""
+        if used + 1 <= count and before:
+            # Waiting for the previous window to slide out far enough.
+            fraction = 1 - (count - 1 - used) / before
+            return max(1, math.ceil((fraction - elapsed) * period))
+        # The current window is full, it becomes the previous one.
+        fraction = 1 - (count - 1) / used if used else 0
+        return max(1, math.ceil((1 - elapsed + max(0, fraction)) * period))
+
+
+class ThrottleMiddleware:
+    """Reject requests over BWF_THROTTLE['RULES'] limits with 429 and Retry-After.
+
+    RULES maps URL names to the methods they cover and "count/period" limits
+    per scope: 'user' (token), 'ip' and 'endpoint' (all clients together).
+    It runs ahead of authentication and the write gate, so a rejected
+    request costs no database query and holds no worker waiting to write.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        limits = self.limits(request)
+        wait = SlidingWindow(caches[option('CACHE')]).check(*limits) if limits else None
+        if wait is None:
+            return self.get_response(request)
+        return self.rejected(wait)
+
+    async def __acall__(self, request):
+        limits = self.limits(request)
+        wait = None
+        if limits:
+            window = SlidingWindow(caches[option('CACHE')])
+            wait = await sync_to_async(window.check, thread_sensitive=False)(*limits)
+        if wait is None:
+            return await self.get_response(request)
+        return self.rejected(wait)
+
+    @staticmethod
+    def limits(request):
+        """(route, limits) the request is counted against, None when no rule covers it."""
+        rules = option('RULES')
+        if not rules or not option('ENABLED'):
+            return None
+
+        try:
+            route = resolve(request.path_info).url_name
+        except Resolver404:
+            return None
+        rule = rules.get(route)
+        if rule is None or request.method not in rule.get('methods', ('POST',)):
+            return None
+
+        found = identities(request)
+        return route, [(scope, found[scope]) + parse_rate(rule[scope])
+                       for scope in SCOPES if rule.get(scope) and scope in found]
+
+    @staticmethod
+    def rejected(wait):
+        response = JsonResponse({'detail': 'Too many requests, retry in {} seconds'.format(wait)}, status=429)
+        response['Retry-After'] = str(wait)
+        return response
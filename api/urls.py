@@ -1,4 +1,4 @@
-from api import views
+from api import views, async_views
 from rest_framework import routers
 from django.conf.urls import include
 from django.urls import path
@@ -12,9 +12,13 @@ router.register(r'members', views.MemberViewset)
 router.register(r'comments', views.CommentViewset)
 router.register(r'users', views.UserViewSet)
 router.register(r'profile', views.UserProfileViewset)
+router.register(r'scoring_jobs', views.ScoringJobViewset)
 
 
 urlpatterns = [
+    # Registered before the router so these paths are not taken for detail routes
+    path('bets/place_bet_async/', async_views.place_bet, name='place-bet-async'),
+    path('groups/<int:pk>/stream/', async_views.group_stream, name='group-stream'),
     path(r'', include(router.urls)),
-    path('authenticate/', views.CustomObtainAuthToken.as_view())
+    path('authenticate/', views.CustomObtainAuthToken.as_view(), name='authenticate')
 ]
\ No newline at end of file
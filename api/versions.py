@@ -0,0 +1,149 @@
+import hashlib
+import secrets
+
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+
+from . import roles
+from .models import Group, Event, Bet, Member, ResourceVersion
+
+
+def bump(kind, ids):
+    """Increase the version of every object of the kind in ids.
+
+    Rows are created on first use, objects without one are at version 0. New
+    rows start from a random number so a recreated database (or a rolled back
+    test) doesn't hand out the same versions, ETags and cache keys again.
+    """
+    ids = {int(i) for i in ids if i is not None}
+    if not ids:
+        return
+
+    versions = ResourceVersion.objects.filter(kind=kind)
+    updated = versions.filter(object_id__in=ids).update(version=F('version') + 1)
+    if updated == len(ids):
+        return
+    create(kind, ids - set(versions.filter(object_id__in=ids).values_list('object_id', flat=True)))
+
+
+def bump_matching(kind, queryset, field):
+    """bump() for the ids in the field of queryset, which are never loaded.
+
+    The increment is one UPDATE with the queryset as subquery; only ids
+    that have no version row yet are read, to create theirs.
+    """
+    versions = ResourceVersion.objects.filter(kind=kind)
+    versions.filter(object_id__in=queryset.values(field)).update(version=F('version') + 1)
+    missing = (queryset.exclude(**{field + '__in': versions.values('object_id')})
+               .values_list(field, flat=True).distinct())
+    create(kind, set(missing))
+
+
+def create(kind, missing):
+    """Start the versions of ids that have no row, at a bumped random number."""
+    if not missing:
+        return
+    ResourceVersion.objects.bulk_create(
+        [ResourceVersion(kind=kind, object_id=i, version=secrets.randbits(48)) for i in missing],
+        ignore_conflicts=True)
+    # Bumped after the insert, a concurrent creator can't swallow this increment.
+    ResourceVersion.objects.filter(kind=kind, object_id__in=missing).update(version=F('version') + 1)
+
+
+def bump_groups(ids):
+    bump(ResourceVersion.GROUP, ids)
+
+
+def bump_events(ids):
+    bump(ResourceVersion.EVENT, ids)
+
+
+def forget_event(event_id):
+    ResourceVersion.objects.filter(kind=ResourceVersion.EVENT, object_id=event_id).delete()
+
+
+def bump_user(user_id, group_ids=()):
+    """A user's data is nested in the groups they belong to and the events they bet on.
+
+    group_ids are bumped as well, e.g. the group of a membership just deleted.
+    """
+    bump_groups(group_ids)
+    bump_matching(ResourceVersion.GROUP, Member.objects.filter(user_id=user_id).exclude(group_id__in=group_ids),
+                  'group_id')
+    bump_matching(ResourceVersion.EVENT, Bet.objects.filter(user_id=user_id), 'event_id')
+
+
+def bump_members_of(group_id):
+    """bump_user() for every member of a group, whose name their summaries show."""
+    members = Member.objects.filter(group_id=group_id).values('user_id')
+    bump_matching(ResourceVersion.GROUP, Member.objects.filter(user_id__in=members), 'group_id')
+    bump_matching(ResourceVersion.EVENT, Bet.objects.filter(user_id__in=members), 'event_id')
+
+
+def version_of(kind, ref='pk'):
+    """Subquery annotating the version of the outer row, 0 when never bumped."""
+    version = ResourceVersion.objects.filter(kind=kind, object_id=OuterRef(ref)).values('version')
+    return Coalesce(Subquery(version[:1]), Value(0))
+
+
+def _variant(request):
+    query = request.META.get('QUERY_STRING', '')
+    if not query:
+        return ''
+    return '-' + hashlib.sha1(query.encode()).hexdigest()[:12]
+
+
+def _object_id(pk):
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def group_etag(request, pk):
+    """Strong ETag of the group detail, None if the group doesn't exist."""
+    pk = _object_id(pk)
+    if pk is None:
+        return None
+    version = (Group.objects.filter(pk=pk)
+               .annotate(version=version_of(ResourceVersion.GROUP))
+               .values_list('version', flat=True).first())
+    if version is None:
+        return None
+    return quote_etag('group-{}-{}{}'.format(pk, version, _variant(request)))
+
+
+def event_etag(request, pk):
+    """Strong ETag of the event detail, None if the event doesn't exist.
+
+    Before kickoff the bets shown depend on who is asking: everyone for group
+    admins, only their own bets for other users. That goes into the tag.
+    """
+    pk = _object_id(pk)
+    if pk is None:
+        return None
+    row = (Event.objects.filter(pk=pk)
+           .annotate(version=version_of(ResourceVersion.EVENT))
+           .values_list('version', 'time', 'group_id').first())
+    if row is None:
+        return None
+    version, time, group_id = row
+
+    if time < timezone.now():
+        viewer = 'all'
+    elif request.user.is_authenticated and roles.is_admin(request, group_id):
+        viewer = 'admin'
+    else:
+        viewer = 'u{}'.format(request.user.pk or 0)
+    return quote_etag('event-{}-{}-{}{}'.format(pk, version, viewer, _variant(request)))
+
+
+def not_modified(request, etag):
+    """True if the client's If-None-Match already holds etag."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header or etag is None:
+        return False
+    etags = parse_etags(header)
+    return etag in etags or '*' in etags
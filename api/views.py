@@ -1,42 +1,50 @@
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from django.utils import timezone
+from django.db import transaction
+from . import changes, exports, feed, fixtures, live, response_cache, roles, standings, versions, worker
+from .fixtures import CSVParser
+from .profiling import ProfiledViewMixin
+from .streaming import StreamingListMixin
+from .pagination import IdCursorPagination, TimeCursorPagination, RecentCursorPagination
 from .permission import GroupPermission, IsSuperUserOnly, SetAdminPermission, UserPermission, IsGroupAdminForEventCreate
 from rest_framework.decorators import action
-from .models import Group, Event, UserProfile, User, Member, Comment, Bet
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from .models import Group, Event, UserProfile, User, Member, Comment, Bet, Standing, ScoringJob, GroupChange
 from .serializers import (GroupSerializer, EventSerializer, GroupFullSerializer,
                           UserSerializer, UserProfileSerializer, ChangePasswordSerializer,
                           MemberSerializer, CommentSerializer, EventFullSerializer,
                           BetSerializer, PlaceBetSerializer, SetResultsSerializer,
-                          SetMemberAdminSerializer)
+                          SetMemberAdminSerializer, StandingSerializer, PlaceBetsSerializer,
+                          ScoringJobSerializer)
 from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
-from rest_framework.authentication import TokenAuthentication
+from .authentication import CachedTokenAuthentication
 
 from datetime import datetime
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ProfiledViewMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    authentication_classes = (TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = [UserPermission]
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
         user = self.request.user
 
         if user.is_superuser:
-            return User.objects.all()
+            return UserSerializer.load(User.objects.all(), self.request)
 
 
-        group_ids = Member.objects.filter(
-            user=user,
-            admin=True
-        ).values_list('group_id', flat=True)
+        group_ids = roles.admin_group_ids(self.request)
 
-        return User.objects.filter(
+        return UserSerializer.load(User.objects.filter(
             members_of__group_id__in=group_ids
-        ).distinct()
+        ).distinct(), self.request)
 
     @action(methods=['PUT'], detail=True, serializer_class=ChangePasswordSerializer,
             permission_classes=[UserPermission]
@@ -54,40 +62,144 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({'message': 'Password Updated'}, status.HTTP_200_OK)
 
 
-class UserProfileViewset(viewsets.ModelViewSet):
+class UserProfileViewset(ProfiledViewMixin, viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsSuperUserOnly,)
 
-class CommentViewset(viewsets.ModelViewSet):
+class CommentViewset(ProfiledViewMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    pagination_class = RecentCursorPagination
+
+    def get_queryset(self):
+        return CommentSerializer.load(super().get_queryset(), self.request, keep=('time',))
+
+    def perform_destroy(self, instance):
+        pk = instance.pk
+        instance.delete()
+        versions.bump_groups([instance.group_id])
+        changes.record(instance.group_id, GroupChange.COMMENT, [pk])
 
 
-class GroupViewset(viewsets.ModelViewSet):
+class GroupViewset(ProfiledViewMixin, viewsets.ModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (GroupPermission,)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = GroupFullSerializer.prefetch(queryset, self.request)
+        elif self.action == 'list':
+            queryset = GroupSerializer.load(queryset, self.request)
+        return queryset
+
     def retrieve(self, request, *args, **kwargs):
+        etag = versions.group_etag(request, kwargs['pk'])
+        if versions.not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        if etag is None or not response_cache.option('ENABLED'):
+            return Response(self.serialize_group(), headers={'ETag': etag} if etag else None)
+
+        key = response_cache.group_key(etag, response_cache.visibility(request, kwargs['pk']))
+        data = response_cache.get_or_compute(key, self.serialize_group)
+        return Response(data, headers={'ETag': etag})
+
+    def serialize_group(self):
         instance = self.get_object()
-        serializer = GroupFullSerializer(instance, many=False, context={'request': request})
+        serializer = GroupFullSerializer(instance, many=False, context={'request': self.request})
+        return serializer.data
+
+    @action(detail=False, methods=['GET'], permission_classes=[IsSuperUserOnly])
+    def cache_stats(self, request):
+        return Response(response_cache.stats.snapshot())
+
+    @action(detail=True, methods=['GET'])
+    def comments(self, request, pk=None):
+        """The group's comments newest first, paged with ?before=, polled with ?after= or ?since=."""
+        group = self.get_object()
+        limit = IdCursorPagination().get_page_size(request)
+        comments, more = feed.page(Comment.objects.filter(group_id=group.pk), request.query_params, limit)
+        serializer = CommentSerializer(comments, many=True, context={'request': request})
+        return Response({
+            'results': serializer.data,
+            'more': more,
+            'before': feed.encode_cursor(comments[-1]) if comments else request.query_params.get('before'),
+            'after': feed.encode_cursor(comments[0]) if comments else request.query_params.get('after'),
+        })
+
+    @action(detail=True, methods=['GET'])
+    def changes(self, request, pk=None):
+        """Events, members, comments and standings changed after ?since=<version>.
+
+        Without ?since the current state is returned, clients keep the version
+        of each answer and pass it back on the next sync.
+        """
+        group = self.get_object()
+        since = request.query_params.get('since')
+        if since is None:
+            return Response(changes.snapshot(request, group))
+        return Response(changes.delta(request, group, changes.parse_version(since)))
+
+    @action(detail=True, methods=['GET'])
+    def leaderboard(self, request, pk=None):
+        group = self.get_object()
+        standings = Standing.objects.filter(group=group).select_related('user').order_by('rank', 'user_id')
+        serializer = StandingSerializer(standings, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=True, methods=['GET'])
+    def export_bets(self, request, pk=None):
+        return self.export(request, exports.bet_rows, 'bets')
 
+    @action(detail=True, methods=['GET'])
+    def export_standings(self, request, pk=None):
+        return self.export(request, exports.standing_rows, 'standings')
 
-class EventViewset(viewsets.ModelViewSet):
+    def export(self, request, source, name):
+        """Stream flat rows of the group as ?output=csv (default) or jsonl, gzipped with ?gzip=1."""
+        group = self.get_object()
+        if not (request.user.is_superuser or roles.is_admin(request, group.pk)):
+            return Response({'message': 'Only superuser or group admin allowed'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        output = request.query_params.get('output', 'csv')
+        if output not in exports.FORMATS:
+            return Response({'message': 'output must be one of: {}'.format(', '.join(exports.FORMATS))},
+                            status=status.HTTP_400_BAD_REQUEST)
+        compress = request.query_params.get('gzip') in ('1', 'true')
+
+        header, rows = source([group.pk])
+        return exports.response(header, rows, output, compress, 'group-{}-{}'.format(group.pk, name))
+
+
+class EventViewset(ProfiledViewMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsGroupAdminForEventCreate,)
+    pagination_class = TimeCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            return EventFullSerializer.load(queryset, self.request)
+        if self.action == 'list':
+            return EventSerializer.load(queryset, self.request, keep=('time',))
+        return queryset
 
     def retrieve(self, request, *args, **kwargs):
+        etag = versions.event_etag(request, kwargs['pk'])
+        if versions.not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
         instance = self.get_object()
         serializer = EventFullSerializer(instance, many=False, context={'request': request})
-        return Response(serializer.data)
+        return Response(serializer.data, headers={'ETag': etag} if etag else None)
 
     @action(detail=True, methods=['PUT'])
     def set_results(self, request, pk=None):
@@ -98,18 +210,65 @@ class EventViewset(viewsets.ModelViewSet):
 
         event.score1 = serializer.validated_data['score1']
         event.score2 = serializer.validated_data['score2']
-        event.save()
-        event.calculate_points()
+        with transaction.atomic():
+            event.save()
+            transaction.on_commit(lambda: live.publish_result(event))
+            job = worker.enqueue(event)
+        job.refresh_from_db()
+        return Response(
+            {
+                "message": "Results saved, scoring queued",
+                "event": dict(EventSerializer(event).data, score1=event.score1, score2=event.score2),
+                "job": ScoringJobSerializer(job).data
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+    @action(detail=False, methods=['POST'], url_path='import', permission_classes=[IsAuthenticated],
+            parser_classes=[JSONParser, CSVParser, MultiPartParser])
+    def import_fixtures(self, request):
+        rows = fixtures.read_rows(request)
+        max_rows = getattr(settings, 'BWF_FIXTURE_IMPORT_MAX_ROWS', 10000)
+        if len(rows) > max_rows:
+            return Response({'message': 'Too many events, the limit is {}'.format(max_rows)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        events, errors = fixtures.import_fixtures(request, rows, request.query_params.get('group'))
+        if errors:
+            return Response({'message': 'Import failed', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
         return Response(
-            EventFullSerializer(event, context={'request': request}).data
+            {
+                "message": "Events imported",
+                "created": len(events),
+                "groups": sorted({e.group_id for e in events})
+            },
+            status=status.HTTP_201_CREATED
         )
 
 
+class ScoringJobViewset(ProfiledViewMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ScoringJob.objects.all()
+    serializer_class = ScoringJobSerializer
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    pagination_class = IdCursorPagination
 
-class MemberViewset(viewsets.ModelViewSet):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.is_superuser:
+            return queryset
+        return queryset.filter(event__group_id__in=list(roles.get_roles(self.request)))
+
+
+class MemberViewset(ProfiledViewMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        return MemberSerializer.load(super().get_queryset(), self.request)
     # permission_classes = (IsAuthenticatedOrReadOnly,)
     @action(methods=['post'], detail=False)
     def join(self, request):
@@ -118,7 +277,7 @@ class MemberViewset(viewsets.ModelViewSet):
                 group = Group.objects.get(id=request.data['group'])
                 user = User.objects.get(id=request.data['user'])
                 member = Member.objects.create(group=group, user=user, admin=False)
-                serializer = MemberSerializer(member, many=False)
+                serializer = MemberSerializer(member, many=False, context={'request': request})
                 response = {'message': 'Joined group', 'results': serializer.data}
                 return Response(response, status=status.HTTP_200_OK)
             except:
@@ -183,10 +342,14 @@ class MemberViewset(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
 
-class BetViewset(viewsets.ModelViewSet):
+class BetViewset(ProfiledViewMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Bet.objects.all()
     serializer_class = BetSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        return BetSerializer.load(super().get_queryset(), self.request)
     #permission_classes = (GroupPermission,)
 
     def create(self, request, *args, **kwargs):
@@ -197,6 +360,10 @@ class BetViewset(viewsets.ModelViewSet):
         response = {'message': "Metod not allowed"}
         return Response(response, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    def perform_destroy(self, instance):
+        instance.delete()
+        versions.bump_events([instance.event_id])
+
     @action(detail=False, methods=['POST'], url_path='place_bet')
     def place_bet(self, request):
         serializer = PlaceBetSerializer(data=request.data)
@@ -212,7 +379,7 @@ class BetViewset(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not self.checkIfUserInGroup(event.group, request.user):
+        if not self.checkIfUserInGroup(event.group_id):
             return Response(
                 {"message": "User not in group"},
                 status=status.HTTP_403_FORBIDDEN
@@ -227,7 +394,8 @@ class BetViewset(viewsets.ModelViewSet):
             }
         )
 
-        response_serializer = BetSerializer(bet)
+        bet = BetSerializer.load(Bet.objects.filter(pk=bet.pk), request, nested=True).get()
+        response_serializer = BetSerializer(bet, context={'request': request})
 
         return Response(
             {
@@ -238,12 +406,68 @@ class BetViewset(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
 
-    def checkIfUserInGroup(self, group, user):
-        return Member.objects.filter(user=user, group=group).exists()
+    @action(detail=False, methods=['POST'], url_path='place_bets')
+    def place_bets(self, request):
+        serializer = PlaceBetsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        predictions = serializer.validated_data['bets']
+
+        event_ids = {p['event'] for p in predictions}
+        events = Event.objects.only('id', 'time', 'group_id').in_bulk(event_ids)
+        # Only tells created from updated apart, the write below is an upsert.
+        existing = set(Bet.objects.filter(user=request.user, event_id__in=event_ids)
+                       .values_list('event_id', flat=True))
+        now = timezone.now()
+
+        results = []
+        placed = {}
+        for prediction in predictions:
+            event_id = prediction['event']
+            event = events.get(event_id)
+            result = {'event': event_id}
+            results.append(result)
+
+            if event is None:
+                result.update(status='error', message='Event does not exist')
+            elif event.time < now:
+                result.update(status='error', message="You can't place a bet. Too late!")
+            elif not self.checkIfUserInGroup(event.group_id):
+                result.update(status='error', message='User not in group')
+            elif event_id in placed:
+                result.update(status='error', message='Duplicate event in request')
+            else:
+                bet = Bet(user=request.user, event_id=event_id,
+                          score1=prediction['score1'], score2=prediction['score2'])
+                placed[event_id] = bet
+                result['status'] = 'updated' if event_id in existing else 'created'
+                result['bet'] = bet
+
+        with transaction.atomic():
+            # A concurrent place_bet for the same event updates instead of failing.
+            Bet.objects.bulk_create(placed.values(), update_conflicts=True,
+                                    unique_fields=['user', 'event'], update_fields=['score1', 'score2'])
+            versions.bump_events(list(placed))
+
+        for result in results:
+            bet = result.pop('bet', None)
+            if bet is not None:
+                result.update(id=bet.id, score1=bet.score1, score2=bet.score2)
+
+        return Response(
+            {
+                "message": "Bets processed",
+                "placed": len(placed),
+                "results": results
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def checkIfUserInGroup(self, group_id):
+        return roles.is_member(self.request, group_id)
 
 
 
-class CustomObtainAuthToken(ObtainAuthToken):
+class CustomObtainAuthToken(ProfiledViewMixin, ObtainAuthToken):
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(
             data=request.data,
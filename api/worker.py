@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+
+from .models import ScoringJob
+from .live import publish_standings
+from .scoring import score_bets
+from .standings import refresh_ranks
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'EAGER': False,
+    'THREADS': 2,
+    'CHUNK_SIZE': 2000,
+    'STALE_AFTER': 300,
+    'POLL_INTERVAL': 2,
+    'MAX_ATTEMPTS': 3,
+    'RESUME_ON_START': False,
+}
+
+
+def option(name):
+    return getattr(settings, 'BWF_SCORING', {}).get(name, DEFAULTS[name])
+
+
+def enqueue(event):
+    """Queue scoring of the event's current result and return the job.
+
+    Pending jobs for the same event are superseded, only the latest result
+    gets scored. The job is handed to the worker once the transaction commits.
+    """
+    with transaction.atomic():
+        ScoringJob.objects.filter(event=event, status=ScoringJob.PENDING).update(
+            status=ScoringJob.SUPERSEDED, finished=timezone.now())
+        job = ScoringJob.objects.create(
+            event=event,
+            score1=event.score1,
+            score2=event.score2,
+            total=event.bets.count(),
+        )
+    transaction.on_commit(kick)
+    return job
+
+
+def claim_job():
+    """Mark the oldest runnable pending job as running and return it.
+
+    A job is runnable when no other job of the same event is running, so
+    two results of one event are never scored at the same time.
+    """
+    while True:
+        with transaction.atomic():
+            running = ScoringJob.objects.filter(status=ScoringJob.RUNNING).values('event_id')
+            job = (ScoringJob.objects.filter(status=ScoringJob.PENDING)
+                   .exclude(event_id__in=running).order_by('id').first())
+            if job is None:
+                return None
+
+            claimed = ScoringJob.objects.filter(pk=job.pk, status=ScoringJob.PENDING).update(
+                status=ScoringJob.RUNNING,
+                attempts=job.attempts + 1,
+                started=job.started or timezone.now(),
+                updated=timezone.now(),
+            )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job):
+    """Score a claimed job in chunks, recording progress after each one.
+
+    Every chunk commits its points, standings deltas and the job cursor
+    together, so a job taken over after a crash resumes where it stopped.
+    The group is re-ranked once, after the last chunk.
+    """
+    chunk_size = option('CHUNK_SIZE')
+    group_id = job.event.group_id
+    try:
+        while True:
+            with transaction.atomic():
+                scored, last_id = score_bets(job.event_id, group_id, job.score1, job.score2,
+                                             after_id=job.last_bet_id, limit=chunk_size, rank=False)
+                if last_id is None:
+                    break
+                job.last_bet_id = last_id
+                job.processed += scored
+                job.save(update_fields=['last_bet_id', 'processed', 'updated'])
+
+        ranked = refresh_ranks(group_id)
+        if ranked:
+            publish_standings(group_id, ranked)
+        job.status = ScoringJob.DONE
+        job.total = max(job.total, job.processed)
+        job.finished = timezone.now()
+        job.save(update_fields=['status', 'total', 'finished', 'updated'])
+    except Exception:
+        logger.exception("Scoring job %s failed, attempt %s", job.pk, job.attempts)
+        job.error = traceback.format_exc()
+        if job.attempts < option('MAX_ATTEMPTS'):
+            # Resumes from the last committed chunk.
+            job.status = ScoringJob.PENDING
+        else:
+            job.status = ScoringJob.FAILED
+            job.finished = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished', 'updated'])
+    return job
+
+
+def requeue_stale():
+    """Return running jobs whose worker stopped reporting progress to the queue.
+
+    Jobs that already used MAX_ATTEMPTS are failed instead, so a job that
+    takes its worker down with it is not picked up forever.
+    """
+    stale_before = timezone.now() - timedelta(seconds=option('STALE_AFTER'))
+    stale = ScoringJob.objects.filter(status=ScoringJob.RUNNING, updated__lt=stale_before)
+    stale.filter(attempts__gte=option('MAX_ATTEMPTS')).update(
+        status=ScoringJob.FAILED, error="Worker stopped during the last attempt", finished=timezone.now())
+    return stale.update(status=ScoringJob.PENDING)
+
+
+def drain():
+    """Requeue stale jobs, then run jobs until the queue is empty, return how many ran."""
+    ran = 0
+    try:
+        requeue_stale()
+        while True:
+            job = claim_job()
+            if job is None:
+                return ran
+            run_job(job)
+            ran += 1
+    finally:
+        if not option('EAGER'):
+            close_old_connections()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def kick():
+    """Start draining the queue: inline in eager mode, else on the local thread pool.
+
+    With THREADS set to 0 nothing runs in the web process and jobs wait for
+    the scoring_worker management command.
+    """
+    global _executor
+
+    if option('EAGER'):
+        drain()
+        return
+
+    threads = option('THREADS')
+    if threads <= 0:
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='scoring')
+    _executor.submit(drain)
+
+
+def start(streams=False):
+    """Called by the WSGI and ASGI entry points when the process starts.
+
+    Live standings are published by the process that scores, so streams
+    (ASGI) with THREADS = 0 never reach their viewers; that is logged rather
+    than refused. With RESUME_ON_START the jobs a previous web process left
+    behind are drained now and once more after STALE_AFTER, when the jobs
+    that were running at the restart count as stale. Otherwise they wait for
+    the next drain, or for the scoring_worker command.
+    """
+    if streams and not option('EAGER') and option('THREADS') <= 0:
+        logger.warning("BWF_SCORING['THREADS'] = 0 scores in the scoring_worker process, whose "
+                       "standings never reach the viewers of live streams; use THREADS > 0 or EAGER.")
+    if not option('RESUME_ON_START'):
+        return
+    if option('EAGER'):
+        kick()
+        return
+    if option('THREADS') <= 0:
+        return
+    kick()
+    timer = threading.Timer(option('STALE_AFTER'), kick)
+    timer.daemon = True
+    timer.start()
+
+
+def run_worker(once=False):
+    """Loop of the standalone worker process."""
+    while True:
+        drain()
+        if once:
+            return
+        time.sleep(option('POLL_INTERVAL'))
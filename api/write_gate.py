@@ -0,0 +1,167 @@
+import asyncio
+import threading
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+
+DEFAULTS = {
+    'ENABLED': False,
+    'TIMEOUT': 30,
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def option(name):
+    return getattr(settings, 'BWF_WRITE_GATE', {}).get(name, DEFAULTS[name])
+
+
+class WriteGate:
+    """First-come first-served lock for writing requests.
+
+    SQLite admits one writer at a time and its busy handler retries with
+    growing sleeps, so under a burst some writers starve into "database is
+    locked". Waiting here instead hands the database to writers in arrival
+    order; the busy timeout is only left to arbitrate between processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held = False
+        self._waiters = deque()
+
+    def acquire(self, timeout=None):
+        with self._lock:
+            if not self._held and not self._waiters:
+                self._held = True
+                return True
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+
+        if waiter.wait(timeout):
+            return True
+        with self._lock:
+            if waiter.is_set():
+                # Handed over just as the wait timed out.
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    async def aacquire(self, timeout=None):
+        """acquire() for coroutines, queued in the same line as threads."""
+        with self._lock:
+            if not self._held and not self._waiters:
+                self._held = True
+                return True
+            waiter = AsyncWaiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter.is_set():
+                    return True
+                self._waiters.remove(waiter)
+                return False
+        except asyncio.CancelledError:
+            # The client went away, give the gate on if it was handed over meanwhile.
+            with self._lock:
+                handed = waiter.is_set()
+                if not handed:
+                    self._waiters.remove(waiter)
+            if handed:
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # The gate stays held, ownership moves to the oldest waiter.
+                self._waiters.popleft().set()
+            else:
+                self._held = False
+
+    @property
+    def waiting(self):
+        with self._lock:
+            return len(self._waiters)
+
+
+class AsyncWaiter:
+    """threading.Event look-alike that wakes a coroutine, set() may come from any thread."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.handed = False
+
+    def set(self):
+        self.handed = True
+        self.loop.call_soon_threadsafe(self.wake)
+
+    def wake(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+    def is_set(self):
+        return self.handed
+
+
+gate = WriteGate()
+
+
+class WriteGateMiddleware:
+    """Queue requests with unsafe methods on the process-wide write gate.
+
+    Active with BWF_WRITE_GATE['ENABLED'] on a SQLite default database.
+    A request that waits longer than BWF_WRITE_GATE['TIMEOUT'] seconds is
+    answered with 503 and Retry-After rather than a locked-database error.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.applies(request):
+            return self.get_response(request)
+
+        if not gate.acquire(option('TIMEOUT')):
+            return self.busy()
+        try:
+            return self.get_response(request)
+        finally:
+            gate.release()
+
+    async def __acall__(self, request):
+        if not self.applies(request):
+            return await self.get_response(request)
+
+        if not await gate.aacquire(option('TIMEOUT')):
+            return self.busy()
+        try:
+            return await self.get_response(request)
+        finally:
+            gate.release()
+
+    @staticmethod
+    def applies(request):
+        return (request.method not in SAFE_METHODS and option('ENABLED')
+                and connections['default'].vendor == 'sqlite')
+
+    @staticmethod
+    def busy():
+        response = JsonResponse({'detail': 'Server busy, retry shortly'}, status=503)
+        response['Retry-After'] = '1'
+        return response
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bwf.settings')
 
 application = get_asgi_application()
+
+from api import worker  # noqa: E402
+
+worker.start(streams=True)
@@ -46,6 +46,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.profiling.ProfilingMiddleware',
+    'api.throttling.ThrottleMiddleware',
+    'api.write_gate.WriteGateMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -74,6 +78,109 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'bwf.wsgi.application'
 
+# Default page size of list endpoints and the upper bound for ?page_size=
+BWF_PAGE_SIZE = 50
+BWF_MAX_PAGE_SIZE = 500
+# Latest comments embedded in group detail, older ones come from /api/groups/<id>/comments/
+BWF_GROUP_DETAIL_COMMENTS = 20
+# Changes kept per group by `manage.py prune_group_changes`, older sync versions get a snapshot
+BWF_GROUP_CHANGES_KEEP = 10000
+# Largest schedule accepted by POST /api/events/import/
+BWF_FIXTURE_IMPORT_MAX_ROWS = 10000
+# Rows fetched per query by list endpoints streaming everything with ?stream=1
+BWF_LIST_STREAM_CHUNK_SIZE = 1000
+
+# Seconds a user's group memberships may be reused across requests (0 = per request only)
+BWF_ROLE_CACHE_TTL = 0
+
+# In-process token -> user cache used by CachedTokenAuthentication
+BWF_TOKEN_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+}
+
+# Live group streams (ASGI only): seconds between keepalives, messages kept per slow viewer
+BWF_STREAM_HEARTBEAT = 15
+BWF_STREAM_QUEUE_SIZE = 100
+
+# Background scoring queued by set_results. EAGER scores right after commit in the
+# request, THREADS > 0 drains the queue on a local thread pool, THREADS = 0 leaves
+# jobs to `manage.py scoring_worker`. Running jobs without progress for
+# STALE_AFTER seconds are requeued whenever the queue is drained, and failed jobs
+# are retried until they have run MAX_ATTEMPTS times. Live standings events are
+# published by the process that scores, so the ASGI server warns about THREADS = 0.
+# RESUME_ON_START (BWF_SCORING_RESUME=1) makes a starting web process pick up
+# the jobs a previous one left behind; turn it on for one process only.
+BWF_SCORING = {
+    'EAGER': False,
+    'THREADS': 2,
+    'CHUNK_SIZE': 2000,
+    'STALE_AFTER': 300,
+    'POLL_INTERVAL': 2,
+    'MAX_ATTEMPTS': 3,
+    'RESUME_ON_START': os.environ.get('BWF_SCORING_RESUME', '0') == '1',
+}
+
+# Cache of group detail payloads, keyed by the group's version and the viewer's
+# visibility class. CACHE names the Django cache (CACHES below) holding them.
+BWF_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'TTL': 300,
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bwf',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bwf-throttle',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Request limits checked before authentication, see api.throttling. RULES maps a
+# URL name to the methods it covers and "count/period" (s, min, hour, day) limits
+# per 'user' (Authorization header), 'ip' and 'endpoint' (all clients together).
+# CACHE names the Django cache holding the counters, share it between processes
+# (e.g. Redis or Memcached) for limits that hold across workers. Behind reverse
+# proxies set NUM_PROXIES to how many of them append to X-Forwarded-For, else
+# every client counts as the proxy's address. BWF_THROTTLE=0 turns it off.
+BWF_THROTTLE = {
+    'ENABLED': os.environ.get('BWF_THROTTLE', '1') == '1',
+    'CACHE': 'throttle',
+    'NUM_PROXIES': int(os.environ.get('BWF_NUM_PROXIES', '0')),
+    'RULES': {
+        'authenticate': {'methods': ('POST',), 'ip': '20/min', 'endpoint': '1200/min'},
+        'bet-place-bet': {'methods': ('POST',), 'user': '60/min', 'ip': '300/min', 'endpoint': '6000/min'},
+        'place-bet-async': {'methods': ('POST',), 'user': '60/min', 'ip': '300/min', 'endpoint': '6000/min'},
+        'bet-place-bets': {'methods': ('POST',), 'user': '20/min', 'ip': '100/min', 'endpoint': '2000/min'},
+        'comment-list': {'methods': ('POST',), 'user': '10/min', 'ip': '60/min', 'endpoint': '1200/min'},
+        'group-comments': {'methods': ('GET',), 'user': '120/min', 'ip': '600/min'},
+    },
+}
+
+# Request profiling (Server-Timing header and JSON logs to the 'api.profiling' logger)
+BWF_PROFILING = {
+    'ENABLED': os.environ.get('BWF_PROFILING') == '1',
+    'SAMPLE_RATE': float(os.environ.get('BWF_PROFILING_SAMPLE_RATE', '0.01')),
+    'TOP_QUERIES': 5,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
 ]
@@ -81,13 +188,60 @@ CORS_ALLOWED_ORIGINS = [
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# 'basic' is Django's stock setup, BWF_SQLITE_PROFILE=production tunes SQLite
+# for concurrent writers with the settings below.
+BWF_SQLITE_PROFILE = os.environ.get('BWF_SQLITE_PROFILE', 'basic')
+
+# WAL lets reads run next to the writer. IMMEDIATE transactions take the write
+# lock at BEGIN, so a busy database is waited for (timeout, in seconds) instead
+# of failing when a read transaction tries to upgrade to a write.
+BWF_SQLITE_PRODUCTION = {
+    'CONN_MAX_AGE': int(os.environ.get('BWF_CONN_MAX_AGE', '60')),
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        'timeout': 20,
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA temp_store=MEMORY',
+            'PRAGMA cache_size=-20000',
+            'PRAGMA mmap_size=134217728',
+        ]),
+    },
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('BWF_DB_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+if BWF_SQLITE_PROFILE == 'production':
+    DATABASES['default'].update(BWF_SQLITE_PRODUCTION)
+
+# Read replicas: BWF_REPLICAS="/path/a.sqlite3,/path/b.sqlite3" adds the aliases
+# replica_1, replica_2, ... serving the reads of GET/HEAD/OPTIONS API requests.
+# Locally they are file copies of the primary refreshed by `manage.py sync_replicas`.
+# A client that wrote reads from the primary for BWF_REPLICA_STICKY_SECONDS,
+# tracked in the default cache (use a shared one with several processes).
+BWF_READ_REPLICAS = []
+for number, name in enumerate(filter(None, os.environ.get('BWF_REPLICAS', '').split(',')), start=1):
+    alias = 'replica_{}'.format(number)
+    DATABASES[alias] = dict(DATABASES['default'], NAME=name.strip(), TEST={'MIRROR': 'default'})
+    BWF_READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+BWF_REPLICA_STICKY_SECONDS = 10
+
+# Queue writing requests of this process one after another (see api.write_gate),
+# only applies to SQLite. TIMEOUT seconds of waiting answer 503.
+BWF_WRITE_GATE = {
+    'ENABLED': BWF_SQLITE_PROFILE == 'production',
+    'TIMEOUT': 30,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
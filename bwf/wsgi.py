@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bwf.settings')
 
 application = get_wsgi_application()
+
+from api import worker  # noqa: E402
+
+worker.start()